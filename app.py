@@ -1,10 +1,12 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Flask, render_template, request, redirect, url_for, flash, make_response, Response, stream_with_context
 from health_routes import create_health_bp
-from di_container import initialize_container, get_auth_service, get_health_service, get_notification_service
+from di_container import initialize_container, get_auth_service, get_health_service, get_notification_service, get_connection_manager, get_checkpoint_scheduler, get_alert_scan_scheduler, get_reminder_scheduler, get_session_sweeper, get_migrator, get_repository, get_dashboard_service, get_export_service, get_login_throttle, get_password_reset_throttle
+from services.export_service import EXPORT_FORMATS
+from services.password_hashing import HashingBusy
 from datetime import datetime, timedelta
+from user_session import get_current_user, login_user, logout_user, invalidate_current_user, revoke_user_sessions
+import math
 import os
-from repositories.mood_repository import MoodRepository
 import random
 
 app = Flask(__name__)
@@ -16,164 +18,19 @@ DB_PATH = 'healthTracker.db'
 initialize_container(DB_PATH)
 
 def init_db():
-    """Initialize database with required tables"""
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Create users table with all required fields
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            email TEXT,
-            gender TEXT,
-            birthday TEXT,
-            created_at TEXT
-        )
-    """)
-    
-    # Create health data tables
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS blood_pressure (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            systolic INTEGER,
-            diastolic INTEGER,
-            pulse INTEGER,
-            notes TEXT,
-            date TEXT,
-            recorded_at TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS height_weight (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            height REAL,
-            weight REAL,
-            notes TEXT,
-            date TEXT,
-            recorded_at TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS medical_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            visit_date TEXT,
-            hospital TEXT,
-            department TEXT,
-            doctor TEXT,
-            diagnosis TEXT,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS appointments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            appointment_date TEXT,
-            hospital TEXT,
-            department TEXT,
-            doctor TEXT,
-            reason TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS exercise_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            exercise_date TEXT,
-            exercise_type TEXT,
-            duration INTEGER,
-            calories INTEGER,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS diet_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            diet_date TEXT,
-            meal_type TEXT,
-            description TEXT,
-            calories INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS mood_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            mood TEXT,
-            mood_date TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    # Add missing columns to existing tables
-    columns = [row[1] for row in c.execute("PRAGMA table_info(users)")]
-    for col, coltype in [('email', 'TEXT'), ('gender', 'TEXT'), ('birthday', 'TEXT'), ('created_at', 'TEXT')]:
-        if col not in columns:
-            c.execute(f'ALTER TABLE users ADD COLUMN {col} {coltype}')
-    
-    # Add missing columns to blood_pressure table
-    bp_columns = [row[1] for row in c.execute("PRAGMA table_info(blood_pressure)")]
-    for col, coltype in [('pulse', 'INTEGER'), ('notes', 'TEXT'), ('date', 'TEXT'), ('recorded_at', 'TEXT')]:
-        if col not in bp_columns:
-            c.execute(f'ALTER TABLE blood_pressure ADD COLUMN {col} {coltype}')
-    
-    # Add missing columns to height_weight table
-    hw_columns = [row[1] for row in c.execute("PRAGMA table_info(height_weight)")]
-    for col, coltype in [('notes', 'TEXT'), ('date', 'TEXT'), ('recorded_at', 'TEXT')]:
-        if col not in hw_columns:
-            c.execute(f'ALTER TABLE height_weight ADD COLUMN {col} {coltype}')
-    
-    conn.commit()
-    conn.close()
+    """Apply pending schema migrations (a single version check when current)"""
+    get_migrator().ensure_current()
 
 init_db()
 
-def get_current_user():
-    """Get current logged in user"""
-    username = session.get('username')
-    if not username:
-        return None
-    
-    auth_service = get_auth_service()
-    user = auth_service.get_user_by_username(username)
-    if user:
-        # Convert User object to dict for backward compatibility
-        return {
-            'id': user.id,
-            'username': user.username,
-            'password': user.password,
-            'email': user.email,
-            'gender': user.gender,
-            'birthday': user.birthday,
-            'created_at': user.created_at
-        }
-    return None
+# Keep the WAL file small under sustained writes
+get_checkpoint_scheduler().start()
+
+# Health alerts are generated off the request path (python -m database.alerts scan)
+# and read by the dashboard; set HEALTHTRACKER_ALERT_SCAN_INTERVAL to scan in-process instead
+get_alert_scan_scheduler().start()
+get_reminder_scheduler().start()
+get_session_sweeper().start()
 
 @app.route('/')
 def index():
@@ -183,84 +40,27 @@ def index():
         return redirect(url_for('login'))
     
     health_service = get_health_service()
-    notification_service = get_notification_service()
-    
-    # Get user profile information
-    gender, birthday = health_service.get_user_profile(user['id'])
-    age_str, age_years = health_service.calculate_age_and_days(birthday)
+    snapshot = get_dashboard_service().get_snapshot(user['id'])
+    if snapshot is None:
+        return redirect(url_for('login'))
+    age_str, age_years = snapshot.age_str, snapshot.age_years
     
     # Get health recommendations
-    disease_info, prevention = health_service.get_disease_info_and_prevention(age_years)
-    # 修正：確保 disease_info, prevention 為 list 型態
-    if isinstance(disease_info, str):
-        disease_info = [disease_info]
-    if isinstance(prevention, str):
-        prevention = [prevention]
+    disease_info, prevention = health_service.get_disease_info_and_prevention(age_years, snapshot.gender)
     warning = '※以上資訊僅供參考，實際健康狀況請諮詢專業醫師診斷與建議。'
     
-    # Get next appointment
-    next_appointment = None
+    # Next appointment reminder
+    next_appointment = snapshot.next_appointment
     appt_reminder = None
-    
-    # Query next appointment from database
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    today = datetime.today().date()
-    c.execute('''SELECT appointment_date, hospital, department, reason FROM appointments 
-                WHERE user_id=? AND appointment_date >= ? ORDER BY appointment_date ASC LIMIT 1''', 
-              (user['id'], today.strftime('%Y-%m-%d')))
-    appt = c.fetchone()
-    
-    if appt:
-        appt_date = datetime.strptime(appt[0], '%Y-%m-%d').date()
-        days_left = (appt_date - today).days
-        next_appointment = {
-            'date': appt[0],
-            'hospital': appt[1],
-            'department': appt[2],
-            'reason': appt[3],
-            'days_left': days_left
-        }
-        
+    if next_appointment:
+        days_left = next_appointment['days_left']
         if days_left <= 7:
-            appt_reminder = f"⚠️ 您有預約於 {appt[0]} ({days_left} 天後) 於 {appt[1]} {appt[2]} 看診，請準備相關資料。"
+            appt_reminder = f"⚠️ 您有預約於 {next_appointment['date']} ({days_left} 天後) 於 {next_appointment['hospital']} {next_appointment['department']} 看診，請準備相關資料。"
         else:
-            appt_reminder = f"下次預約看診：{appt[0]}，{appt[1]} {appt[2]}。"
-    
-    conn.close()
-    
-    # 取得最新血壓與BMI評估
-    bp_records = health_service.get_blood_pressure_records(user['id'])
-    bp_list = [
-        {
-            'id': r['id'],
-            'systolic': r['systolic'],
-            'diastolic': r['diastolic'],
-            'created_at': r.get('date', r.get('created_at', ''))
-        } for r in bp_records
-    ]
-    latest_bp = bp_list[0] if bp_list else None
-    bp_evaluation = health_service.evaluate_blood_pressure(latest_bp)
-
-    hw_records = health_service.get_height_weight_records(user['id'])
-    hw_list = [
-        {
-            'id': r['id'],
-            'height': r['height'],
-            'weight': r['weight'],
-            'created_at': r.get('date', r.get('created_at', ''))
-        } for r in hw_records
-    ]
-    latest_hw = hw_list[0] if hw_list else None
-    gender, birthday = health_service.get_user_profile(user['id'])
-    _, age = health_service.calculate_age_and_days(birthday)
-    bmi_evaluation = health_service.evaluate_bmi(latest_hw, gender, age)
-
+            appt_reminder = f"下次預約看診：{next_appointment['date']}，{next_appointment['hospital']} {next_appointment['department']}。"
+    
     # 檢查今日是否有心情紀錄
-    mood_repo = MoodRepository(DB_PATH)
-    today_mood = mood_repo.get_today_mood(user['id'])
-    show_mood_modal = today_mood is None
+    show_mood_modal = snapshot.today_mood is None
 
     # 每日小提醒
     daily_tips = [
@@ -277,7 +77,7 @@ def index():
     ]
     daily_tip = random.choice(daily_tips)
     
-    return render_template('index.html', 
+    response = make_response(render_template('index.html', 
                          username=user['username'], 
                          age_str=age_str, 
                          disease_info=disease_info, 
@@ -285,10 +85,25 @@ def index():
                          warning=warning, 
                          next_appointment=next_appointment, 
                          appt_reminder=appt_reminder,
-                         bp_evaluation=bp_evaluation,
-                         bmi_evaluation=bmi_evaluation,
+                         bp_evaluation=snapshot.bp_evaluation,
+                         bmi_evaluation=snapshot.bmi_evaluation,
+                         health_alerts=snapshot.alerts,
                          show_mood_modal=show_mood_modal,
-                         daily_tip=daily_tip)
+                         daily_tip=daily_tip))
+    response.headers['Server-Timing'] = ', '.join(
+        f"{name};dur={ms:.2f}" for name, ms in snapshot.timings.items())
+    return response
+
+@app.errorhandler(HashingBusy)
+def hashing_busy(e):
+    """Login, registration and password reset when the hashing pool is saturated"""
+    flash('目前登入人數眾多，請稍後再試')
+    return redirect(request.path)
+
+def _too_many_attempts(template: str, retry_after: float):
+    """429 response for a throttled login or password reset"""
+    flash(f'嘗試次數過多，請於 {math.ceil(retry_after / 60)} 分鐘後再試')
+    return render_template(template), 429, {'Retry-After': str(math.ceil(retry_after))}
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -314,10 +129,15 @@ def login():
         username = request.form['username']
         password = request.form['password']
         
+        # Before any lookup or hashing, so a rejected attempt costs almost nothing
+        retry_after = get_login_throttle().attempt(request.remote_addr, username)
+        if retry_after:
+            return _too_many_attempts('login.html', retry_after)
+        
         auth_service = get_auth_service()
         user = auth_service.authenticate_user(username, password)
         if user:
-            session['username'] = username
+            login_user(user)
             return redirect(url_for('index'))
         
         flash('帳號或密碼錯誤')
@@ -327,7 +147,7 @@ def login():
 @app.route('/logout')
 def logout():
     """User logout"""
-    session.pop('username', None)
+    logout_user()
     flash('已登出')
     return redirect(url_for('login'))
 
@@ -346,11 +166,12 @@ def profile():
         
         # Update profile using health service
         health_service.update_user_profile(user['id'], gender, birthday)
+        invalidate_current_user()
         flash('基本資料已更新')
         return redirect(url_for('profile'))
     
     # Get current profile data
-    gender, birthday = health_service.get_user_profile(user['id'])
+    gender, birthday = user['gender'], user['birthday']
     age_str, _ = health_service.calculate_age_and_days(birthday)
     
     return render_template('profile.html', 
@@ -375,25 +196,16 @@ def blood_pressure():
         flash('血壓紀錄已刪除')
         return redirect(url_for('blood_pressure'))
     
-    # Get blood pressure records
-    bp_records = health_service.get_blood_pressure_records(user['id'])
-    
-    # Convert to format expected by template
-    bp_list = []
-    for record in bp_records:
-        bp_list.append({
-            'id': record['id'],
-            'systolic': record['systolic'],
-            'diastolic': record['diastolic'],
-            'created_at': record.get('date', record.get('created_at', ''))
-        })
+    # Get one page of blood pressure records
+    page = health_service.get_blood_pressure_records_page(
+        user['id'], request.args.get('limit', type=int), request.args.get('cursor'))
     
     # Get health evaluation for latest record
-    latest_bp = bp_list[0] if bp_list else None
-    evaluations = health_service.evaluate_blood_pressure(latest_bp)
+    evaluations = health_service.evaluate_latest_blood_pressure(user['id'])
     
     return render_template('blood_pressure.html', 
-                         bp_list=bp_list, 
+                         bp_list=page.items, 
+                         page=page,
                          evaluations=evaluations, 
                          username=user['username'])
 
@@ -413,26 +225,17 @@ def height_weight():
         flash('身高體重紀錄已刪除')
         return redirect(url_for('height_weight'))
     
-    # Get height/weight records
-    hw_records = health_service.get_height_weight_records(user['id'])
-    
-    # Convert to format expected by template
-    hw_list = []
-    for record in hw_records:
-        hw_list.append({
-            'id': record['id'],
-            'height': record['height'],
-            'weight': record['weight'],
-            'created_at': record.get('date', record.get('created_at', ''))
-        })
+    # Get one page of height/weight records
+    page = health_service.get_height_weight_records_page(
+        user['id'], request.args.get('limit', type=int), request.args.get('cursor'))
     
     # Get health evaluation for latest record
-    latest_hw = hw_list[0] if hw_list else None
-    gender, birthday = health_service.get_user_profile(user['id'])
+    gender, birthday = user['gender'], user['birthday']
     _, age = health_service.calculate_age_and_days(birthday)
-    evaluation = health_service.evaluate_bmi(latest_hw, gender, age)
+    evaluation = health_service.evaluate_latest_bmi(user['id'], gender, age)
     return render_template('height_weight.html', 
-                         hw_list=hw_list, 
+                         hw_list=page.items, 
+                         page=page,
                          evaluation=evaluation, 
                          username=user['username'])
 
@@ -443,38 +246,35 @@ def medical_records():
     if not user:
         return redirect(url_for('login'))
     
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    with get_connection_manager().connection() as conn:
+        c = conn.cursor()
     
-    if request.method == 'POST':
-        visit_date = request.form['visit_date']
-        hospital = request.form['hospital']
-        department = request.form['department']
-        diagnosis = request.form['diagnosis']
-        notes = request.form['notes']
+        if request.method == 'POST':
+            visit_date = request.form['visit_date']
+            hospital = request.form['hospital']
+            department = request.form['department']
+            diagnosis = request.form['diagnosis']
+            notes = request.form['notes']
         
-        c.execute('''INSERT INTO medical_records (user_id, visit_date, hospital, department, diagnosis, notes) 
-                    VALUES (?, ?, ?, ?, ?, ?)''',
-                  (user['id'], visit_date, hospital, department, diagnosis, notes))
-        conn.commit()
-        flash('醫療紀錄已新增')
-    
-    # Handle delete request
-    if request.args.get('delete_id'):
-        delete_id = request.args.get('delete_id')
-        c.execute('DELETE FROM medical_records WHERE id=? AND user_id=?', (delete_id, user['id']))
-        conn.commit()
-        flash('醫療紀錄已刪除')
-        return redirect(url_for('medical_records'))
-    
-    # Get medical records
-    c.execute('''SELECT id, visit_date, hospital, department, diagnosis, notes 
-                FROM medical_records WHERE user_id=? ORDER BY visit_date DESC''', (user['id'],))
-    records = c.fetchall()
-    conn.close()
-    
-    return render_template('medical_records.html', records=records, username=user['username'])
+            c.execute('''INSERT INTO medical_records (user_id, visit_date, hospital, department, diagnosis, notes) 
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                      (user['id'], visit_date, hospital, department, diagnosis, notes))
+            conn.commit()
+            flash('醫療紀錄已新增')
+    
+        # Handle delete request
+        if request.args.get('delete_id'):
+            delete_id = request.args.get('delete_id')
+            c.execute('DELETE FROM medical_records WHERE id=? AND user_id=?', (delete_id, user['id']))
+            conn.commit()
+            flash('醫療紀錄已刪除')
+            return redirect(url_for('medical_records'))
+    
+    # Get one page of medical records
+    page = get_repository('medical').get_medical_records_page(
+        user['id'], request.args.get('limit', type=int), request.args.get('cursor'))
+    
+    return render_template('medical_records.html', records=page.items, page=page, username=user['username'])
 
 @app.route('/appointments', methods=['GET', 'POST'])
 def appointments():
@@ -483,37 +283,34 @@ def appointments():
     if not user:
         return redirect(url_for('login'))
     
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
+    with get_connection_manager().connection() as conn:
+        c = conn.cursor()
     
-    if request.method == 'POST':
-        appointment_date = request.form['appointment_date']
-        hospital = request.form['hospital']
-        department = request.form['department']
-        reason = request.form['reason']
+        if request.method == 'POST':
+            appointment_date = request.form['appointment_date']
+            hospital = request.form['hospital']
+            department = request.form['department']
+            reason = request.form['reason']
         
-        c.execute('''INSERT INTO appointments (user_id, appointment_date, hospital, department, reason) 
-                    VALUES (?, ?, ?, ?, ?)''',
-                  (user['id'], appointment_date, hospital, department, reason))
-        conn.commit()
-        flash('預約看診紀錄已新增')
-    
-    # Handle delete request
-    if request.args.get('delete_id'):
-        delete_id = request.args.get('delete_id')
-        c.execute('DELETE FROM appointments WHERE id=? AND user_id=?', (delete_id, user['id']))
-        conn.commit()
-        flash('預約看診紀錄已刪除')
-        return redirect(url_for('appointments'))
-    
-    # Get appointments
-    c.execute('''SELECT id, appointment_date, hospital, department, reason 
-                FROM appointments WHERE user_id=? ORDER BY appointment_date DESC''', (user['id'],))
-    appts = c.fetchall()
-    conn.close()
-    
-    return render_template('appointments.html', appts=appts, username=user['username'])
+            c.execute('''INSERT INTO appointments (user_id, appointment_date, hospital, department, reason) 
+                        VALUES (?, ?, ?, ?, ?)''',
+                      (user['id'], appointment_date, hospital, department, reason))
+            conn.commit()
+            flash('預約看診紀錄已新增')
+    
+        # Handle delete request
+        if request.args.get('delete_id'):
+            delete_id = request.args.get('delete_id')
+            c.execute('DELETE FROM appointments WHERE id=? AND user_id=?', (delete_id, user['id']))
+            conn.commit()
+            flash('預約看診紀錄已刪除')
+            return redirect(url_for('appointments'))
+    
+    # Get one page of appointments
+    page = get_repository('medical').get_appointments_page(
+        user['id'], request.args.get('limit', type=int), request.args.get('cursor'))
+    
+    return render_template('appointments.html', appts=page.items, page=page, username=user['username'])
 
 @app.route('/exercise', methods=['GET', 'POST'])
 def exercise():
@@ -522,71 +319,68 @@ def exercise():
     if not user:
         return redirect(url_for('login'))
     
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    encouragement = None
-    calories_table = {
-        '快走': 4.5,   # METs
-        '慢跑': 7.0,
-        '騎自行車': 6.0,
-        '游泳': 8.0,
-        '瑜珈': 3.0,
-        '跳繩': 10.0,
-        '有氧舞蹈': 6.5,
-        '重量訓練': 5.0,
-        '登山健行': 6.0,
-        '球類運動': 7.0,
-        '其他': 4.0
-    }
+    with get_connection_manager().connection() as conn:
+        c = conn.cursor()
+    
+        encouragement = None
+        calories_table = {
+            '快走': 4.5,   # METs
+            '慢跑': 7.0,
+            '騎自行車': 6.0,
+            '游泳': 8.0,
+            '瑜珈': 3.0,
+            '跳繩': 10.0,
+            '有氧舞蹈': 6.5,
+            '重量訓練': 5.0,
+            '登山健行': 6.0,
+            '球類運動': 7.0,
+            '其他': 4.0
+        }
     
-    # Get user weight
-    c.execute('SELECT weight FROM height_weight WHERE user_id=? ORDER BY created_at DESC LIMIT 1', (user['id'],))
-    row = c.fetchone()
-    weight = row[0] if row else 65  # Default 65kg if no data
+        # Get user weight
+        latest_hw = get_repository('health_data').get_latest_height_weight_record(user['id'])
+        weight = latest_hw.weight if latest_hw else 65  # Default 65kg if no data
     
-    if request.method == 'POST':
-        exercise_date = request.form['exercise_date']
-        exercise_type = request.form['exercise_type']
-        duration = int(request.form['duration'])
-        notes = request.form['notes']
+        if request.method == 'POST':
+            exercise_date = request.form['exercise_date']
+            exercise_type = request.form['exercise_type']
+            duration = int(request.form['duration'])
+            notes = request.form['notes']
         
-        mets = calories_table.get(exercise_type, 4.0)
-        calories = int(mets * weight * duration / 60)
+            mets = calories_table.get(exercise_type, 4.0)
+            calories = int(mets * weight * duration / 60)
         
-        c.execute('''INSERT INTO exercise_records (user_id, exercise_date, exercise_type, duration, calories, notes) 
-                    VALUES (?, ?, ?, ?, ?, ?)''',
-                  (user['id'], exercise_date, exercise_type, duration, calories, notes))
-        conn.commit()
-        encouragement = f"太棒了！這次運動大約消耗了 {calories} 大卡，持續運動讓健康加分！"
-    
-    # Handle delete request
-    if request.args.get('delete_id'):
-        delete_id = request.args.get('delete_id')
-        c.execute('DELETE FROM exercise_records WHERE id=? AND user_id=?', (delete_id, user['id']))
-        conn.commit()
-        flash('運動紀錄已刪除')
-        return redirect(url_for('exercise'))
-    
-    # Get exercise records
-    c.execute('''SELECT id, exercise_date, exercise_type, duration, calories, notes 
-                FROM exercise_records WHERE user_id=? ORDER BY exercise_date DESC''', (user['id'],))
-    records = c.fetchall()
-    
-    total_calories = sum(r[4] for r in records)
-    if not encouragement and records:
-        if total_calories >= 2000:
-            encouragement = f"本月已累積消耗 {total_calories} 大卡，運動習慣很棒，繼續保持！"
-        elif total_calories >= 1000:
-            encouragement = f"本月已累積消耗 {total_calories} 大卡，離健康更進一步！"
-        else:
-            encouragement = f"已經開始運動紀錄，繼續努力，健康就在不遠處！"
-    
-    conn.close()
+            c.execute('''INSERT INTO exercise_records (user_id, exercise_date, exercise_type, duration, calories, notes) 
+                        VALUES (?, ?, ?, ?, ?, ?)''',
+                      (user['id'], exercise_date, exercise_type, duration, calories, notes))
+            conn.commit()
+            encouragement = f"太棒了！這次運動大約消耗了 {calories} 大卡，持續運動讓健康加分！"
+    
+        # Handle delete request
+        if request.args.get('delete_id'):
+            delete_id = request.args.get('delete_id')
+            c.execute('DELETE FROM exercise_records WHERE id=? AND user_id=?', (delete_id, user['id']))
+            conn.commit()
+            flash('運動紀錄已刪除')
+            return redirect(url_for('exercise'))
+    
+        # Total calories over the whole history, from one rollup row per day
+        record_count, total_calories = get_repository('rollup').get_exercise_totals(user['id'])
+        if not encouragement and record_count:
+            if total_calories >= 2000:
+                encouragement = f"本月已累積消耗 {total_calories} 大卡，運動習慣很棒，繼續保持！"
+            elif total_calories >= 1000:
+                encouragement = f"本月已累積消耗 {total_calories} 大卡，離健康更進一步！"
+            else:
+                encouragement = f"已經開始運動紀錄，繼續努力，健康就在不遠處！"
+    
+    # Get one page of exercise records
+    page = get_repository('lifestyle').get_exercise_records_page(
+        user['id'], request.args.get('limit', type=int), request.args.get('cursor'))
     
     return render_template('exercise.html', 
-                         records=records, 
+                         records=page.items, 
+                         page=page,
                          encouragement=encouragement, 
                          username=user['username'])
 
@@ -597,89 +391,78 @@ def diet():
     if not user:
         return redirect(url_for('login'))
     
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Get user data for calorie calculation
-    c.execute('SELECT gender, birthday FROM users WHERE id=?', (user['id'],))
-    row = c.fetchone()
-    gender, birthday = row if row else (None, None)
-    
-    c.execute('SELECT weight, height FROM height_weight WHERE user_id=? ORDER BY created_at DESC LIMIT 1', (user['id'],))
-    wh = c.fetchone()
-    weight, height = wh if wh else (65, 170)
-    
-    # Calculate age
-    age = None
-    if birthday:
-        from datetime import date
-        try:
-            bdate = datetime.strptime(birthday, '%Y-%m-%d').date()
-            today = date.today()
-            age = today.year - bdate.year - ((today.month, today.day) < (bdate.month, bdate.day))
-        except:
-            age = 30
-    
-    # Calculate BMR and suggested calories
-    if gender == 'male':
-        bmr = 66 + 13.7 * weight + 5 * height - 6.8 * (age if age else 30)
-    elif gender == 'female':
-        bmr = 655 + 9.6 * weight + 1.8 * height - 4.7 * (age if age else 30)
-    else:
-        bmr = 1500
+    with get_connection_manager().connection() as conn:
+        c = conn.cursor()
+    
+        # Get user data for calorie calculation
+        gender, birthday = user['gender'], user['birthday']
+    
+        latest_hw = get_repository('health_data').get_latest_height_weight_record(user['id'])
+        weight, height = (latest_hw.weight, latest_hw.height) if latest_hw else (65, 170)
+    
+        # Calculate age
+        age = None
+        if birthday:
+            from datetime import date
+            try:
+                bdate = datetime.strptime(birthday, '%Y-%m-%d').date()
+                today = date.today()
+                age = today.year - bdate.year - ((today.month, today.day) < (bdate.month, bdate.day))
+            except:
+                age = 30
+    
+        # Calculate BMR and suggested calories
+        if gender == 'male':
+            bmr = 66 + 13.7 * weight + 5 * height - 6.8 * (age if age else 30)
+        elif gender == 'female':
+            bmr = 655 + 9.6 * weight + 1.8 * height - 4.7 * (age if age else 30)
+        else:
+            bmr = 1500
     
-    suggest_min = int(bmr * 1.5)
-    suggest_max = int(bmr * 1.7)
+        suggest_min = int(bmr * 1.5)
+        suggest_max = int(bmr * 1.7)
     
-    if request.method == 'POST':
-        diet_date = request.form['diet_date']
-        meal_type = request.form['meal_type']
-        description = request.form['description']
-        calories = int(request.form['calories'])
+        if request.method == 'POST':
+            diet_date = request.form['diet_date']
+            meal_type = request.form['meal_type']
+            description = request.form['description']
+            calories = int(request.form['calories'])
         
-        c.execute('''INSERT INTO diet_records (user_id, diet_date, meal_type, description, calories) 
-                    VALUES (?, ?, ?, ?, ?)''',
-                  (user['id'], diet_date, meal_type, description, calories))
-        conn.commit()
-        flash('飲食紀錄已新增')
-    
-    # Handle delete request
-    if request.args.get('delete_id'):
-        delete_id = request.args.get('delete_id')
-        c.execute('DELETE FROM diet_records WHERE id=? AND user_id=?', (delete_id, user['id']))
-        conn.commit()
-        flash('飲食紀錄已刪除')
-        return redirect(url_for('diet'))
-    
-    # Get today's diet records
-    today_str = datetime.today().strftime('%Y-%m-%d')
-    c.execute('''SELECT id, diet_date, meal_type, description, calories 
-                FROM diet_records WHERE user_id=? AND diet_date=? ORDER BY created_at DESC''', 
-              (user['id'], today_str))
-    records = c.fetchall()
-    
-    total_cal = sum(r[4] for r in records)
-    
-    # Calculate status message
-    if total_cal < suggest_min:
-        status = f"今日總攝取 {total_cal} 大卡，低於建議攝取量 ({suggest_min}~{suggest_max} 大卡)，可適量增加營養攝取。"
-    elif total_cal > suggest_max:
-        status = f"今日總攝取 {total_cal} 大卡，超過建議攝取量 ({suggest_min}~{suggest_max} 大卡)，請注意飲食控制。"
-    else:
-        status = f"今日總攝取 {total_cal} 大卡，落在建議範圍 ({suggest_min}~{suggest_max} 大卡)，請持續保持！"
-    
-    # Get chart data for last 14 days
-    c.execute('''SELECT diet_date, SUM(calories) 
-                FROM diet_records WHERE user_id=? 
-                GROUP BY diet_date ORDER BY diet_date DESC LIMIT 14''', (user['id'],))
-    chart_rows = c.fetchall()[::-1]  # Reverse to show oldest to newest
+            c.execute('''INSERT INTO diet_records (user_id, diet_date, meal_type, description, calories) 
+                        VALUES (?, ?, ?, ?, ?)''',
+                      (user['id'], diet_date, meal_type, description, calories))
+            conn.commit()
+            flash('飲食紀錄已新增')
+    
+        # Handle delete request
+        if request.args.get('delete_id'):
+            delete_id = request.args.get('delete_id')
+            c.execute('DELETE FROM diet_records WHERE id=? AND user_id=?', (delete_id, user['id']))
+            conn.commit()
+            flash('飲食紀錄已刪除')
+            return redirect(url_for('diet'))
+    
+        # Get today's diet records
+        today_str = datetime.today().strftime('%Y-%m-%d')
+        c.execute('''SELECT id, diet_date, meal_type, description, calories 
+                    FROM diet_records WHERE user_id=? AND diet_date=? ORDER BY created_at DESC''', 
+                  (user['id'], today_str))
+        records = c.fetchall()
+    
+        total_cal = sum(r[4] for r in records)
+    
+        # Calculate status message
+        if total_cal < suggest_min:
+            status = f"今日總攝取 {total_cal} 大卡，低於建議攝取量 ({suggest_min}~{suggest_max} 大卡)，可適量增加營養攝取。"
+        elif total_cal > suggest_max:
+            status = f"今日總攝取 {total_cal} 大卡，超過建議攝取量 ({suggest_min}~{suggest_max} 大卡)，請注意飲食控制。"
+        else:
+            status = f"今日總攝取 {total_cal} 大卡，落在建議範圍 ({suggest_min}~{suggest_max} 大卡)，請持續保持！"
     
-    chart_labels = [r[0] for r in chart_rows]
-    chart_data = [r[1] for r in chart_rows]
-    chart_suggest = [int((suggest_min + suggest_max) / 2)] * len(chart_labels)
+        # Chart covers the last 14 days; the series is fetched from /api/charts/calories
+        chart_start = (datetime.today() - timedelta(days=13)).strftime('%Y-%m-%d')
+        chart_suggest = int((suggest_min + suggest_max) / 2)
     
-    conn.close()
     
     return render_template('diet.html', 
                          records=records, 
@@ -689,8 +472,7 @@ def diet():
                          total_cal=total_cal, 
                          username=user['username'], 
                          now=datetime.today(), 
-                         chart_labels=chart_labels, 
-                         chart_data=chart_data, 
+                         chart_start=chart_start, 
                          chart_suggest=chart_suggest)
 
 @app.route('/forgot_password', methods=['GET', 'POST'])
@@ -700,6 +482,9 @@ def forgot_password():
         username = request.form['username']
         birthday = request.form['birthday']
         new_password = request.form['new_password']
+        retry_after = get_password_reset_throttle().attempt(request.remote_addr, username)
+        if retry_after:
+            return _too_many_attempts('forgot_password.html', retry_after)
         auth_service = get_auth_service()
         user = auth_service.get_user_by_username(username)
         if not user:
@@ -711,6 +496,8 @@ def forgot_password():
             return render_template('forgot_password.html')
         # 更新密碼
         if auth_service.update_user_password(username, new_password):
+            # Sessions opened with the old password end in every worker
+            revoke_user_sessions(user.id)
             flash('密碼已重設，請使用新密碼登入')
             return redirect(url_for('login'))
         else:
@@ -725,7 +512,7 @@ def mood():
     if not user:
         return redirect(url_for('login'))
     
-    mood_repo = MoodRepository(DB_PATH)
+    mood_repo = get_repository('mood')
     today_mood = mood_repo.get_today_mood(user['id'])
     message = None
     if request.method == 'POST' and not today_mood:
@@ -768,6 +555,25 @@ def mood():
                          username=user['username'],
                          mood_text_map=mood_text_map)
 
+@app.route('/export')
+def export_history():
+    """Download the user's health history as CSV or NDJSON"""
+    user = get_current_user()
+    if not user:
+        return redirect(url_for('login'))
+    
+    fmt = request.args.get('format', 'csv')
+    tables = [t for t in request.args.get('tables', '').split(',') if t] or None
+    try:
+        chunks = get_export_service().stream(user['id'], fmt, tables,
+                                             request.args.get('start'), request.args.get('end'))
+    except ValueError as e:
+        return f"匯出參數錯誤：{e}", 400
+    
+    filename = f"healthtracker_{user['id']}_{datetime.today().strftime('%Y%m%d')}.{fmt}"
+    return Response(stream_with_context(chunks), mimetype=EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 # Register health data Blueprint
 app.register_blueprint(create_health_bp(DB_PATH))
 
@@ -1,7 +1,7 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
 from werkzeug.security import generate_password_hash, check_password_hash
 from health_routes import create_health_bp
-from di_container import initialize_container, get_auth_service, get_health_service, get_notification_service
+from di_container import initialize_container, get_auth_service, get_health_service, get_notification_service, get_migrator
 from datetime import datetime, timedelta
 import os
 
@@ -14,98 +14,8 @@ DB_PATH = 'healthTracker.db'
 initialize_container(DB_PATH)
 
 def init_db():
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    # 檢查 users 資料表是否存在，若不存在則建立（含新欄位）
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            gender TEXT,
-            birthday TEXT
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS blood_pressure (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            systolic INTEGER,
-            diastolic INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS height_weight (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            height REAL,
-            weight REAL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS medical_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            visit_date TEXT,
-            hospital TEXT,
-            department TEXT,
-            doctor TEXT,
-            diagnosis TEXT,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS appointments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            appointment_date TEXT,
-            hospital TEXT,
-            department TEXT,
-            doctor TEXT,
-            reason TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS exercise_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            exercise_date TEXT,
-            exercise_type TEXT,
-            duration INTEGER,
-            calories INTEGER,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS diet_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            diet_date TEXT,
-            meal_type TEXT,
-            description TEXT,
-            calories INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    # 若 users 資料表已存在但缺少新欄位，則補上
-    columns = [row[1] for row in c.execute("PRAGMA table_info(users)")]
-    for col, coltype in [('gender', 'TEXT'), ('birthday', 'TEXT')]:
-        if col not in columns:
-            c.execute(f'ALTER TABLE users ADD COLUMN {col} {coltype}')
-    conn.commit()
-    conn.close()
+    """Apply pending schema migrations (a single version check when current)"""
+    get_migrator().ensure_current()
 
 init_db()
 
@@ -1,7 +1,6 @@
 from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
 from health_routes import create_health_bp
-from di_container import initialize_container, get_auth_service, get_health_service, get_notification_service
+from di_container import initialize_container, get_auth_service, get_health_service, get_notification_service, get_migrator
 from datetime import datetime, timedelta
 import os
 
@@ -14,130 +13,8 @@ DB_PATH = 'healthTracker.db'
 initialize_container(DB_PATH)
 
 def init_db():
-    """Initialize database with required tables"""
-    import sqlite3
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    # Create users table with all required fields
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            email TEXT,
-            gender TEXT,
-            birthday TEXT,
-            created_at TEXT
-        )
-    """)
-    
-    # Create health data tables
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS blood_pressure (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            systolic INTEGER,
-            diastolic INTEGER,
-            pulse INTEGER,
-            notes TEXT,
-            date TEXT,
-            recorded_at TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS height_weight (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            height REAL,
-            weight REAL,
-            notes TEXT,
-            date TEXT,
-            recorded_at TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS medical_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            visit_date TEXT,
-            hospital TEXT,
-            department TEXT,
-            doctor TEXT,
-            diagnosis TEXT,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS appointments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            appointment_date TEXT,
-            hospital TEXT,
-            department TEXT,
-            doctor TEXT,
-            reason TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS exercise_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            exercise_date TEXT,
-            exercise_type TEXT,
-            duration INTEGER,
-            calories INTEGER,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS diet_records (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER,
-            diet_date TEXT,
-            meal_type TEXT,
-            description TEXT,
-            calories INTEGER,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY(user_id) REFERENCES users(id)
-        )
-    """)
-    
-    # Add missing columns to existing tables
-    columns = [row[1] for row in c.execute("PRAGMA table_info(users)")]
-    for col, coltype in [('email', 'TEXT'), ('gender', 'TEXT'), ('birthday', 'TEXT'), ('created_at', 'TEXT')]:
-        if col not in columns:
-            c.execute(f'ALTER TABLE users ADD COLUMN {col} {coltype}')
-    
-    # Add missing columns to blood_pressure table
-    bp_columns = [row[1] for row in c.execute("PRAGMA table_info(blood_pressure)")]
-    for col, coltype in [('pulse', 'INTEGER'), ('notes', 'TEXT'), ('date', 'TEXT'), ('recorded_at', 'TEXT')]:
-        if col not in bp_columns:
-            c.execute(f'ALTER TABLE blood_pressure ADD COLUMN {col} {coltype}')
-    
-    # Add missing columns to height_weight table
-    hw_columns = [row[1] for row in c.execute("PRAGMA table_info(height_weight)")]
-    for col, coltype in [('notes', 'TEXT'), ('date', 'TEXT'), ('recorded_at', 'TEXT')]:
-        if col not in hw_columns:
-            c.execute(f'ALTER TABLE height_weight ADD COLUMN {col} {coltype}')
-    
-    conn.commit()
-    conn.close()
+    """Apply pending schema migrations (a single version check when current)"""
+    get_migrator().ensure_current()
 
 init_db()
 
@@ -296,21 +173,10 @@ def blood_pressure():
         return redirect(url_for('blood_pressure'))
     
     # Get blood pressure records
-    bp_records = health_service.get_blood_pressure_records(user['id'])
-    
-    # Convert to format expected by template
-    bp_list = []
-    for record in bp_records:
-        bp_list.append({
-            'id': record['id'],
-            'systolic': record['systolic'],
-            'diastolic': record['diastolic'],
-            'created_at': record.get('date', record.get('created_at', ''))
-        })
+    bp_list = health_service.get_blood_pressure_records(user['id'])
     
     # Get health evaluation for latest record
-    latest_bp = bp_list[0] if bp_list else None
-    evaluations = health_service.evaluate_blood_pressure(latest_bp)
+    evaluations = health_service.evaluate_latest_blood_pressure(user['id'])
     
     return render_template('blood_pressure.html', 
                          bp_list=bp_list, 
@@ -334,23 +200,12 @@ def height_weight():
         return redirect(url_for('height_weight'))
     
     # Get height/weight records
-    hw_records = health_service.get_height_weight_records(user['id'])
-    
-    # Convert to format expected by template
-    hw_list = []
-    for record in hw_records:
-        hw_list.append({
-            'id': record['id'],
-            'height': record['height'],
-            'weight': record['weight'],
-            'created_at': record.get('date', record.get('created_at', ''))
-        })
+    hw_list = health_service.get_height_weight_records(user['id'])
     
     # Get health evaluation for latest record
-    latest_hw = hw_list[0] if hw_list else None
     gender, birthday = health_service.get_user_profile(user['id'])
     _, age = health_service.calculate_age_and_days(birthday)
-    evaluations = health_service.evaluate_bmi(latest_hw, gender, age)
+    evaluations = health_service.evaluate_latest_bmi(user['id'], gender, age)
     
     return render_template('height_weight.html', 
                          hw_list=hw_list, 
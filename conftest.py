@@ -0,0 +1,19 @@
+"""
+Shared pytest fixtures
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from database.connection_manager import ConnectionManager
+from database.migrator import Migrator
+
+
+@pytest.fixture
+def migrated_cm(tmp_path):
+    """Connection manager on a fresh database migrated to the head version"""
+    cm = ConnectionManager(str(tmp_path / "healthTracker.db"))
+    Migrator(cm).upgrade()
+    return cm
@@ -0,0 +1,64 @@
+"""
+Health alert scan command line
+
+The scan covers every user, so it runs once per deployment rather than in
+each web worker: schedule ``scan`` from cron, or keep ``scan --loop`` running
+as a single process next to the web workers.
+
+Usage:
+    python -m database.alerts scan [--workers N] [--chunk-size N] [--loop] [--interval SECONDS]
+"""
+import argparse
+import signal
+import sys
+import threading
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from repositories.alert_repository import AlertRepository
+from repositories.user_repository import UserRepository
+from services.alert_scan_service import DEFAULT_CHUNK_SIZE, DEFAULT_SCAN_INTERVAL, AlertScanService
+
+
+def _report(result) -> str:
+    return (f"Scanned {result['chunks']} chunks for {result['scanned_on']}: {result['alerts']} alerts, "
+            f"{result['failed_chunks']} failed chunks, {result['duration_ms']:.0f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.alerts', description='HealthTracker health alerts')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scan_parser = subparsers.add_parser('scan', help='replace every user\'s stored alerts')
+    scan_parser.add_argument('--workers', type=int, default=4, help='chunk reader threads')
+    scan_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='users per chunk')
+    scan_parser.add_argument('--loop', action='store_true', help='keep scanning every --interval seconds')
+    scan_parser.add_argument('--interval', type=float, default=DEFAULT_SCAN_INTERVAL, help='seconds between scans')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    service = AlertScanService(UserRepository(args.db, connection_manager),
+                               AlertRepository(args.db, connection_manager),
+                               workers=args.workers, chunk_size=args.chunk_size)
+    if not args.loop:
+        result = service.scan_all()
+        print(_report(result))
+        return 1 if result['failed_chunks'] else 0
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        while True:
+            try:
+                print(_report(service.scan_all()), flush=True)
+            except Exception as e:
+                print(f"Error running alert scan: {e}", flush=True)
+            if stop.wait(args.interval):
+                break
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Cohort analytics command line
+
+Usage:
+    python -m database.cohorts run [--workers N] [--shards N] [--chunk-size N] [--as-of YYYY-MM-DD]
+    python -m database.cohorts show [--metric blood_pressure|bmi]
+"""
+import argparse
+import sys
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from repositories.cohort_repository import CohortRepository
+from services.cohort_analytics import CATEGORY_AXES, DEFAULT_CHUNK_SIZE, CohortAnalyticsService
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.cohorts', description='HealthTracker cohort analytics')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help='aggregate all users into a new report')
+    run_parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    run_parser.add_argument('--shards', type=int, default=None, help='user id shards (default: 4 per worker)')
+    run_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='users read per query')
+    run_parser.add_argument('--as-of', default=None, help='date ages are computed at (YYYY-MM-DD)')
+    show_parser = subparsers.add_parser('show', help='print the latest report')
+    show_parser.add_argument('--metric', default=None, choices=sorted(CATEGORY_AXES), help='only this metric')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    service = CohortAnalyticsService(CohortRepository(args.db, connection_manager))
+    if args.command == 'run':
+        try:
+            rows = service.run(args.workers, args.shards, args.chunk_size, args.as_of)
+        except ValueError as e:
+            print(f"Invalid options: {e}", file=sys.stderr)
+            return 1
+        if not rows:
+            print("No cohort report written")
+            return 1
+        print(f"Wrote {len(rows)} cohort report rows at {rows[0].generated_at}")
+        return 0
+
+    rows = service.get_latest_report(args.metric)
+    if not rows:
+        print("No cohort report yet; run: python -m database.cohorts run")
+        return 1
+    print(f"Generated {rows[0].generated_at} (ages as of {rows[0].as_of})")
+    for row in rows:
+        prevalence = f"{row.prevalence:6.1%}" if row.prevalence is not None else "     -"
+        print(f"{row.metric:<15} {row.age_band:<6} {row.gender:<7} {row.category:<8} {row.users:>9} {prevalence}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+SQLite connection manager shared by all repositories
+"""
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Tuple
+
+
+class ConnectionManager:
+    """Pool of SQLite connections with per-thread affinity
+
+    A thread keeps the same connection for nested ``connection()`` blocks.
+    When the outermost block exits the connection goes back to an idle pool,
+    so short-lived request threads reuse connections instead of opening new ones.
+    """
+
+    def __init__(self, db_path: str, pragmas: Optional[List[Tuple[str, Any]]] = None,
+                 max_idle: int = 8, timeout: float = 5.0):
+        self.db_path = db_path
+        self.pragmas = pragmas if pragmas is not None else [('busy_timeout', int(timeout * 1000))]
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._idle: List[sqlite3.Connection] = []
+        self._open = 0
+        self._hits = 0
+        self._misses = 0
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Open a new connection and apply PRAGMAs once"""
+        # Connections move between threads through the idle pool, but only one
+        # thread holds a connection at a time.
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name}={value}")
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                self._hits += 1
+                return self._idle.pop()
+            self._misses += 1
+            self._open += 1
+        try:
+            return self._create_connection()
+        except Exception:
+            with self._lock:
+                self._open -= 1
+            raise
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._open -= 1
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Yield the calling thread's connection, acquiring one if needed"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            with self._lock:
+                self._hits += 1
+            self._local.depth += 1
+        else:
+            conn = self._acquire()
+            self._local.conn = conn
+            self._local.depth = 1
+        try:
+            yield conn
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                self._local.conn = None
+                self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Yield a connection and commit on success, roll back on error
+
+        Nested transactions fold into the outermost one, which owns the commit.
+        """
+        with self.connection() as conn:
+            yield conn
+            if self._local.depth == 1:
+                conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool hit/miss counters"""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / total if total else 0.0,
+                'open': self._open,
+                'idle': len(self._idle)
+            }
+
+    def close_all(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            conn.close()
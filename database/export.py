@@ -0,0 +1,56 @@
+"""
+Health history export command line
+
+Usage:
+    python -m database.export alice
+    python -m database.export alice --format ndjson --tables blood_pressure,height_weight \\
+        --start 2024-01-01 --end 2024-06-30 -o alice.ndjson
+"""
+import argparse
+import sys
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from repositories.export_repository import ExportRepository, EXPORT_TABLES
+from repositories.user_repository import UserRepository
+from services.export_service import ExportService, EXPORT_FORMATS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.export', description='Export a user\'s health history')
+    parser.add_argument('username', help='user to export')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    parser.add_argument('--format', default='csv', choices=sorted(EXPORT_FORMATS), help='output format')
+    parser.add_argument('--tables', default='',
+                        help=f"comma-separated subset of: {', '.join(t.name for t in EXPORT_TABLES)}")
+    parser.add_argument('--start', default=None, help='first date to include (YYYY-MM-DD)')
+    parser.add_argument('--end', default=None, help='last date to include (YYYY-MM-DD)')
+    parser.add_argument('-o', '--output', default='-', help='output file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    user = UserRepository(args.db, connection_manager).get_user_by_username(args.username)
+    if not user:
+        print(f"No such user: {args.username}", file=sys.stderr)
+        return 1
+
+    service = ExportService(ExportRepository(args.db, connection_manager))
+    tables = [t for t in args.tables.split(',') if t] or None
+    try:
+        chunks = service.stream(user.id, args.format, tables, args.start, args.end)
+    except ValueError as e:
+        print(f"Invalid export options: {e}", file=sys.stderr)
+        return 1
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
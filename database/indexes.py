@@ -0,0 +1,35 @@
+"""
+Managed index set for per-user, time-ordered queries
+
+Indexes are created by migrations; this manifest lets ``migrate status`` and
+the query-plan tests verify that every expected index exists.
+"""
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """Definition of a managed index"""
+    name: str
+    table: str
+    columns: Tuple[str, ...]
+
+
+# Every hot query filters on user_id and orders or filters by a date column
+MANAGED_INDEXES: List[IndexSpec] = [
+    IndexSpec('idx_blood_pressure_user_recorded', 'blood_pressure', ('user_id', 'recorded_at')),
+    IndexSpec('idx_height_weight_user_recorded', 'height_weight', ('user_id', 'recorded_at')),
+    IndexSpec('idx_medical_records_user_visit', 'medical_records', ('user_id', 'visit_date')),
+    IndexSpec('idx_appointments_user_date', 'appointments', ('user_id', 'appointment_date')),
+    IndexSpec('idx_exercise_records_user_date', 'exercise_records', ('user_id', 'exercise_date')),
+    IndexSpec('idx_diet_records_user_date', 'diet_records', ('user_id', 'diet_date', 'created_at')),
+    IndexSpec('idx_mood_records_user_date', 'mood_records', ('user_id', 'mood_date')),
+]
+
+
+def missing_indexes(conn: sqlite3.Connection, indexes: Optional[List[IndexSpec]] = None) -> List[IndexSpec]:
+    """List managed indexes absent from the database"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    return [index for index in indexes or MANAGED_INDEXES if index.name not in existing]
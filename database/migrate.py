@@ -0,0 +1,83 @@
+"""
+Schema migration command line
+
+Usage:
+    python -m database.migrate status
+    python -m database.migrate upgrade [--target N]
+    python -m database.migrate new add_some_column
+"""
+import argparse
+import os
+import re
+import sys
+
+from database.connection_manager import ConnectionManager
+from database.indexes import missing_indexes
+from database.migrator import Migrator, MIGRATIONS_DIR
+from database.storage_config import StorageConfig
+
+
+MIGRATION_TEMPLATE = '''"""
+{description}
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    c = conn.cursor()
+'''
+
+
+def cmd_status(migrator: Migrator, args) -> int:
+    current = migrator.current_version()
+    print(f"Database: {migrator.connection_manager.db_path}")
+    print(f"Current version: {current} (head: {migrator.head_version})")
+    for migration in migrator.discover():
+        mark = 'x' if migration.version <= current else ' '
+        print(f"  [{mark}] {migration.version:04d} {migration.name}")
+    with migrator.connection_manager.connection() as conn:
+        missing = missing_indexes(conn)
+    for index in missing:
+        print(f"  missing index: {index.name} on {index.table} ({', '.join(index.columns)})")
+    return 0
+
+
+def cmd_upgrade(migrator: Migrator, args) -> int:
+    applied = migrator.upgrade(args.target)
+    for migration in applied:
+        print(f"Applied {migration.version:04d} {migration.name}")
+    print(f"Database at version {migrator.current_version()}")
+    return 0
+
+
+def cmd_new(migrator: Migrator, args) -> int:
+    if not re.fullmatch(r'[a-z0-9_]+', args.name):
+        print("Migration name must be snake_case", file=sys.stderr)
+        return 1
+    version = migrator.head_version + 1
+    path = os.path.join(migrator.migrations_dir, f"{version:04d}_{args.name}.py")
+    with open(path, 'x', encoding='utf-8') as f:
+        f.write(MIGRATION_TEMPLATE.format(description=args.name.replace('_', ' ').capitalize()))
+    print(f"Created {path}")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.migrate', description='HealthTracker schema migrations')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help='show applied and pending migrations')
+    upgrade_parser = subparsers.add_parser('upgrade', help='apply pending migrations')
+    upgrade_parser.add_argument('--target', type=int, default=None, help='stop at this version')
+    new_parser = subparsers.add_parser('new', help='create an empty migration file')
+    new_parser.add_argument('name', help='snake_case description, e.g. add_pulse_index')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    migrator = Migrator(connection_manager, MIGRATIONS_DIR)
+    commands = {'status': cmd_status, 'upgrade': cmd_upgrade, 'new': cmd_new}
+    return commands[args.command](migrator, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
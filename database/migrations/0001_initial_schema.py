@@ -0,0 +1,136 @@
+"""
+Initial schema: application tables, plus columns added to early databases
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    c = conn.cursor()
+    
+    # Create users table with all required fields
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            email TEXT,
+            gender TEXT,
+            birthday TEXT,
+            created_at TEXT
+        )
+    """)
+    
+    # Create health data tables
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS blood_pressure (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            systolic INTEGER,
+            diastolic INTEGER,
+            pulse INTEGER,
+            notes TEXT,
+            date TEXT,
+            recorded_at TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS height_weight (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            height REAL,
+            weight REAL,
+            notes TEXT,
+            date TEXT,
+            recorded_at TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS medical_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            visit_date TEXT,
+            hospital TEXT,
+            department TEXT,
+            doctor TEXT,
+            diagnosis TEXT,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS appointments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            appointment_date TEXT,
+            hospital TEXT,
+            department TEXT,
+            doctor TEXT,
+            reason TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS exercise_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            exercise_date TEXT,
+            exercise_type TEXT,
+            duration INTEGER,
+            calories INTEGER,
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS diet_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            diet_date TEXT,
+            meal_type TEXT,
+            description TEXT,
+            calories INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    c.execute("""
+        CREATE TABLE IF NOT EXISTS mood_records (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            mood TEXT,
+            mood_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+    """)
+    
+    # Add missing columns to existing tables
+    columns = [row[1] for row in c.execute("PRAGMA table_info(users)")]
+    for col, coltype in [('email', 'TEXT'), ('gender', 'TEXT'), ('birthday', 'TEXT'), ('created_at', 'TEXT')]:
+        if col not in columns:
+            c.execute(f'ALTER TABLE users ADD COLUMN {col} {coltype}')
+    
+    # Add missing columns to blood_pressure table
+    bp_columns = [row[1] for row in c.execute("PRAGMA table_info(blood_pressure)")]
+    for col, coltype in [('pulse', 'INTEGER'), ('notes', 'TEXT'), ('date', 'TEXT'), ('recorded_at', 'TEXT')]:
+        if col not in bp_columns:
+            c.execute(f'ALTER TABLE blood_pressure ADD COLUMN {col} {coltype}')
+    
+    # Add missing columns to height_weight table
+    hw_columns = [row[1] for row in c.execute("PRAGMA table_info(height_weight)")]
+    for col, coltype in [('notes', 'TEXT'), ('date', 'TEXT'), ('recorded_at', 'TEXT')]:
+        if col not in hw_columns:
+            c.execute(f'ALTER TABLE height_weight ADD COLUMN {col} {coltype}')
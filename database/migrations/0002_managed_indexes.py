@@ -0,0 +1,16 @@
+"""
+Composite (user_id, date) indexes for per-user, time-ordered queries
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    c = conn.cursor()
+    c.execute("CREATE INDEX IF NOT EXISTS idx_blood_pressure_user_recorded ON blood_pressure (user_id, recorded_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_height_weight_user_recorded ON height_weight (user_id, recorded_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_height_weight_user_created ON height_weight (user_id, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_medical_records_user_visit ON medical_records (user_id, visit_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_appointments_user_date ON appointments (user_id, appointment_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exercise_records_user_date ON exercise_records (user_id, exercise_date)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_diet_records_user_date ON diet_records (user_id, diet_date, created_at)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mood_records_user_date ON mood_records (user_id, mood_date)")
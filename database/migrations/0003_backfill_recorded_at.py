@@ -0,0 +1,22 @@
+"""
+Backfill recorded_at and date for readings inserted without them
+
+Keyset pagination orders by (recorded_at, id); NULL keys would drop rows
+out of every page.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    c = conn.cursor()
+    for table in ('blood_pressure', 'height_weight'):
+        c.execute(f"""
+            UPDATE {table}
+            SET recorded_at = datetime(created_at, 'localtime')
+            WHERE recorded_at IS NULL
+        """)
+        c.execute(f"""
+            UPDATE {table}
+            SET date = substr(recorded_at, 1, 10)
+            WHERE date IS NULL
+        """)
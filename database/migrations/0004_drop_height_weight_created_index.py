@@ -0,0 +1,11 @@
+"""
+Drop (user_id, created_at) on height_weight
+
+Latest-weight lookups now go through get_latest_height_weight_record, which
+orders by recorded_at, so the index only cost writes.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("DROP INDEX IF EXISTS idx_height_weight_user_created")
@@ -0,0 +1,13 @@
+"""
+Add users.profile_version
+
+Sessions cache the user row together with its profile version; every profile
+or password update bumps the version so stale sessions reload the row.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(users)")]
+    if 'profile_version' not in columns:
+        conn.execute("ALTER TABLE users ADD COLUMN profile_version INTEGER NOT NULL DEFAULT 0")
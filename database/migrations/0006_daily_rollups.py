@@ -0,0 +1,118 @@
+"""
+Daily rollups table, its maintenance triggers and an initial backfill
+
+The table, trigger and backfill SQL are frozen here as they were when this
+migration shipped, so later changes to database.rollups cannot alter what
+it does on a fresh database. Changes to the rollups go in new migrations.
+"""
+import sqlite3
+
+
+MOOD_SCORE_SQL = ("AVG(CASE mood WHEN 'very_happy' THEN 2 WHEN 'happy' THEN 1 WHEN 'neutral' THEN 0 "
+                  "WHEN 'a_bit_down' THEN -1 WHEN 'very_down' THEN -2 END)")
+
+# (table, day column, day column is a timestamp, {rollup column: aggregate})
+SOURCES = [
+    ('diet_records', 'diet_date', False, {
+        'calories_in': 'SUM(calories)',
+    }),
+    ('exercise_records', 'exercise_date', False, {
+        'exercise_count': 'NULLIF(COUNT(*), 0)',
+        'exercise_minutes': 'SUM(duration)',
+        'calories_burned': 'SUM(calories)',
+    }),
+    ('blood_pressure', 'recorded_at', True, {
+        'bp_count': 'NULLIF(COUNT(*), 0)',
+        'systolic_min': 'MIN(systolic)',
+        'systolic_mean': 'AVG(systolic)',
+        'systolic_max': 'MAX(systolic)',
+        'diastolic_min': 'MIN(diastolic)',
+        'diastolic_mean': 'AVG(diastolic)',
+        'diastolic_max': 'MAX(diastolic)',
+    }),
+    ('height_weight', 'recorded_at', True, {
+        'weight': 'weight',
+        'weight_recorded_at': 'MAX(recorded_at)',
+    }),
+    ('mood_records', 'mood_date', False, {
+        'mood_score': MOOD_SCORE_SQL,
+    }),
+]
+
+ALL_COLUMNS = [column for _, _, _, aggregates in SOURCES for column in aggregates]
+
+
+def _day_of(day_column: str, timestamped: bool, row: str = '') -> str:
+    return f"substr({row}{day_column}, 1, 10)" if timestamped else f"{row}{day_column}"
+
+
+def _upsert(aggregates, select_sql: str) -> str:
+    return (
+        f"INSERT INTO daily_rollups (user_id, day, {', '.join(aggregates)}) {select_sql} "
+        f"ON CONFLICT(user_id, day) DO UPDATE SET "
+        + ', '.join(f"{column} = excluded.{column}" for column in aggregates)
+    )
+
+
+def _refresh(table, day_column, timestamped, aggregates, user_expr, day_expr) -> str:
+    if timestamped:
+        day_filter = f"{day_column} >= {day_expr} AND {day_column} < date({day_expr}, '+1 day')"
+    else:
+        day_filter = f"{day_column} = {day_expr}"
+    return _upsert(aggregates, (
+        f"SELECT {user_expr}, {day_expr}, {', '.join(aggregates.values())} "
+        f"FROM {table} WHERE user_id = {user_expr} AND {day_filter}"
+    ))
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_rollups (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            calories_in INTEGER,
+            exercise_count INTEGER,
+            exercise_minutes INTEGER,
+            calories_burned INTEGER,
+            bp_count INTEGER,
+            systolic_min INTEGER,
+            systolic_mean REAL,
+            systolic_max INTEGER,
+            diastolic_min INTEGER,
+            diastolic_mean REAL,
+            diastolic_max INTEGER,
+            weight REAL,
+            weight_recorded_at TEXT,
+            mood_score REAL,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+    """)
+
+    for table, day_column, timestamped, aggregates in SOURCES:
+        new_day = _day_of(day_column, timestamped, 'NEW.')
+        old_day = _day_of(day_column, timestamped, 'OLD.')
+        new_ok = f"NEW.user_id IS NOT NULL AND NEW.{day_column} IS NOT NULL"
+        old_ok = f"OLD.user_id IS NOT NULL AND OLD.{day_column} IS NOT NULL"
+        refresh_new = _refresh(table, day_column, timestamped, aggregates, 'NEW.user_id', new_day)
+        refresh_old = (f"{_refresh(table, day_column, timestamped, aggregates, 'OLD.user_id', old_day)}; "
+                       f"DELETE FROM daily_rollups WHERE user_id = OLD.user_id AND day = {old_day} "
+                       f"AND COALESCE({', '.join(ALL_COLUMNS)}) IS NULL")
+        triggers = {
+            'insert': f"AFTER INSERT ON {table} WHEN {new_ok} BEGIN {refresh_new}; END",
+            'delete': f"AFTER DELETE ON {table} WHEN {old_ok} BEGIN {refresh_old}; END",
+            'update_old': f"AFTER UPDATE ON {table} WHEN {old_ok} BEGIN {refresh_old}; END",
+            'update_new': f"AFTER UPDATE ON {table} WHEN {new_ok} BEGIN {refresh_new}; END",
+        }
+        for event, body in triggers.items():
+            name = f"trg_rollup_{table}_{event}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"CREATE TRIGGER {name} {body}")
+
+    # Backfill
+    conn.execute("DELETE FROM daily_rollups")
+    for table, day_column, timestamped, aggregates in SOURCES:
+        day = _day_of(day_column, timestamped)
+        conn.execute(_upsert(aggregates, (
+            f"SELECT user_id, {day}, {', '.join(aggregates.values())} FROM {table} "
+            f"WHERE user_id IS NOT NULL AND {day_column} IS NOT NULL GROUP BY user_id, {day}"
+        )))
@@ -0,0 +1,23 @@
+"""
+Cohort report table written by the offline analytics run
+
+One row per (run, metric, age band, gender, category); see
+services/cohort_analytics.py.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS cohort_report (
+            generated_at TEXT NOT NULL,
+            as_of TEXT NOT NULL,
+            metric TEXT NOT NULL,
+            age_band TEXT NOT NULL,
+            gender TEXT NOT NULL,
+            category TEXT NOT NULL,
+            users INTEGER NOT NULL,
+            prevalence REAL,
+            PRIMARY KEY (generated_at, metric, age_band, gender, category)
+        ) WITHOUT ROWID
+    """)
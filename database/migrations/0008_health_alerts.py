@@ -0,0 +1,21 @@
+"""
+Health alerts table filled by the background alert scan
+
+Rows are replaced per user id range on every scan; the dashboard reads a
+user's alerts with one primary-key range read.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS health_alerts (
+            user_id INTEGER NOT NULL,
+            priority INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            ref_id INTEGER NOT NULL DEFAULT 0,
+            message TEXT NOT NULL,
+            scanned_on TEXT NOT NULL,
+            PRIMARY KEY (user_id, priority, kind, ref_id)
+        ) WITHOUT ROWID
+    """)
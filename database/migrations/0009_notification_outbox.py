@@ -0,0 +1,35 @@
+"""
+Notification outbox drained by the dispatcher
+
+Producers insert 'pending' rows; dispatchers claim due rows in batches
+(status 'claimed'), then mark them 'sent' or reschedule them with backoff
+until they end up 'failed'. Times are Unix seconds so latency and backoff
+keep sub-second precision.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS notification_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            channel TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            enqueued_at REAL NOT NULL,
+            available_at REAL NOT NULL,
+            claimed_by TEXT,
+            claimed_at REAL,
+            sent_at REAL,
+            latency_ms REAL,
+            last_error TEXT
+        )
+    """)
+    # Claims read due rows per status in available_at order; leases expire by claimed_at
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_notification_outbox_due "
+                 "ON notification_outbox (status, available_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_notification_outbox_claimed "
+                 "ON notification_outbox (status, claimed_at)")
@@ -0,0 +1,43 @@
+"""
+Appointment reminder due times
+
+appointments.due_at is when the reminder should go out (09:00 the day
+before) and reminded_at when it was handled. Triggers keep due_at in step
+with appointment_date, and a partial index over unreminded rows lets the
+reminder scheduler read only upcoming reminders. Appointments already past
+are marked reminded so the first scheduler run does not notify them.
+"""
+import sqlite3
+
+
+DUE_AT_SQL = "datetime({date}, '-1 day', '+9 hours')"
+
+
+def upgrade(conn: sqlite3.Connection):
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(appointments)")]
+    if 'due_at' not in columns:
+        conn.execute("ALTER TABLE appointments ADD COLUMN due_at TEXT")
+    if 'reminded_at' not in columns:
+        conn.execute("ALTER TABLE appointments ADD COLUMN reminded_at TEXT")
+    conn.execute(f"UPDATE appointments SET due_at = {DUE_AT_SQL.format(date='appointment_date')}")
+    conn.execute("UPDATE appointments SET reminded_at = datetime('now', 'localtime') "
+                 "WHERE appointment_date < date('now', 'localtime') AND reminded_at IS NULL")
+
+    conn.execute("DROP TRIGGER IF EXISTS trg_appointments_due_insert")
+    conn.execute(f"""
+        CREATE TRIGGER trg_appointments_due_insert AFTER INSERT ON appointments
+        BEGIN
+            UPDATE appointments SET due_at = {DUE_AT_SQL.format(date='NEW.appointment_date')} WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("DROP TRIGGER IF EXISTS trg_appointments_due_update")
+    conn.execute(f"""
+        CREATE TRIGGER trg_appointments_due_update AFTER UPDATE OF appointment_date ON appointments
+        WHEN NEW.appointment_date IS NOT OLD.appointment_date
+        BEGIN
+            UPDATE appointments SET due_at = {DUE_AT_SQL.format(date='NEW.appointment_date')}, reminded_at = NULL
+            WHERE id = NEW.id;
+        END
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_pending_due ON appointments (due_at) "
+                 "WHERE reminded_at IS NULL")
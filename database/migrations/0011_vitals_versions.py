@@ -0,0 +1,41 @@
+"""
+Per-user vitals version counter
+
+vitals_versions.version is bumped by triggers on every insert, update or
+delete in blood_pressure and height_weight, so a cached VitalsSeries can be
+revalidated with one primary-key lookup instead of re-reading the history.
+A user with no row has version 0.
+"""
+import sqlite3
+
+
+VITALS_TABLES = ('blood_pressure', 'height_weight')
+
+BUMP_SQL = ("INSERT INTO vitals_versions (user_id, version) VALUES ({user}, 1) "
+            "ON CONFLICT(user_id) DO UPDATE SET version = version + 1")
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS vitals_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    for table in VITALS_TABLES:
+        triggers = {
+            'insert': f"AFTER INSERT ON {table} WHEN NEW.user_id IS NOT NULL "
+                      f"BEGIN {BUMP_SQL.format(user='NEW.user_id')}; END",
+            'delete': f"AFTER DELETE ON {table} WHEN OLD.user_id IS NOT NULL "
+                      f"BEGIN {BUMP_SQL.format(user='OLD.user_id')}; END",
+            'update_new': f"AFTER UPDATE ON {table} WHEN NEW.user_id IS NOT NULL "
+                          f"BEGIN {BUMP_SQL.format(user='NEW.user_id')}; END",
+            # A row moved to another user changes both histories
+            'update_old': f"AFTER UPDATE ON {table} "
+                          f"WHEN OLD.user_id IS NOT NULL AND OLD.user_id IS NOT NEW.user_id "
+                          f"BEGIN {BUMP_SQL.format(user='OLD.user_id')}; END",
+        }
+        for event, body in triggers.items():
+            name = f"trg_vitals_version_{table}_{event}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"CREATE TRIGGER {name} {body}")
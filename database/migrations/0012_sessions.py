@@ -0,0 +1,25 @@
+"""
+Server-side session records
+
+A row per logged-in browser, keyed by a hash of the session cookie's token.
+It caches what a request needs about the user, so authenticated requests
+never read the users table; profile updates rewrite the user's rows.
+"""
+import sqlite3
+
+
+def upgrade(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            sid TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            username TEXT NOT NULL,
+            gender TEXT,
+            birthday TEXT,
+            profile_version INTEGER NOT NULL DEFAULT 0,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    # Bulk revocation and profile refresh by user; expiry sweeps by time
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
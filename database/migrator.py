@@ -0,0 +1,124 @@
+"""
+Versioned schema migrations
+
+Migrations live in database/migrations as ``NNNN_description.py`` files, each
+defining ``upgrade(conn)``. Applied versions are recorded in ``schema_version``.
+"""
+import importlib.util
+import os
+import re
+import sqlite3
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from database.connection_manager import ConnectionManager
+
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single migration file"""
+    version: int
+    name: str
+    path: str
+
+    def apply(self, conn: sqlite3.Connection):
+        spec = importlib.util.spec_from_file_location(f"migration_{self.version:04d}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.upgrade(conn)
+
+
+class Migrator:
+    """Applies pending migrations in version order"""
+
+    def __init__(self, connection_manager: ConnectionManager, migrations_dir: str = MIGRATIONS_DIR):
+        self.connection_manager = connection_manager
+        self.migrations_dir = migrations_dir
+        self._migrations: Optional[List[Migration]] = None
+
+    def discover(self) -> List[Migration]:
+        """List migration files ordered by version"""
+        if self._migrations is None:
+            migrations = []
+            for filename in os.listdir(self.migrations_dir):
+                match = _FILENAME.match(filename)
+                if match:
+                    migrations.append(Migration(int(match.group(1)), match.group(2),
+                                                os.path.join(self.migrations_dir, filename)))
+            migrations.sort(key=lambda m: m.version)
+            versions = [m.version for m in migrations]
+            if len(set(versions)) != len(versions):
+                raise ValueError(f"Duplicate migration versions in {self.migrations_dir}")
+            self._migrations = migrations
+        return self._migrations
+
+    @property
+    def head_version(self) -> int:
+        migrations = self.discover()
+        return migrations[-1].version if migrations else 0
+
+    def current_version(self) -> int:
+        """Get the latest applied version (0 for an unversioned database)"""
+        with self.connection_manager.connection() as conn:
+            return self._current_version(conn)
+
+    def _current_version(self, conn: sqlite3.Connection) -> int:
+        try:
+            row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return row[0] or 0
+
+    def pending(self) -> List[Migration]:
+        """List migrations not yet applied"""
+        current = self.current_version()
+        return [m for m in self.discover() if m.version > current]
+
+    def upgrade(self, target: Optional[int] = None) -> List[Migration]:
+        """Apply pending migrations up to target, one transaction each"""
+        applied = []
+        with self.connection_manager.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TEXT NOT NULL
+                )
+            """)
+            for migration in self.discover():
+                if target is not None and migration.version > target:
+                    break
+                # BEGIN IMMEDIATE serializes workers starting at the same time;
+                # re-check the version once the write lock is held.
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    if migration.version <= self._current_version(conn):
+                        conn.rollback()
+                        continue
+                    migration.apply(conn)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                        (migration.version, migration.name, datetime.now().isoformat())
+                    )
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                applied.append(migration)
+        return applied
+
+    def ensure_current(self) -> int:
+        """Apply pending migrations if the database is behind; return the version
+
+        When the schema is already current this costs one version query.
+        """
+        current = self.current_version()
+        if current < self.head_version:
+            self.upgrade()
+            current = self.current_version()
+        return current
@@ -0,0 +1,79 @@
+"""
+Notification dispatcher command line
+
+Usage:
+    python -m database.notifications dispatch [--workers N] [--batch-size N] [--file PATH] [--once]
+    python -m database.notifications stats
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from repositories.notification_outbox_repository import NotificationOutboxRepository
+from services.notification_channels import build_channels
+from services.notification_dispatcher import NotificationDispatcher
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.notifications', description='HealthTracker notification dispatcher')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    dispatch_parser = subparsers.add_parser('dispatch', help='deliver queued notifications')
+    dispatch_parser.add_argument('--workers', type=int, default=1, help='dispatcher threads')
+    dispatch_parser.add_argument('--batch-size', type=int, default=100, help='messages claimed per batch')
+    dispatch_parser.add_argument('--max-attempts', type=int, default=5, help='deliveries tried before giving up')
+    dispatch_parser.add_argument('--poll-interval', type=float, default=1.0, help='seconds to wait when idle')
+    dispatch_parser.add_argument('--file', default=None, help='enable the "file" channel, writing to this path')
+    dispatch_parser.add_argument('--once', action='store_true', help='drain what is due now and exit')
+    subparsers.add_parser('stats', help='show outbox counts and delivery latency')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    outbox = NotificationOutboxRepository(args.db, connection_manager)
+    if args.command == 'stats':
+        stats = outbox.get_stats(since=time.time() - 3600)
+        print(f"Outbox: {stats['counts']}")
+        if stats['sent']:
+            print(f"Sent in the last hour: {stats['sent']}, latency avg {stats['avg_latency_ms']:.0f} ms, "
+                  f"max {stats['max_latency_ms']:.0f} ms")
+        return 0
+
+    channels = build_channels(args.file)
+    dispatchers = [NotificationDispatcher(outbox, channels, worker_id=f"{socket.gethostname()}:{os.getpid()}:{i}",
+                                          batch_size=args.batch_size, max_attempts=args.max_attempts)
+                   for i in range(args.workers)]
+    if args.once:
+        totals = {}
+        while True:
+            result = dispatchers[0].dispatch_once()
+            for key, value in result.items():
+                totals[key] = totals.get(key, 0) + value
+            if result['claimed'] < args.batch_size:
+                break
+        print(f"Dispatched: {totals}")
+        return 0
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    threads = [threading.Thread(target=d.run, args=(stop, args.poll_interval), name=f'dispatcher-{i}')
+               for i, d in enumerate(dispatchers)]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            stop.wait(1.0)
+    except KeyboardInterrupt:
+        stop.set()
+    for thread in threads:
+        thread.join()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Password hashing command line
+
+Usage:
+    python -m database.passwords calibrate [--scheme scrypt|pbkdf2] [--target-ms MS]
+    python -m database.passwords bench [--seconds S] [--clients N]
+    python -m database.passwords status
+
+Settings come from the HEALTHTRACKER_PASSWORD_* environment variables
+(see PasswordHashConfig) unless given as options.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from database.connection_manager import ConnectionManager
+from database.migrator import Migrator
+from repositories.user_repository import UserRepository
+from services.authentication_service import AuthenticationService
+from services.password_hashing import PasswordHashConfig, PasswordHasher, HashingBusy, calibrate, parse_method
+
+
+def _bench(config: PasswordHashConfig, seconds: float, clients: int) -> int:
+    """Log one user in from concurrent clients and report throughput per core"""
+    hasher = PasswordHasher.from_config(config)
+    clients = clients or hasher.workers * 2
+    with tempfile.TemporaryDirectory() as tmp:
+        cm = ConnectionManager(os.path.join(tmp, 'bench.db'))
+        Migrator(cm).upgrade()
+        auth = AuthenticationService(UserRepository(cm.db_path, cm), hasher)
+        auth.register_user('bench', 'correct horse battery staple')
+
+        latencies, rejected = [], []
+        deadline = time.perf_counter() + seconds
+
+        def client():
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    if auth.authenticate_user('bench', 'correct horse battery staple') is None:
+                        raise RuntimeError("benchmark login failed")
+                except HashingBusy:
+                    rejected.append(1)
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=client, name=f'bench-{i}') for i in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        hasher.shutdown()
+
+    cores = min(hasher.workers, os.cpu_count() or 1)
+    rate = len(latencies) / elapsed
+    print(f"Method: {hasher.method} ({hasher.workers} workers, {clients} clients, {elapsed:.1f} s)")
+    print(f"Logins: {len(latencies)}, rejected: {len(rejected)}")
+    print(f"Throughput: {rate:.1f} logins/s, {rate / cores:.1f} logins/s/core over {cores} core(s)")
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=20)
+        print(f"Latency: p50 {statistics.median(latencies):.0f} ms, p95 {cuts[18]:.0f} ms")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.passwords', description='HealthTracker password hashing')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    calibrate_parser = subparsers.add_parser('calibrate', help='find the cost that hashes within a target time')
+    calibrate_parser.add_argument('--scheme', choices=('scrypt', 'pbkdf2'), default=None)
+    calibrate_parser.add_argument('--target-ms', type=float, default=None)
+    bench_parser = subparsers.add_parser('bench', help='measure logins per second per core')
+    bench_parser.add_argument('--seconds', type=float, default=5.0, help='benchmark duration')
+    bench_parser.add_argument('--clients', type=int, default=0, help='concurrent logins, default twice the workers')
+    subparsers.add_parser('status', help='count stored hashes by method')
+    args = parser.parse_args(argv)
+
+    config = PasswordHashConfig.from_env()
+    if args.command == 'calibrate':
+        scheme = args.scheme or config.scheme
+        target_ms = args.target_ms or config.target_ms
+        cost = calibrate(scheme, target_ms)
+        print(f"HEALTHTRACKER_PASSWORD_SCHEME={scheme}")
+        print(f"HEALTHTRACKER_PASSWORD_COST={cost}")
+        return 0
+    if args.command == 'bench':
+        return _bench(config, args.seconds, args.clients)
+
+    connection_manager = ConnectionManager(args.db)
+    with connection_manager.connection() as conn:
+        hashes = [row[0] for row in conn.execute("SELECT password FROM users")]
+    methods = Counter(':'.join(map(str, parse_method(h) or ('legacy',))) for h in hashes)
+    hasher = PasswordHasher.from_config(config)
+    outdated = sum(hasher.needs_rehash(h) for h in hashes)
+    for method, count in methods.most_common():
+        print(f"{method}: {count}")
+    print(f"Upgraded on next login: {outdated} of {len(hashes)} (current {hasher.method})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
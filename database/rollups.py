@@ -0,0 +1,188 @@
+"""
+Per-user daily rollups maintained by triggers
+
+``daily_rollups`` holds one row per (user_id, day) with calorie intake,
+calories burned, blood pressure min/mean/max, the day's latest weight and a
+mood score. Every insert, update or delete on a source table re-aggregates
+just the affected day inside the same transaction, so the rollup can never
+disagree with the rows it summarizes. Empty aggregates are NULL rather than
+0 and a day left without source rows is pruned, so maintained and rebuilt
+rollups are identical.
+
+Trigger definitions live here; a change to ROLLUP_SOURCES must ship with a
+migration that calls install_triggers() and rebuild() again.
+
+Usage:
+    python -m database.rollups rebuild [--user-id N]
+"""
+import argparse
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+
+@dataclass(frozen=True)
+class RollupSource:
+    """A source table and the rollup columns it feeds"""
+    table: str
+    day_column: str
+    timestamped: bool  # day_column holds 'YYYY-MM-DD HH:MM:SS' rather than a bare date
+    aggregates: Dict[str, str]  # rollup column -> aggregate expression
+
+
+MOOD_SCORE_SQL = ("AVG(CASE mood WHEN 'very_happy' THEN 2 WHEN 'happy' THEN 1 WHEN 'neutral' THEN 0 "
+                  "WHEN 'a_bit_down' THEN -1 WHEN 'very_down' THEN -2 END)")
+
+ROLLUP_SOURCES: List[RollupSource] = [
+    RollupSource('diet_records', 'diet_date', False, {
+        'calories_in': 'SUM(calories)',
+    }),
+    RollupSource('exercise_records', 'exercise_date', False, {
+        'exercise_count': 'NULLIF(COUNT(*), 0)',
+        'exercise_minutes': 'SUM(duration)',
+        'calories_burned': 'SUM(calories)',
+    }),
+    RollupSource('blood_pressure', 'recorded_at', True, {
+        'bp_count': 'NULLIF(COUNT(*), 0)',
+        'systolic_min': 'MIN(systolic)',
+        'systolic_mean': 'AVG(systolic)',
+        'systolic_max': 'MAX(systolic)',
+        'diastolic_min': 'MIN(diastolic)',
+        'diastolic_mean': 'AVG(diastolic)',
+        'diastolic_max': 'MAX(diastolic)',
+    }),
+    # A bare column next to MAX() takes its value from the row holding the maximum
+    RollupSource('height_weight', 'recorded_at', True, {
+        'weight': 'weight',
+        'weight_recorded_at': 'MAX(recorded_at)',
+    }),
+    RollupSource('mood_records', 'mood_date', False, {
+        'mood_score': MOOD_SCORE_SQL,
+    }),
+]
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS daily_rollups (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        calories_in INTEGER,
+        exercise_count INTEGER,
+        exercise_minutes INTEGER,
+        calories_burned INTEGER,
+        bp_count INTEGER,
+        systolic_min INTEGER,
+        systolic_mean REAL,
+        systolic_max INTEGER,
+        diastolic_min INTEGER,
+        diastolic_mean REAL,
+        diastolic_max INTEGER,
+        weight REAL,
+        weight_recorded_at TEXT,
+        mood_score REAL,
+        PRIMARY KEY (user_id, day)
+    ) WITHOUT ROWID
+"""
+
+
+def _day_of(source: RollupSource, row: str = '') -> str:
+    column = f"{row}{source.day_column}"
+    return f"substr({column}, 1, 10)" if source.timestamped else column
+
+
+def _upsert(source: RollupSource, select_sql: str) -> str:
+    columns = list(source.aggregates)
+    return (
+        f"INSERT INTO daily_rollups (user_id, day, {', '.join(columns)}) {select_sql} "
+        f"ON CONFLICT(user_id, day) DO UPDATE SET "
+        + ', '.join(f"{column} = excluded.{column}" for column in columns)
+    )
+
+
+def refresh_sql(source: RollupSource, user_expr: str, day_expr: str) -> str:
+    """Statement that re-aggregates one (user, day) of ``source`` into daily_rollups"""
+    if source.timestamped:
+        day_filter = f"{source.day_column} >= {day_expr} AND {source.day_column} < date({day_expr}, '+1 day')"
+    else:
+        day_filter = f"{source.day_column} = {day_expr}"
+    return _upsert(source, (
+        f"SELECT {user_expr}, {day_expr}, {', '.join(source.aggregates.values())} "
+        f"FROM {source.table} WHERE user_id = {user_expr} AND {day_filter}"
+    ))
+
+
+def prune_sql(user_expr: str, day_expr: str) -> str:
+    """Statement that drops the (user, day) rollup once every source for it is empty"""
+    columns = [column for source in ROLLUP_SOURCES for column in source.aggregates]
+    return (f"DELETE FROM daily_rollups WHERE user_id = {user_expr} AND day = {day_expr} "
+            f"AND COALESCE({', '.join(columns)}) IS NULL")
+
+
+def rebuild_sql(source: RollupSource, user_filter: bool = False) -> str:
+    """Statement that aggregates every day of ``source`` (optionally for one user, bound as ?)"""
+    day = _day_of(source)
+    where = f"user_id IS NOT NULL AND {source.day_column} IS NOT NULL"
+    if user_filter:
+        where += " AND user_id = ?"
+    return _upsert(source, (
+        f"SELECT user_id, {day}, {', '.join(source.aggregates.values())} "
+        f"FROM {source.table} WHERE {where} GROUP BY user_id, {day}"
+    ))
+
+
+def install_triggers(conn: sqlite3.Connection):
+    """(Re)create the insert/update/delete triggers on every source table"""
+    for source in ROLLUP_SOURCES:
+        new_day, old_day = _day_of(source, 'NEW.'), _day_of(source, 'OLD.')
+        new_ok = f"NEW.user_id IS NOT NULL AND NEW.{source.day_column} IS NOT NULL"
+        old_ok = f"OLD.user_id IS NOT NULL AND OLD.{source.day_column} IS NOT NULL"
+        refresh_new = refresh_sql(source, 'NEW.user_id', new_day)
+        refresh_old = (f"{refresh_sql(source, 'OLD.user_id', old_day)}; "
+                       f"{prune_sql('OLD.user_id', old_day)}")
+        triggers = {
+            'insert': f"AFTER INSERT ON {source.table} WHEN {new_ok} BEGIN {refresh_new}; END",
+            'delete': f"AFTER DELETE ON {source.table} WHEN {old_ok} BEGIN {refresh_old}; END",
+            # An update can move a row to another day or user: refresh both sides
+            'update_old': f"AFTER UPDATE ON {source.table} WHEN {old_ok} BEGIN {refresh_old}; END",
+            'update_new': f"AFTER UPDATE ON {source.table} WHEN {new_ok} BEGIN {refresh_new}; END",
+        }
+        for event, body in triggers.items():
+            name = f"trg_rollup_{source.table}_{event}"
+            conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.execute(f"CREATE TRIGGER {name} {body}")
+
+
+def rebuild(conn: sqlite3.Connection, user_id: Optional[int] = None) -> int:
+    """Recompute daily_rollups from the source tables; return the number of rollup rows"""
+    params = () if user_id is None else (user_id,)
+    if user_id is None:
+        conn.execute("DELETE FROM daily_rollups")
+    else:
+        conn.execute("DELETE FROM daily_rollups WHERE user_id = ?", params)
+    for source in ROLLUP_SOURCES:
+        conn.execute(rebuild_sql(source, user_id is not None), params)
+    if user_id is None:
+        return conn.execute("SELECT COUNT(*) FROM daily_rollups").fetchone()[0]
+    return conn.execute("SELECT COUNT(*) FROM daily_rollups WHERE user_id = ?", params).fetchone()[0]
+
+
+def main(argv=None) -> int:
+    from database.connection_manager import ConnectionManager
+    from database.storage_config import StorageConfig
+
+    parser = argparse.ArgumentParser(prog='python -m database.rollups', description='HealthTracker daily rollups')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    rebuild_parser = subparsers.add_parser('rebuild', help='recompute rollups from the source tables')
+    rebuild_parser.add_argument('--user-id', type=int, default=None, help='only rebuild this user')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    with connection_manager.transaction() as conn:
+        count = rebuild(conn, args.user_id)
+    print(f"Rebuilt {count} daily rollup rows")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
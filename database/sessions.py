@@ -0,0 +1,53 @@
+"""
+Server-side session maintenance
+
+Usage:
+    python -m database.sessions sweep
+    python -m database.sessions revoke (--user ID | --username NAME | --all)
+"""
+import argparse
+import sys
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from repositories.session_repository import SessionRepository
+from repositories.user_repository import UserRepository
+from services.session_store import SessionManager
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m database.sessions', description='HealthTracker sessions')
+    parser.add_argument('--db', default='healthTracker.db', help='SQLite database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('sweep', help='delete expired sessions')
+    revoke_parser = subparsers.add_parser('revoke', help='log users out everywhere')
+    target = revoke_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--user', type=int, help='user id')
+    target.add_argument('--username', help='username')
+    target.add_argument('--all', action='store_true', help='every session')
+    args = parser.parse_args(argv)
+
+    connection_manager = ConnectionManager(args.db, pragmas=StorageConfig.from_env().pragmas())
+    users = UserRepository(args.db, connection_manager)
+    manager = SessionManager(SessionRepository(args.db, connection_manager), users)
+    if args.command == 'sweep':
+        print(f"Expired sessions deleted: {manager.sweep()['expired']}")
+        return 0
+
+    if args.all:
+        revoked = manager.revoke_all()
+    else:
+        user_id = args.user
+        if args.username is not None:
+            user = users.get_user_by_username(args.username)
+            if user is None:
+                print(f"No such user: {args.username}")
+                return 1
+            user_id = user.id
+        revoked = manager.revoke_user(user_id)
+    print(f"Sessions revoked: {revoked}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+SQLite storage configuration (journal mode and tuning PRAGMAs)
+"""
+import os
+from dataclasses import dataclass, fields
+from typing import Any, List, Mapping, Optional, Tuple
+
+
+_CHOICES = {
+    'journal_mode': {'DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'},
+    'synchronous': {'OFF', 'NORMAL', 'FULL', 'EXTRA'},
+    'temp_store': {'DEFAULT', 'FILE', 'MEMORY'},
+    'checkpoint_mode': {'PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'},
+}
+
+
+@dataclass
+class StorageConfig:
+    """Storage settings applied to every pooled connection
+
+    Every field can be overridden with an environment variable named
+    ``HEALTHTRACKER_SQLITE_<FIELD>``, e.g. ``HEALTHTRACKER_SQLITE_CACHE_SIZE``.
+    """
+    journal_mode: str = 'WAL'
+    synchronous: str = 'NORMAL'      # safe with WAL, avoids an fsync per commit
+    cache_size: int = -20000         # negative value means KiB (~20 MB)
+    mmap_size: int = 268435456       # 256 MB
+    temp_store: str = 'MEMORY'
+    busy_timeout: int = 5000         # milliseconds
+    wal_autocheckpoint: int = 1000   # pages
+    checkpoint_interval: float = 300.0  # seconds, 0 disables the scheduler
+    checkpoint_mode: str = 'TRUNCATE'
+
+    def __post_init__(self):
+        for name, choices in _CHOICES.items():
+            value = str(getattr(self, name)).upper()
+            if value not in choices:
+                raise ValueError(f"Invalid {name}: {getattr(self, name)!r}")
+            setattr(self, name, value)
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'StorageConfig':
+        """Build config from HEALTHTRACKER_SQLITE_* environment variables"""
+        environ = os.environ if environ is None else environ
+        values = {}
+        for f in fields(cls):
+            raw = environ.get(f"HEALTHTRACKER_SQLITE_{f.name.upper()}")
+            if raw is not None:
+                values[f.name] = f.type(raw) if f.type in (int, float) else raw
+        return cls(**values)
+
+    def pragmas(self) -> List[Tuple[str, Any]]:
+        """PRAGMAs to run once on each new connection"""
+        return [
+            ('busy_timeout', int(self.busy_timeout)),
+            ('journal_mode', self.journal_mode),
+            ('synchronous', self.synchronous),
+            ('cache_size', int(self.cache_size)),
+            ('mmap_size', int(self.mmap_size)),
+            ('temp_store', self.temp_store),
+            ('wal_autocheckpoint', int(self.wal_autocheckpoint)),
+        ]
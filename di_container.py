@@ -2,43 +2,134 @@
 Dependency Injection Container
 Implements Dependency Inversion Principle (DIP)
 """
-from typing import Dict, Any
+import os
+from typing import Dict, Any, Optional
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from database.checkpoint_scheduler import CheckpointScheduler
+from database.migrator import Migrator
 
 # Repository imports
 from repositories.user_repository import UserRepository
 from repositories.health_data_repository import HealthDataRepository
 from repositories.medical_repository import MedicalRepository
 from repositories.lifestyle_repository import LifestyleRepository
+from repositories.mood_repository import MoodRepository
+from repositories.dashboard_repository import DashboardRepository
+from repositories.export_repository import ExportRepository
+from repositories.rollup_repository import RollupRepository
+from repositories.cohort_repository import CohortRepository
+from repositories.alert_repository import AlertRepository
+from repositories.notification_outbox_repository import NotificationOutboxRepository
 
 # Service imports
 from services.authentication_service import AuthenticationService
 from services.health_evaluation_service import HealthEvaluationService
 from services.calorie_calculation_service import CalorieCalculationService
 from services.notification_service import NotificationService
+from services.dashboard_service import DashboardService
+from services.ingestion_service import IngestionService
+from services.export_service import ExportService
+from services.chart_data_service import ChartDataService
+from services.cohort_analytics import CohortAnalyticsService
+from services.alert_scan_service import AlertScanService, AlertScanScheduler
+from services.password_hashing import PasswordHasher, PasswordHashConfig
+from repositories.session_repository import SessionRepository
+from services.session_store import (
+    MemorySessionStore, SessionManager, SessionSweeper, DEFAULT_SESSION_TTL, DEFAULT_SWEEP_INTERVAL
+)
+from services.login_throttle import LoginThrottle, LoginThrottleConfig
+from services.cache_backends import build_cache_backend, MemoryCacheBackend, DEFAULT_CACHE_URL
+from services.vitals_series import VitalsSeriesCache, DEFAULT_MAX_USERS
+from services.result_cache import ResultCache, DEFAULT_MAX_ENTRIES, DEFAULT_TTL
+from services.appointment_reminders import AppointmentReminderQueue, AppointmentReminderScheduler, DEFAULT_TICK_INTERVAL
 
 
 class DIContainer:
     """Dependency Injection Container"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, storage_config: Optional[StorageConfig] = None):
         self.db_path = db_path
+        self.storage_config = storage_config or StorageConfig.from_env()
+        self.connection_manager = ConnectionManager(
+            db_path,
+            pragmas=self.storage_config.pragmas(),
+            timeout=self.storage_config.busy_timeout / 1000
+        )
+        self.migrator = Migrator(self.connection_manager)
+        self.checkpoint_scheduler = CheckpointScheduler(
+            self.connection_manager,
+            interval=self.storage_config.checkpoint_interval,
+            mode=self.storage_config.checkpoint_mode
+        )
         self._repositories = {}
         self._services = {}
         self._initialize_dependencies()
+        # The all-users scan belongs in one process (python -m database.alerts scan --loop);
+        # a web worker only runs it when HEALTHTRACKER_ALERT_SCAN_INTERVAL opts in
+        self.alert_scan_scheduler = AlertScanScheduler(
+            self._services['alert_scan'],
+            interval=float(os.environ.get('HEALTHTRACKER_ALERT_SCAN_INTERVAL', 0))
+        )
+        self.reminder_scheduler = AppointmentReminderScheduler(
+            AppointmentReminderQueue(self._repositories['medical'], self._services['notification']),
+            interval=float(os.environ.get('HEALTHTRACKER_REMINDER_INTERVAL', DEFAULT_TICK_INTERVAL))
+        )
+        self.session_sweeper = SessionSweeper(
+            self._services['sessions'],
+            interval=float(os.environ.get('HEALTHTRACKER_SESSION_SWEEP_INTERVAL', DEFAULT_SWEEP_INTERVAL))
+        )
     
     def _initialize_dependencies(self):
         """Initialize all dependencies"""
-        # Initialize repositories
-        self._repositories['user'] = UserRepository(self.db_path)
-        self._repositories['health_data'] = HealthDataRepository(self.db_path)
-        self._repositories['medical'] = MedicalRepository(self.db_path)
-        self._repositories['lifestyle'] = LifestyleRepository(self.db_path)
+        # Initialize repositories sharing one connection manager
+        cm = self.connection_manager
+        self._repositories['user'] = UserRepository(self.db_path, cm)
+        self._repositories['health_data'] = HealthDataRepository(self.db_path, cm)
+        self._repositories['medical'] = MedicalRepository(self.db_path, cm)
+        self._repositories['lifestyle'] = LifestyleRepository(self.db_path, cm)
+        self._repositories['mood'] = MoodRepository(self.db_path, cm)
+        self._repositories['dashboard'] = DashboardRepository(self.db_path, cm)
+        self._repositories['export'] = ExportRepository(self.db_path, cm)
+        self._repositories['rollup'] = RollupRepository(self.db_path, cm)
+        self._repositories['cohort'] = CohortRepository(self.db_path, cm)
+        self._repositories['alert'] = AlertRepository(self.db_path, cm)
+        self._repositories['outbox'] = NotificationOutboxRepository(self.db_path, cm)
+        self._repositories['session'] = SessionRepository(self.db_path, cm)
         
         # Initialize services with repository dependencies
-        self._services['auth'] = AuthenticationService(self._repositories['user'])
+        self._services['password_hasher'] = PasswordHasher.from_config(PasswordHashConfig.from_env())
+        self._services['auth'] = AuthenticationService(self._repositories['user'], self._services['password_hasher'])
+        throttle_config = LoginThrottleConfig.from_env()
+        limits_backend = self._shared_cache_backend('limits')
+        self._services['login_throttle'] = LoginThrottle('login', throttle_config, backend=limits_backend)
+        self._services['reset_throttle'] = LoginThrottle('password_reset', throttle_config, backend=limits_backend)
+        # The sessions table is shared by every worker; 'memory' suits a single process
+        session_store = (MemorySessionStore() if os.environ.get('HEALTHTRACKER_SESSION_STORE', 'sqlite') == 'memory'
+                         else self._repositories['session'])
+        self._services['sessions'] = SessionManager(
+            session_store, self._repositories['user'],
+            ttl=float(os.environ.get('HEALTHTRACKER_SESSION_TTL', DEFAULT_SESSION_TTL))
+        )
+        self._repositories['user'].add_change_listener(self._services['sessions'].refresh_user)
+        self._services['vitals'] = VitalsSeriesCache(
+            self._repositories['health_data'],
+            backend=self._cache_backend('vitals', DEFAULT_MAX_USERS)
+        )
+        self._services['result_cache'] = ResultCache(
+            ttl=float(os.environ.get('HEALTHTRACKER_RESULT_CACHE_TTL', DEFAULT_TTL)),
+            backend=self._cache_backend(
+                'results', int(os.environ.get('HEALTHTRACKER_RESULT_CACHE_SIZE', DEFAULT_MAX_ENTRIES)))
+        )
+        # Writes through these repositories drop the user's cached evaluations
+        for name in ('user', 'health_data'):
+            self._repositories[name].add_change_listener(self._services['result_cache'].invalidate_user)
         self._services['health'] = HealthEvaluationService(
             self._repositories['user'], 
-            self._repositories['health_data']
+            self._repositories['health_data'],
+            vitals_series=self._services['vitals'],
+            result_cache=self._services['result_cache']
         )
         self._services['calorie'] = CalorieCalculationService(
             self._repositories['lifestyle']
@@ -46,8 +137,37 @@ class DIContainer:
         self._services['notification'] = NotificationService(
             self._repositories['user'],
             self._repositories['health_data'],
-            self._repositories['medical']
+            self._repositories['medical'],
+            self._repositories['outbox']
+        )
+        self._services['dashboard'] = DashboardService(
+            self._repositories['dashboard'],
+            self._services['health']
         )
+        self._services['ingestion'] = IngestionService(self._repositories['health_data'])
+        self._services['export'] = ExportService(self._repositories['export'])
+        self._services['chart'] = ChartDataService(
+            self._repositories['health_data'],
+            self._repositories['lifestyle'],
+            self._services['vitals']
+        )
+        self._services['cohort'] = CohortAnalyticsService(self._repositories['cohort'])
+        self._services['alert_scan'] = AlertScanService(
+            self._repositories['user'],
+            self._repositories['alert']
+        )
+    
+    def _cache_backend(self, namespace: str, max_entries: int):
+        """Backend for one cache namespace, from HEALTHTRACKER_CACHE_URL"""
+        return build_cache_backend(
+            os.environ.get('HEALTHTRACKER_CACHE_URL', DEFAULT_CACHE_URL), namespace, max_entries,
+            default_path=os.path.splitext(self.db_path)[0] + '.cache.db'
+        )
+    
+    def _shared_cache_backend(self, namespace: str):
+        """Like _cache_backend, but None unless the URL names a store shared between workers"""
+        backend = self._cache_backend(namespace, 4096)
+        return None if isinstance(backend, MemoryCacheBackend) else backend
     
     def get_repository(self, name: str):
         """Get repository by name"""
@@ -57,6 +177,34 @@ class DIContainer:
         """Get service by name"""
         return self._services.get(name)
     
+    def get_connection_manager(self) -> ConnectionManager:
+        """Get shared connection manager"""
+        return self.connection_manager
+    
+    def get_migrator(self) -> Migrator:
+        """Get schema migrator"""
+        return self.migrator
+    
+    def get_checkpoint_scheduler(self) -> CheckpointScheduler:
+        """Get WAL checkpoint scheduler"""
+        return self.checkpoint_scheduler
+    
+    def get_alert_scan_scheduler(self) -> AlertScanScheduler:
+        """Get background alert scan scheduler"""
+        return self.alert_scan_scheduler
+    
+    def get_reminder_scheduler(self) -> AppointmentReminderScheduler:
+        """Get appointment reminder scheduler"""
+        return self.reminder_scheduler
+    
+    def get_session_sweeper(self) -> SessionSweeper:
+        """Get expired session sweeper"""
+        return self.session_sweeper
+    
+    def get_session_manager(self) -> SessionManager:
+        """Get server-side session manager"""
+        return self._services['sessions']
+    
     def get_auth_service(self):
         """Get authentication service"""
         return self._services['auth']
@@ -72,16 +220,60 @@ class DIContainer:
     def get_notification_service(self):
         """Get notification service"""
         return self._services['notification']
+    
+    def get_dashboard_service(self):
+        """Get dashboard service"""
+        return self._services['dashboard']
+    
+    def get_ingestion_service(self):
+        """Get bulk ingestion service"""
+        return self._services['ingestion']
+    
+    def get_export_service(self):
+        """Get history export service"""
+        return self._services['export']
+    
+    def get_chart_data_service(self):
+        """Get chart data service"""
+        return self._services['chart']
+    
+    def get_cohort_analytics_service(self):
+        """Get cohort analytics service"""
+        return self._services['cohort']
+    
+    def get_alert_scan_service(self):
+        """Get health alert scan service"""
+        return self._services['alert_scan']
+    
+    def get_vitals_series_cache(self) -> VitalsSeriesCache:
+        """Get the shared per-user vitals series cache"""
+        return self._services['vitals']
+    
+    def get_result_cache(self) -> ResultCache:
+        """Get the per-user evaluation result cache"""
+        return self._services['result_cache']
+    
+    def get_password_hasher(self) -> PasswordHasher:
+        """Get the password hashing pool"""
+        return self._services['password_hasher']
+    
+    def get_login_throttle(self) -> LoginThrottle:
+        """Get the login attempt limiter"""
+        return self._services['login_throttle']
+    
+    def get_password_reset_throttle(self) -> LoginThrottle:
+        """Get the password reset attempt limiter"""
+        return self._services['reset_throttle']
 
 
 # Global container instance
 _container = None
 
 
-def initialize_container(db_path: str):
+def initialize_container(db_path: str, storage_config: Optional[StorageConfig] = None):
     """Initialize the global DI container"""
     global _container
-    _container = DIContainer(db_path)
+    _container = DIContainer(db_path, storage_config)
 
 
 def get_container() -> DIContainer:
@@ -91,6 +283,41 @@ def get_container() -> DIContainer:
     return _container
 
 
+def get_connection_manager() -> ConnectionManager:
+    """Get shared connection manager from container"""
+    return get_container().get_connection_manager()
+
+
+def get_migrator() -> Migrator:
+    """Get schema migrator from container"""
+    return get_container().get_migrator()
+
+
+def get_checkpoint_scheduler() -> CheckpointScheduler:
+    """Get WAL checkpoint scheduler from container"""
+    return get_container().get_checkpoint_scheduler()
+
+
+def get_alert_scan_scheduler() -> AlertScanScheduler:
+    """Get background alert scan scheduler from container"""
+    return get_container().get_alert_scan_scheduler()
+
+
+def get_reminder_scheduler() -> AppointmentReminderScheduler:
+    """Get appointment reminder scheduler from container"""
+    return get_container().get_reminder_scheduler()
+
+
+def get_session_sweeper() -> SessionSweeper:
+    """Get expired session sweeper from container"""
+    return get_container().get_session_sweeper()
+
+
+def get_session_manager() -> SessionManager:
+    """Get server-side session manager from container"""
+    return get_container().get_session_manager()
+
+
 def get_auth_service():
     """Get authentication service from container"""
     return get_container().get_auth_service()
@@ -111,6 +338,61 @@ def get_notification_service():
     return get_container().get_notification_service()
 
 
+def get_dashboard_service():
+    """Get dashboard service from container"""
+    return get_container().get_dashboard_service()
+
+
+def get_ingestion_service():
+    """Get bulk ingestion service from container"""
+    return get_container().get_ingestion_service()
+
+
+def get_export_service():
+    """Get history export service from container"""
+    return get_container().get_export_service()
+
+
+def get_chart_data_service():
+    """Get chart data service from container"""
+    return get_container().get_chart_data_service()
+
+
+def get_cohort_analytics_service():
+    """Get cohort analytics service from container"""
+    return get_container().get_cohort_analytics_service()
+
+
+def get_alert_scan_service():
+    """Get health alert scan service from container"""
+    return get_container().get_alert_scan_service()
+
+
+def get_vitals_series_cache() -> VitalsSeriesCache:
+    """Get the shared per-user vitals series cache"""
+    return get_container().get_vitals_series_cache()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the per-user evaluation result cache"""
+    return get_container().get_result_cache()
+
+
+def get_password_hasher() -> PasswordHasher:
+    """Get the password hashing pool"""
+    return get_container().get_password_hasher()
+
+
+def get_login_throttle() -> LoginThrottle:
+    """Get the login attempt limiter"""
+    return get_container().get_login_throttle()
+
+
+def get_password_reset_throttle() -> LoginThrottle:
+    """Get the password reset attempt limiter"""
+    return get_container().get_password_reset_throttle()
+
+
 def get_repository(name: str):
     """Get repository by name from container"""
     return get_container().get_repository(name)
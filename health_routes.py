@@ -1,53 +1,68 @@
-from flask import Blueprint, request, redirect, url_for, session, render_template, flash
-import sqlite3
-
-# 取得目前登入的使用者ID
-def get_current_user_id():
-    return session.get('username')
+from flask import Blueprint, request, redirect, url_for, render_template, flash, jsonify
+from datetime import datetime
+from di_container import get_repository, get_ingestion_service, get_chart_data_service
+from models.domain import BloodPressureRecord, HeightWeightRecord
+from user_session import get_current_user_id
 
 def create_health_bp(DB_PATH):
     health_bp = Blueprint('health', __name__)
 
     @health_bp.route('/record/blood_pressure', methods=['POST'])
     def record_blood_pressure():
-        username = session.get('username')
-        if not username:
-            return redirect(url_for('login'))
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT id FROM users WHERE username=?', (username,))
-        row = c.fetchone()
-        if not row:
-            conn.close()
+        user_id = get_current_user_id()
+        if not user_id:
             return redirect(url_for('login'))
-        user_id = row[0]
         systolic = int(request.form['systolic'])
         diastolic = int(request.form['diastolic'])
-        c.execute('INSERT INTO blood_pressure (user_id, systolic, diastolic) VALUES (?, ?, ?)', (user_id, systolic, diastolic))
-        conn.commit()
-        conn.close()
+        recorded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # Through the repository so cached evaluations are invalidated
+        get_repository('health_data').create_blood_pressure_record(BloodPressureRecord(
+            user_id=user_id, systolic=systolic, diastolic=diastolic, date=recorded_at[:10], recorded_at=recorded_at))
         flash('血壓紀錄已新增')
         return redirect(url_for('blood_pressure'))
 
     @health_bp.route('/record/height_weight', methods=['POST'])
     def record_height_weight():
-        username = session.get('username')
-        if not username:
-            return redirect(url_for('login'))
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT id FROM users WHERE username=?', (username,))
-        row = c.fetchone()
-        if not row:
-            conn.close()
+        user_id = get_current_user_id()
+        if not user_id:
             return redirect(url_for('login'))
-        user_id = row[0]
         height = float(request.form['height'])
         weight = float(request.form['weight'])
-        c.execute('INSERT INTO height_weight (user_id, height, weight) VALUES (?, ?, ?)', (user_id, height, weight))
-        conn.commit()
-        conn.close()
+        recorded_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        get_repository('health_data').create_height_weight_record(HeightWeightRecord(
+            user_id=user_id, height=height, weight=weight, date=recorded_at[:10], recorded_at=recorded_at))
         flash('身高體重紀錄已新增')
         return redirect(url_for('height_weight'))
 
+    @health_bp.route('/api/readings/bulk', methods=['POST'])
+    def bulk_readings():
+        """Ingest a JSON or NDJSON batch of blood pressure and height/weight readings"""
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': '請先登入'}), 401
+        ingestion_service = get_ingestion_service()
+        try:
+            readings = ingestion_service.parse_payload(request.get_data(), request.content_type)
+        except (ValueError, UnicodeDecodeError) as e:
+            return jsonify({'error': f'無法解析資料：{e}'}), 400
+        return jsonify(ingestion_service.ingest(user_id, readings))
+
+    @health_bp.route('/api/charts/<series>')
+    def chart_series(series):
+        """Chart series reduced server-side to a fixed number of points"""
+        user_id = get_current_user_id()
+        if not user_id:
+            return jsonify({'error': '請先登入'}), 401
+        try:
+            data = get_chart_data_service().get_series(
+                user_id, series,
+                points=request.args.get('points', type=int),
+                resolution=request.args.get('resolution', 'raw'),
+                method=request.args.get('method', 'lttb'),
+                start=request.args.get('start'),
+                end=request.args.get('end'))
+        except ValueError as e:
+            return jsonify({'error': f'參數錯誤：{e}'}), 400
+        return jsonify(data)
+
     return health_bp
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
-from models.domain import User, BloodPressureRecord, HeightWeightRecord, MedicalRecord, Appointment, ExerciseRecord, DietRecord
+from typing import Any, Dict, List, Optional, Tuple
+from models.domain import User, BloodPressureRecord, HeightWeightRecord, MedicalRecord, Appointment, ExerciseRecord, DietRecord, Page, SessionRecord
 
 
 class IUserRepository(ABC):
@@ -26,6 +26,21 @@ class IUserRepository(ABC):
         """Update user information"""
         pass
     
+    @abstractmethod
+    def update_password(self, username: str, password_hash: str) -> bool:
+        """Update a user's password hash"""
+        pass
+    
+    @abstractmethod
+    def rehash_password(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """Replace a password hash with a stronger hash of the same password"""
+        pass
+    
+    @abstractmethod
+    def get_profile_version(self, user_id: int) -> Optional[int]:
+        """Get the user's profile version, or None if the user no longer exists"""
+        pass
+    
     @abstractmethod
     def delete_user(self, user_id: int) -> bool:
         """Delete user by ID"""
@@ -35,6 +50,11 @@ class IUserRepository(ABC):
     def get_all_users(self) -> List[User]:
         """Get all users"""
         pass
+    
+    @abstractmethod
+    def get_user_id_range(self) -> Tuple[int, int]:
+        """Get the (lowest, highest) user id"""
+        pass
 
 
 class IHealthDataRepository(ABC):
@@ -46,11 +66,32 @@ class IHealthDataRepository(ABC):
         """Create a new blood pressure record"""
         pass
     
+    @abstractmethod
+    def bulk_create_blood_pressure_records(self, records: List[BloodPressureRecord]) -> List[bool]:
+        """Insert a batch of records in one transaction; False marks a duplicate (user_id, recorded_at)"""
+        pass
+    
     @abstractmethod
     def get_blood_pressure_records_by_user(self, user_id: int) -> List[BloodPressureRecord]:
         """Get all blood pressure records for a user"""
         pass
     
+    @abstractmethod
+    def get_blood_pressure_records_page(self, user_id: int, limit: Optional[int] = None,
+                                        cursor: Optional[str] = None) -> Page:
+        """Get one page of blood pressure records, newest first"""
+        pass
+    
+    @abstractmethod
+    def get_latest_blood_pressure_record(self, user_id: int) -> Optional[BloodPressureRecord]:
+        """Get the most recent blood pressure record for a user"""
+        pass
+    
+    @abstractmethod
+    def get_latest_n_blood_pressure_records(self, user_id: int, n: int) -> List[BloodPressureRecord]:
+        """Get the n most recent blood pressure records, newest first"""
+        pass
+    
     @abstractmethod
     def update_blood_pressure_record(self, record: BloodPressureRecord) -> bool:
         """Update a blood pressure record"""
@@ -67,11 +108,48 @@ class IHealthDataRepository(ABC):
         """Create a new height/weight record"""
         pass
     
+    @abstractmethod
+    def bulk_create_height_weight_records(self, records: List[HeightWeightRecord]) -> List[bool]:
+        """Insert a batch of records in one transaction; False marks a duplicate (user_id, recorded_at)"""
+        pass
+    
     @abstractmethod
     def get_height_weight_records_by_user(self, user_id: int) -> List[HeightWeightRecord]:
         """Get all height/weight records for a user"""
         pass
     
+    @abstractmethod
+    def get_height_weight_records_page(self, user_id: int, limit: Optional[int] = None,
+                                       cursor: Optional[str] = None) -> Page:
+        """Get one page of height/weight records, newest first"""
+        pass
+    
+    @abstractmethod
+    def get_latest_height_weight_record(self, user_id: int) -> Optional[HeightWeightRecord]:
+        """Get the most recent height/weight record for a user"""
+        pass
+    
+    @abstractmethod
+    def get_latest_n_height_weight_records(self, user_id: int, n: int) -> List[HeightWeightRecord]:
+        """Get the n most recent height/weight records, newest first"""
+        pass
+    
+    @abstractmethod
+    def get_height_weight_series(self, user_id: int, start: Optional[str] = None,
+                                 end: Optional[str] = None) -> List[Tuple[str, float, float]]:
+        """Get (recorded_at, height, weight) points oldest first"""
+        pass
+    
+    @abstractmethod
+    def get_vitals_version(self, user_id: int) -> int:
+        """Get the user's vitals version, bumped on every reading change"""
+        pass
+    
+    @abstractmethod
+    def get_vitals_rows(self, user_id: int) -> Tuple[int, List[tuple]]:
+        """Get (vitals version, every blood pressure and height/weight reading) in one fetch"""
+        pass
+    
     @abstractmethod
     def update_height_weight_record(self, record: HeightWeightRecord) -> bool:
         """Update a height/weight record"""
@@ -97,6 +175,12 @@ class IMedicalRepository(ABC):
         """Get all medical records for a user"""
         pass
     
+    @abstractmethod
+    def get_medical_records_page(self, user_id: int, limit: Optional[int] = None,
+                                 cursor: Optional[str] = None) -> Page:
+        """Get one page of medical_records rows, newest visit first"""
+        pass
+    
     @abstractmethod
     def update_medical_record(self, record: MedicalRecord) -> bool:
         """Update a medical record"""
@@ -118,6 +202,32 @@ class IMedicalRepository(ABC):
         """Get all appointments for a user"""
         pass
     
+    @abstractmethod
+    def get_appointments_page(self, user_id: int, limit: Optional[int] = None,
+                              cursor: Optional[str] = None) -> Page:
+        """Get one page of appointments rows, latest date first"""
+        pass
+    
+    @abstractmethod
+    def get_appointments_between(self, user_id: int, start: str, end: str) -> List[Appointment]:
+        """Get a user's appointments dated from start to end inclusive"""
+        pass
+    
+    @abstractmethod
+    def get_pending_reminders(self, until: str) -> List[Tuple[str, int, int]]:
+        """Get (due_at, appointment id, user id) of unsent reminders due by ``until``"""
+        pass
+    
+    @abstractmethod
+    def claim_reminder(self, appointment_id: int, due_at: str, now: str) -> Optional[Dict[str, Any]]:
+        """Mark a reminder handled, returning the appointment if this call claimed it"""
+        pass
+    
+    @abstractmethod
+    def release_reminder(self, appointment_id: int, claimed_at: str) -> bool:
+        """Undo a claim whose reminder could not be queued, so it is picked up again"""
+        pass
+    
     @abstractmethod
     def update_appointment(self, appointment: Appointment) -> bool:
         """Update an appointment"""
@@ -143,6 +253,12 @@ class ILifestyleRepository(ABC):
         """Get all exercise records for a user"""
         pass
     
+    @abstractmethod
+    def get_exercise_records_page(self, user_id: int, limit: Optional[int] = None,
+                                  cursor: Optional[str] = None) -> Page:
+        """Get one page of exercise_records rows, latest date first"""
+        pass
+    
     @abstractmethod
     def update_exercise_record(self, record: ExerciseRecord) -> bool:
         """Update an exercise record"""
@@ -164,6 +280,12 @@ class ILifestyleRepository(ABC):
         """Get all diet records for a user"""
         pass
     
+    @abstractmethod
+    def get_daily_calorie_totals(self, user_id: int, start: Optional[str] = None,
+                                 end: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Get (diet_date, total calories) per day, oldest first"""
+        pass
+    
     @abstractmethod
     def update_diet_record(self, record: DietRecord) -> bool:
         """Update a diet record"""
@@ -172,4 +294,48 @@ class ILifestyleRepository(ABC):
     @abstractmethod
     def delete_diet_record(self, record_id: int) -> bool:
         """Delete a diet record"""
-        pass
\ No newline at end of file
+        pass
+
+
+class ISessionStore(ABC):
+    """Interface for server-side session storage"""
+    
+    @abstractmethod
+    def save_session(self, record: SessionRecord) -> bool:
+        """Store a new session"""
+        pass
+    
+    @abstractmethod
+    def get_session(self, sid: str, now: float) -> Optional[SessionRecord]:
+        """Get a session that has not expired by now"""
+        pass
+    
+    @abstractmethod
+    def extend_session(self, sid: str, expires_at: float) -> bool:
+        """Move a session's expiry"""
+        pass
+    
+    @abstractmethod
+    def delete_session(self, sid: str) -> bool:
+        """Delete one session"""
+        pass
+    
+    @abstractmethod
+    def delete_user_sessions(self, user_id: int) -> int:
+        """Delete every session of a user; returns how many"""
+        pass
+    
+    @abstractmethod
+    def delete_all_sessions(self) -> int:
+        """Delete every session; returns how many"""
+        pass
+    
+    @abstractmethod
+    def update_session_profiles(self, user: User) -> int:
+        """Copy a user's current profile into their sessions; returns how many"""
+        pass
+    
+    @abstractmethod
+    def delete_expired_sessions(self, now: float) -> int:
+        """Delete sessions expired by now; returns how many"""
+        pass
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any, List, Tuple
-from models.domain import User, BloodPressureRecord, HeightWeightRecord
+from datetime import date
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+from models.domain import User, BloodPressureRecord, HeightWeightRecord, DashboardSnapshot, CohortReportRow, OutboxMessage
 
 
 class IAuthenticationService(ABC):
@@ -22,6 +23,16 @@ class IAuthenticationService(ABC):
         """Get user by username"""
         pass
     
+    @abstractmethod
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID"""
+        pass
+    
+    @abstractmethod
+    def get_profile_version(self, user_id: int) -> Optional[int]:
+        """Get the user's profile version, or None if the user no longer exists"""
+        pass
+    
     @abstractmethod
     def hash_password(self, password: str) -> str:
         """Hash a password"""
@@ -112,4 +123,144 @@ class INotificationService(ABC):
     @abstractmethod
     def check_health_alerts(self, user_id: int) -> List[str]:
         """Check for health alerts for user"""
-        pass
\ No newline at end of file
+        pass
+
+
+class IDashboardService(ABC):
+    """Interface for dashboard service"""
+    
+    @abstractmethod
+    def get_snapshot(self, user_id: int) -> Optional[DashboardSnapshot]:
+        """Get everything the dashboard shows for a user"""
+        pass
+
+
+class IIngestionService(ABC):
+    """Interface for bulk reading ingestion"""
+    
+    @abstractmethod
+    def parse_payload(self, body: bytes, content_type: Optional[str]) -> List[Any]:
+        """Parse a JSON or NDJSON batch of readings"""
+        pass
+    
+    @abstractmethod
+    def ingest(self, user_id: int, readings: List[Any]) -> Dict[str, Any]:
+        """Validate and store readings, returning per-row results"""
+        pass
+
+
+class IExportService(ABC):
+    """Interface for health history export"""
+    
+    @abstractmethod
+    def stream(self, user_id: int, fmt: str = 'csv', tables: Optional[List[str]] = None,
+               start: Optional[str] = None, end: Optional[str] = None) -> Iterator[str]:
+        """Stream a user's history as CSV or NDJSON text chunks"""
+        pass
+
+
+class IChartDataService(ABC):
+    """Interface for downsampled chart series"""
+    
+    @abstractmethod
+    def get_series(self, user_id: int, series: str, points: Optional[int] = None,
+                   resolution: str = 'raw', method: str = 'lttb',
+                   start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """Get one chart series reduced to at most ``points`` points"""
+        pass
+
+
+class ICohortAnalyticsService(ABC):
+    """Interface for population cohort analytics"""
+    
+    @abstractmethod
+    def run(self, workers: Optional[int] = None, shards: Optional[int] = None,
+            chunk_size: int = 10000, as_of: Optional[str] = None) -> List[CohortReportRow]:
+        """Aggregate every user's latest vitals into a stored cohort report"""
+        pass
+    
+    @abstractmethod
+    def get_latest_report(self, metric: Optional[str] = None) -> List[CohortReportRow]:
+        """Get the rows of the most recent cohort report"""
+        pass
+
+
+class IAlertScanService(ABC):
+    """Interface for the background health alert scan"""
+    
+    @abstractmethod
+    def scan_all(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Evaluate and store alerts for every user"""
+        pass
+    
+    @abstractmethod
+    def get_alerts(self, user_id: int, today: Optional[date] = None) -> List[str]:
+        """Get a user's stored alerts"""
+        pass
+
+
+class INotificationChannel(ABC):
+    """Interface for a notification delivery channel used by the dispatcher"""
+    
+    @abstractmethod
+    def send(self, message: OutboxMessage) -> None:
+        """Deliver one message; raise to report a failure"""
+        pass
+    
+    def send_batch(self, messages: List[OutboxMessage]) -> Dict[int, Optional[str]]:
+        """Deliver messages; returns message id -> error (None when delivered)"""
+        errors = {}
+        for message in messages:
+            try:
+                self.send(message)
+                errors[message.id] = None
+            except Exception as e:
+                errors[message.id] = str(e) or type(e).__name__
+        return errors
+
+
+class ICacheBackend(ABC):
+    """Interface for the key-value store behind the result caches
+    
+    Backends never raise: a backend that cannot be reached behaves as an
+    empty cache. Counters are kept apart from entries so eviction cannot
+    reset them.
+    """
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get a live value, or None on a miss"""
+        pass
+    
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value for ttl seconds"""
+        pass
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop a value"""
+        pass
+    
+    @abstractmethod
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        """Increment a counter and return its new value
+        
+        With a ttl the counter restarts from zero ttl seconds after its
+        first increment.
+        """
+        pass
+    
+    @abstractmethod
+    def counter(self, key: str) -> int:
+        """Get a counter's value (0 if never incremented)"""
+        pass
+    
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop every value (counters stay)"""
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        """Backend-specific size and eviction counters"""
+        return {}
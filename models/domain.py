@@ -1,9 +1,11 @@
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+# Every model is slotted (no per-instance __dict__); the read-only report rows are also frozen
 
-@dataclass
+
+@dataclass(slots=True)
 class User:
     """User domain model"""
     id: Optional[int] = None
@@ -13,9 +15,10 @@ class User:
     gender: Optional[str] = None
     birthday: Optional[str] = None
     created_at: Optional[str] = None
+    profile_version: int = 0  # bumped on every profile or password change
 
 
-@dataclass
+@dataclass(slots=True)
 class BloodPressureRecord:
     """Blood pressure record domain model"""
     id: Optional[int] = None
@@ -28,8 +31,13 @@ class BloodPressureRecord:
     recorded_at: Optional[str] = None
     created_at: Optional[str] = None
 
+    @property
+    def taken_at(self) -> Optional[str]:
+        """When the reading was taken, falling back to when it was stored"""
+        return self.recorded_at or self.created_at
+
 
-@dataclass
+@dataclass(slots=True)
 class HeightWeightRecord:
     """Height and weight record domain model"""
     id: Optional[int] = None
@@ -41,8 +49,13 @@ class HeightWeightRecord:
     recorded_at: Optional[str] = None
     created_at: Optional[str] = None
 
+    @property
+    def taken_at(self) -> Optional[str]:
+        """When the reading was taken, falling back to when it was stored"""
+        return self.recorded_at or self.created_at
 
-@dataclass
+
+@dataclass(slots=True)
 class MedicalRecord:
     """Medical record domain model"""
     id: Optional[int] = None
@@ -56,7 +69,7 @@ class MedicalRecord:
     created_at: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Appointment:
     """Appointment domain model"""
     id: Optional[int] = None
@@ -71,7 +84,7 @@ class Appointment:
     created_at: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ExerciseRecord:
     """Exercise record domain model"""
     id: Optional[int] = None
@@ -85,7 +98,7 @@ class ExerciseRecord:
     created_at: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class DietRecord:
     """Diet record domain model"""
     id: Optional[int] = None
@@ -96,4 +109,89 @@ class DietRecord:
     calories: Optional[int] = None
     notes: Optional[str] = None
     date: str = ""
-    created_at: Optional[str] = None
\ No newline at end of file
+    created_at: Optional[str] = None
+
+
+@dataclass(slots=True)
+class Page:
+    """One page of records with keyset cursors to its neighbours"""
+    items: List[Any] = field(default_factory=list)
+    next_cursor: Optional[str] = None  # older records
+    prev_cursor: Optional[str] = None  # newer records
+    limit: int = 0
+
+
+@dataclass(slots=True, frozen=True)
+class DailyRollup:
+    """Per-user daily aggregates maintained by the rollup triggers"""
+    user_id: int = 0
+    day: str = ""
+    calories_in: Optional[int] = None
+    exercise_count: Optional[int] = None
+    exercise_minutes: Optional[int] = None
+    calories_burned: Optional[int] = None
+    bp_count: Optional[int] = None
+    systolic_min: Optional[int] = None
+    systolic_mean: Optional[float] = None
+    systolic_max: Optional[int] = None
+    diastolic_min: Optional[int] = None
+    diastolic_mean: Optional[float] = None
+    diastolic_max: Optional[int] = None
+    weight: Optional[float] = None
+    weight_recorded_at: Optional[str] = None
+    mood_score: Optional[float] = None
+
+
+@dataclass(slots=True, frozen=True)
+class CohortReportRow:
+    """Users in one category of one (age band, gender) cohort for a report run"""
+    generated_at: str = ""
+    as_of: str = ""
+    metric: str = ""
+    age_band: str = ""
+    gender: str = ""
+    category: str = ""
+    users: int = 0
+    prevalence: Optional[float] = None
+
+
+@dataclass(slots=True)
+class OutboxMessage:
+    """A notification waiting in (or claimed from) the outbox"""
+    id: Optional[int] = None
+    user_id: int = 0
+    channel: str = "log"
+    kind: str = ""
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+    enqueued_at: float = 0.0
+
+
+@dataclass(slots=True)
+class SessionRecord:
+    """A server-side session with the user fields requests need"""
+    sid: str = ""
+    user_id: int = 0
+    username: str = ""
+    gender: Optional[str] = None
+    birthday: Optional[str] = None
+    profile_version: int = 0
+    expires_at: float = 0.0
+
+
+@dataclass(slots=True)
+class DashboardSnapshot:
+    """Everything the dashboard page shows, read in one statement"""
+    user_id: int = 0
+    gender: Optional[str] = None
+    birthday: Optional[str] = None
+    age_str: str = ""
+    age_years: int = 0
+    latest_blood_pressure: Optional[BloodPressureRecord] = None
+    latest_height_weight: Optional[HeightWeightRecord] = None
+    next_appointment: Optional[Dict[str, Any]] = None
+    today_mood: Optional[str] = None
+    bp_evaluation: Dict[str, str] = field(default_factory=dict)
+    bmi_evaluation: Dict[str, str] = field(default_factory=dict)
+    alerts: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # section -> milliseconds
@@ -0,0 +1,105 @@
+"""
+Alert repository: evaluates the health alert rules for a range of users in SQL
+"""
+import sqlite3
+from typing import List, Optional, Tuple
+
+from database.connection_manager import ConnectionManager
+
+
+# Same rules and messages as NotificationService.check_health_alerts. The
+# latest readings are read once per user (index-backed LIMIT 1 subqueries)
+# into a materialized CTE that every rule then filters.
+ALERT_SCAN_SQL = """
+    WITH latest AS MATERIALIZED (
+        SELECT u.id AS user_id, bp.id AS bp_id, bp.date AS bp_date, bp.systolic, bp.diastolic,
+               hw.id AS hw_id, hw.date AS hw_date
+        FROM users u
+        LEFT JOIN blood_pressure bp ON bp.id = (
+            SELECT id FROM blood_pressure WHERE user_id = u.id
+            ORDER BY recorded_at DESC, id DESC LIMIT 1)
+        LEFT JOIN height_weight hw ON hw.id = (
+            SELECT id FROM height_weight WHERE user_id = u.id
+            ORDER BY recorded_at DESC, id DESC LIMIT 1)
+        WHERE u.id BETWEEN :first AND :last
+    )
+    SELECT a.user_id, 1, 'appointment', a.id,
+           CASE a.appointment_date
+               WHEN :today THEN '今天有預約：'
+               WHEN date(:today, '+1 day') THEN '明天有預約：'
+               ELSE '錯過的預約：'
+           END || trim(coalesce(a.hospital, '') || ' ' || coalesce(a.department, ''))
+               || ' (' || a.appointment_date || ')'
+    FROM appointments a
+    WHERE a.user_id BETWEEN :first AND :last
+      AND a.appointment_date BETWEEN date(:today, '-6 days') AND date(:today, '+1 day')
+    UNION ALL
+    SELECT user_id, 2, 'bp_high', 0, '最近血壓偏高，建議諮詢醫師'
+    FROM latest WHERE systolic > 140 OR diastolic > 90
+    UNION ALL
+    SELECT user_id, 2, 'bp_low', 0, '最近血壓偏低，如有不適請諮詢醫師'
+    FROM latest WHERE NOT (systolic > 140 OR diastolic > 90) AND (systolic < 90 OR diastolic < 60)
+    UNION ALL
+    SELECT user_id, 3, 'bp_overdue', 0,
+           CASE WHEN bp_id IS NULL THEN '尚無血壓記錄，建議開始監測血壓'
+                ELSE '已超過30天未測量血壓，建議定期監測' END
+    FROM latest WHERE bp_id IS NULL OR bp_date < date(:today, '-30 days')
+    UNION ALL
+    SELECT user_id, 3, 'hw_overdue', 0,
+           CASE WHEN hw_id IS NULL THEN '尚無體重記錄，建議開始監測體重變化'
+                ELSE '已超過30天未記錄體重，建議定期監測' END
+    FROM latest WHERE hw_id IS NULL OR hw_date < date(:today, '-30 days')
+"""
+
+AlertRow = Tuple[int, int, str, int, str]
+
+
+class AlertRepository:
+    """Set-based alert evaluation and the persisted health_alerts table"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+
+    def evaluate_alerts(self, first_id: int, last_id: int, today: str) -> List[AlertRow]:
+        """Evaluate every rule for users in [first_id, last_id]; rows are (user_id, priority, kind, ref_id, message)"""
+        with self.connection_manager.connection() as conn:
+            return conn.execute(ALERT_SCAN_SQL, {'first': first_id, 'last': last_id, 'today': today}).fetchall()
+
+    def replace_alerts(self, first_id: int, last_id: int, today: str, rows: List[AlertRow]) -> bool:
+        """Replace the stored alerts of users in [first_id, last_id] with ``rows``"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("DELETE FROM health_alerts WHERE user_id BETWEEN ? AND ?", (first_id, last_id))
+                conn.executemany("""
+                    INSERT INTO health_alerts (user_id, priority, kind, ref_id, message, scanned_on)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [row + (today,) for row in rows])
+            return True
+        except Exception as e:
+            print(f"Error saving health alerts: {e}")
+            return False
+
+    def prune_alerts(self, low: int, high: int) -> bool:
+        """Drop alerts of users outside [low, high], i.e. deleted since the last scan"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("DELETE FROM health_alerts WHERE user_id < ? OR user_id > ?", (low, high))
+            return True
+        except Exception as e:
+            print(f"Error pruning health alerts: {e}")
+            return False
+
+    def get_alerts(self, user_id: int, today: str) -> List[str]:
+        """Get a user's alert messages from today's scan, most urgent first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                rows = conn.execute("""
+                    SELECT message FROM health_alerts
+                    WHERE user_id = ? AND scanned_on = ?
+                    ORDER BY priority, kind, ref_id
+                """, (user_id, today)).fetchall()
+            return [row[0] for row in rows]
+        except Exception as e:
+            print(f"Error getting health alerts: {e}")
+            return []
@@ -0,0 +1,35 @@
+"""
+Per-user change notifications from repository writes
+
+Repositories that mix in ChangeNotifier call every registered listener with
+the affected user id once a create/update/delete has committed, so caches of
+results derived from that user's rows can drop them write-through instead of
+waiting for a TTL.
+"""
+from typing import Callable, Iterable, List
+
+
+ChangeListener = Callable[[int], None]
+
+
+class ChangeNotifier:
+    """Mixin: lets caches subscribe to a repository's committed writes"""
+
+    def add_change_listener(self, listener: ChangeListener):
+        """Call ``listener(user_id)`` after every committed write touching that user"""
+        if '_change_listeners' not in self.__dict__:
+            self._change_listeners: List[ChangeListener] = []
+        self._change_listeners.append(listener)
+
+    def _notify_change(self, user_ids: Iterable[int]):
+        listeners = self.__dict__.get('_change_listeners')
+        if not listeners:
+            return
+        for user_id in set(user_ids):
+            if user_id is None:
+                continue
+            for listener in listeners:
+                try:
+                    listener(user_id)
+                except Exception as e:
+                    print(f"Error notifying change listener: {e}")
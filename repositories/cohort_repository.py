@@ -0,0 +1,102 @@
+"""
+Cohort repository: streams every user's latest vitals and stores cohort reports
+"""
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from database.connection_manager import ConnectionManager
+from models.domain import CohortReportRow
+from repositories.row_mapping import map_rows, select_columns
+
+
+REPORT_COLUMNS = select_columns(CohortReportRow)
+
+
+# Age is computed as calculate_age does, relative to :as_of; latest readings
+# use the same index-backed LIMIT 1 subqueries as the dashboard.
+LATEST_VITALS_SQL = """
+    SELECT u.id, u.gender,
+           CASE WHEN u.birthday GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+                THEN CAST(strftime('%Y', :as_of) AS INTEGER) - CAST(substr(u.birthday, 1, 4) AS INTEGER)
+                     - (strftime('%m-%d', :as_of) < substr(u.birthday, 6, 5))
+           END AS age,
+           bp.systolic, bp.diastolic, hw.height, hw.weight
+    FROM users u
+    LEFT JOIN blood_pressure bp ON bp.id = (
+        SELECT id FROM blood_pressure WHERE user_id = u.id
+        ORDER BY recorded_at DESC, id DESC LIMIT 1)
+    LEFT JOIN height_weight hw ON hw.id = (
+        SELECT id FROM height_weight WHERE user_id = u.id
+        ORDER BY recorded_at DESC, id DESC LIMIT 1)
+    WHERE u.id > :after AND u.id <= :last
+    ORDER BY u.id
+    LIMIT :limit
+"""
+
+VitalsRow = Tuple[int, Optional[str], Optional[int], Optional[int], Optional[int],
+                  Optional[float], Optional[float]]
+
+
+class CohortRepository:
+    """Population-wide reads for the cohort analytics run and its report table"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+
+    def get_user_id_range(self) -> Tuple[int, int]:
+        """Get the (lowest, highest) user id; (0, 0) when there are no users"""
+        with self.connection_manager.connection() as conn:
+            low, high = conn.execute("SELECT (SELECT MIN(id) FROM users), (SELECT MAX(id) FROM users)").fetchone()
+        return (low or 0, high or 0)
+
+    def iter_latest_vitals(self, first_id: int, last_id: int, as_of: str,
+                           chunk_size: int = 10000) -> Iterator[List[VitalsRow]]:
+        """Yield chunks of (id, gender, age, systolic, diastolic, height, weight) for ids in [first_id, last_id]
+
+        Each chunk is its own short query keyed on the last id seen, so a long
+        run never pins a read snapshot and the WAL can keep checkpointing.
+        """
+        after = first_id - 1
+        while True:
+            with self.connection_manager.connection() as conn:
+                rows = conn.execute(LATEST_VITALS_SQL, {
+                    'as_of': as_of, 'after': after, 'last': last_id, 'limit': chunk_size
+                }).fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            after = rows[-1][0]
+
+    def save_report(self, rows: Sequence[CohortReportRow]) -> bool:
+        """Store the rows of one report run"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO cohort_report
+                        (generated_at, as_of, metric, age_band, gender, category, users, prevalence)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(r.generated_at, r.as_of, r.metric, r.age_band, r.gender, r.category,
+                       r.users, r.prevalence) for r in rows])
+            return True
+        except Exception as e:
+            print(f"Error saving cohort report: {e}")
+            return False
+
+    def get_latest_report(self, metric: Optional[str] = None) -> List[CohortReportRow]:
+        """Get the rows of the most recent report run, optionally for one metric"""
+        try:
+            sql = f"SELECT {REPORT_COLUMNS} FROM cohort_report WHERE generated_at = (SELECT MAX(generated_at) FROM cohort_report)"
+            params: list = []
+            if metric:
+                sql += " AND metric = ?"
+                params.append(metric)
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(sql + " ORDER BY metric, age_band, gender, category", params)
+                rows = c.fetchall()
+            return map_rows(CohortReportRow, rows)
+        except Exception as e:
+            print(f"Error getting cohort report: {e}")
+            return []
@@ -0,0 +1,97 @@
+"""
+Dashboard repository: reads the dashboard's data in a single statement
+"""
+import sqlite3
+from typing import Any, Dict, Optional
+
+from database.connection_manager import ConnectionManager
+from models.domain import BloodPressureRecord, HeightWeightRecord
+
+
+# Each section is a LEFT JOIN on the id picked by an index-backed LIMIT 1
+# subquery, so the dashboard costs one round-trip and one consistent read.
+DASHBOARD_SQL = """
+    SELECT u.id, u.gender, u.birthday,
+           bp.id AS bp_id, bp.systolic AS bp_systolic, bp.diastolic AS bp_diastolic,
+           bp.pulse AS bp_pulse, bp.notes AS bp_notes, bp.date AS bp_date,
+           bp.recorded_at AS bp_recorded_at, bp.created_at AS bp_created_at,
+           hw.id AS hw_id, hw.height AS hw_height, hw.weight AS hw_weight,
+           hw.notes AS hw_notes, hw.date AS hw_date,
+           hw.recorded_at AS hw_recorded_at, hw.created_at AS hw_created_at,
+           a.appointment_date, a.hospital, a.department, a.reason,
+           m.mood,
+           (SELECT group_concat(message, char(10)) FROM (
+                SELECT message FROM health_alerts WHERE user_id = u.id AND scanned_on = ?
+                ORDER BY priority, kind, ref_id)) AS alerts
+    FROM users u
+    LEFT JOIN blood_pressure bp ON bp.id = (
+        SELECT id FROM blood_pressure WHERE user_id = u.id
+        ORDER BY recorded_at DESC, id DESC LIMIT 1)
+    LEFT JOIN height_weight hw ON hw.id = (
+        SELECT id FROM height_weight WHERE user_id = u.id
+        ORDER BY recorded_at DESC, id DESC LIMIT 1)
+    LEFT JOIN appointments a ON a.id = (
+        SELECT id FROM appointments WHERE user_id = u.id AND appointment_date >= ?
+        ORDER BY appointment_date ASC, id ASC LIMIT 1)
+    LEFT JOIN mood_records m ON m.id = (
+        SELECT id FROM mood_records WHERE user_id = u.id AND mood_date = ?
+        ORDER BY mood_date DESC, id DESC LIMIT 1)
+    WHERE u.id = ?
+"""
+
+
+class DashboardRepository:
+    """Read-only access to the dashboard aggregate"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+
+    def get_dashboard_data(self, user_id: int, today: str) -> Optional[Dict[str, Any]]:
+        """Get profile, latest vitals, next appointment, today's mood and stored alerts for a user"""
+        try:
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute(DASHBOARD_SQL, (today, today, today, user_id))
+                row = c.fetchone()
+        except Exception as e:
+            print(f"Error getting dashboard data: {e}")
+            return None
+        if not row:
+            return None
+
+        blood_pressure = None
+        if row['bp_id'] is not None:
+            blood_pressure = BloodPressureRecord(
+                id=row['bp_id'], user_id=user_id,
+                systolic=row['bp_systolic'], diastolic=row['bp_diastolic'],
+                pulse=row['bp_pulse'], notes=row['bp_notes'], date=row['bp_date'],
+                recorded_at=row['bp_recorded_at'], created_at=row['bp_created_at']
+            )
+        height_weight = None
+        if row['hw_id'] is not None:
+            height_weight = HeightWeightRecord(
+                id=row['hw_id'], user_id=user_id,
+                height=row['hw_height'], weight=row['hw_weight'],
+                notes=row['hw_notes'], date=row['hw_date'],
+                recorded_at=row['hw_recorded_at'], created_at=row['hw_created_at']
+            )
+        appointment = None
+        if row['appointment_date'] is not None:
+            appointment = {
+                'date': row['appointment_date'],
+                'hospital': row['hospital'],
+                'department': row['department'],
+                'reason': row['reason']
+            }
+        return {
+            'gender': row['gender'],
+            'birthday': row['birthday'],
+            'blood_pressure': blood_pressure,
+            'height_weight': height_weight,
+            'appointment': appointment,
+            'mood': row['mood'],
+            # Written by the background alert scan
+            'alerts': row['alerts'].split('\n') if row['alerts'] else []
+        }
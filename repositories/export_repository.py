@@ -0,0 +1,92 @@
+"""
+Export repository: streams a user's history table by table with fetchmany
+"""
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from database.connection_manager import ConnectionManager
+
+
+EXPORT_BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    """An exportable table, its date column and index-friendly sort order"""
+    name: str
+    date_column: str
+    columns: Tuple[str, ...]
+    order_by: Tuple[str, ...]
+
+
+EXPORT_TABLES = [
+    ExportTable('blood_pressure', 'recorded_at',
+                ('id', 'systolic', 'diastolic', 'pulse', 'notes', 'date', 'recorded_at', 'created_at'),
+                ('recorded_at', 'id')),
+    ExportTable('height_weight', 'recorded_at',
+                ('id', 'height', 'weight', 'notes', 'date', 'recorded_at', 'created_at'),
+                ('recorded_at', 'id')),
+    ExportTable('medical_records', 'visit_date',
+                ('id', 'visit_date', 'hospital', 'department', 'doctor', 'diagnosis', 'notes', 'created_at'),
+                ('visit_date', 'id')),
+    ExportTable('appointments', 'appointment_date',
+                ('id', 'appointment_date', 'hospital', 'department', 'doctor', 'reason', 'created_at'),
+                ('appointment_date', 'id')),
+    ExportTable('exercise_records', 'exercise_date',
+                ('id', 'exercise_date', 'exercise_type', 'duration', 'calories', 'notes', 'created_at'),
+                ('exercise_date', 'id')),
+    ExportTable('diet_records', 'diet_date',
+                ('id', 'diet_date', 'meal_type', 'description', 'calories', 'created_at'),
+                ('diet_date', 'created_at', 'id')),
+    ExportTable('mood_records', 'mood_date',
+                ('id', 'mood', 'mood_date', 'created_at'),
+                ('mood_date', 'id')),
+]
+EXPORT_TABLES_BY_NAME = {table.name: table for table in EXPORT_TABLES}
+
+
+class ExportRepository:
+    """Read-only, batch-at-a-time access to a user's full history"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None,
+                 batch_size: int = EXPORT_BATCH_SIZE):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+        self.batch_size = batch_size
+
+    def iter_history(self, user_id: int, tables: List[ExportTable], start: Optional[str] = None,
+                     end: Optional[str] = None) -> Iterator[Tuple[ExportTable, List[tuple]]]:
+        """Yield (table, batch of rows) oldest first; start/end are inclusive 'YYYY-MM-DD' dates
+
+        All tables are read inside one read transaction, so the export is a
+        consistent snapshot. At most ``batch_size`` rows are held at a time.
+        """
+        with self.connection_manager.connection() as conn:
+            own_transaction = not conn.in_transaction
+            if own_transaction:
+                conn.execute("BEGIN")
+            try:
+                for table in tables:
+                    where, params = ["user_id = ?"], [user_id]
+                    if start:
+                        where.append(f"{table.date_column} >= ?")
+                        params.append(start)
+                    if end:
+                        # Date-time columns sort after their bare date, so bound by the next day
+                        where.append(f"{table.date_column} < date(?, '+1 day')")
+                        params.append(end)
+                    c = conn.cursor()
+                    c.execute(
+                        f"SELECT {', '.join(table.columns)} FROM {table.name} "
+                        f"WHERE {' AND '.join(where)} ORDER BY {', '.join(table.order_by)}",
+                        params
+                    )
+                    while True:
+                        rows = c.fetchmany(self.batch_size)
+                        if not rows:
+                            break
+                        yield table, rows
+                    c.close()
+            finally:
+                if own_transaction:
+                    conn.rollback()
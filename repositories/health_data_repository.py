@@ -1,76 +1,164 @@
-import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
+from database.connection_manager import ConnectionManager
 from interfaces.repositories import IHealthDataRepository
-from models.domain import BloodPressureRecord, HeightWeightRecord
+from models.domain import BloodPressureRecord, HeightWeightRecord, Page
+from repositories.change_listeners import ChangeNotifier
+from repositories.pagination import fetch_page
+from repositories.row_mapping import map_rows, select_columns
 
 
-class HealthDataRepository(IHealthDataRepository):
+BP_COLUMNS = select_columns(BloodPressureRecord)
+HW_COLUMNS = select_columns(HeightWeightRecord)
+
+# Both histories in one statement as (kind, epoch seconds, a, b, c):
+# kind 0 is (systolic, diastolic, pulse), kind 1 is (height, weight, NULL)
+VITALS_SQL = """
+    SELECT 0, CAST(strftime('%s', COALESCE(recorded_at, created_at)) AS INTEGER), systolic, diastolic, pulse
+    FROM blood_pressure WHERE user_id = :user_id AND COALESCE(recorded_at, created_at) IS NOT NULL
+    UNION ALL
+    SELECT 1, CAST(strftime('%s', COALESCE(recorded_at, created_at)) AS INTEGER), height, weight, NULL
+    FROM height_weight WHERE user_id = :user_id AND COALESCE(recorded_at, created_at) IS NOT NULL
+"""
+
+
+class HealthDataRepository(ChangeNotifier, IHealthDataRepository):
     """SQLite implementation of health data repository"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
         self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+    
+    def _bulk_insert(self, table: str, columns: List[str], rows: List[tuple]) -> List[bool]:
+        """Insert rows in one transaction, skipping (user_id, recorded_at) duplicates
+        
+        Each row starts with user_id and ends with recorded_at. Returns one flag
+        per row: True if inserted, False if it duplicated a stored or earlier row.
+        """
+        with self.connection_manager.transaction() as conn:
+            if not conn.in_transaction:
+                # Hold the write lock across the duplicate check and the insert
+                conn.execute("BEGIN IMMEDIATE")
+            c = conn.cursor()
+            seen = set()
+            for user_id in {row[0] for row in rows}:
+                stamps = [row[-1] for row in rows if row[0] == user_id]
+                c.execute(f"""
+                    SELECT recorded_at FROM {table}
+                    WHERE user_id = ? AND recorded_at BETWEEN ? AND ?
+                """, (user_id, min(stamps), max(stamps)))
+                seen.update((user_id, stamp) for (stamp,) in c.fetchall())
+            
+            inserted, new_rows = [], []
+            for row in rows:
+                key = (row[0], row[-1])
+                inserted.append(key not in seen)
+                if key not in seen:
+                    seen.add(key)
+                    new_rows.append(row)
+            c.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                new_rows
+            )
+        return inserted
     
     # Blood Pressure Methods
     def create_blood_pressure_record(self, record: BloodPressureRecord) -> bool:
         """Create a new blood pressure record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO blood_pressure (user_id, systolic, diastolic, pulse, notes, date, recorded_at, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (record.user_id, record.systolic, record.diastolic, record.pulse,
-                  record.notes, record.date, record.recorded_at, record.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO blood_pressure (user_id, systolic, diastolic, pulse, notes, date, recorded_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, (record.user_id, record.systolic, record.diastolic, record.pulse,
+                      record.notes, record.date, record.recorded_at, record.created_at))
+            self._notify_change([record.user_id])
             return True
         except Exception as e:
             print(f"Error creating blood pressure record: {e}")
             return False
     
+    def bulk_create_blood_pressure_records(self, records: List[BloodPressureRecord]) -> List[bool]:
+        """Insert a batch of blood pressure records, skipping duplicate readings"""
+        try:
+            inserted = self._bulk_insert(
+                'blood_pressure',
+                ['user_id', 'systolic', 'diastolic', 'pulse', 'notes', 'date', 'recorded_at'],
+                [(r.user_id, r.systolic, r.diastolic, r.pulse, r.notes, r.date, r.recorded_at)
+                 for r in records]
+            )
+            self._notify_change(r.user_id for r, ok in zip(records, inserted) if ok)
+            return inserted
+        except Exception as e:
+            print(f"Error bulk creating blood pressure records: {e}")
+            return []
+    
     def get_blood_pressure_records_by_user(self, user_id: int) -> List[BloodPressureRecord]:
         """Get all blood pressure records for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("""
-                SELECT * FROM blood_pressure 
-                WHERE user_id = ? 
-                ORDER BY recorded_at DESC
-            """, (user_id,))
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(f"""
+                    SELECT {BP_COLUMNS} FROM blood_pressure 
+                    WHERE user_id = ? 
+                    ORDER BY recorded_at DESC
+                """, (user_id,))
+                rows = c.fetchall()
             
-            return [BloodPressureRecord(
-                id=row['id'],
-                user_id=row['user_id'],
-                systolic=row['systolic'],
-                diastolic=row['diastolic'],
-                pulse=row['pulse'],
-                notes=row['notes'],
-                date=row['date'],
-                recorded_at=row['recorded_at'],
-                created_at=row['created_at']
-            ) for row in rows]
+            return map_rows(BloodPressureRecord, rows)
         except Exception as e:
             print(f"Error getting blood pressure records: {e}")
             return []
     
+    def get_blood_pressure_records_page(self, user_id: int, limit: Optional[int] = None,
+                                        cursor: Optional[str] = None) -> Page:
+        """Get one page of blood pressure records, newest first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                return fetch_page(conn, f"SELECT {BP_COLUMNS} FROM blood_pressure", "user_id = ?", (user_id,),
+                                  'recorded_at', lambda row: BloodPressureRecord(*row), limit, cursor)
+        except Exception as e:
+            print(f"Error getting blood pressure records page: {e}")
+            return Page()
+    
+    def get_latest_blood_pressure_record(self, user_id: int) -> Optional[BloodPressureRecord]:
+        """Get the most recent blood pressure record for a user"""
+        records = self.get_latest_n_blood_pressure_records(user_id, 1)
+        return records[0] if records else None
+    
+    def get_latest_n_blood_pressure_records(self, user_id: int, n: int) -> List[BloodPressureRecord]:
+        """Get the n most recent blood pressure records, newest first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(f"""
+                    SELECT {BP_COLUMNS} FROM blood_pressure 
+                    WHERE user_id = ? 
+                    ORDER BY recorded_at DESC, id DESC 
+                    LIMIT ?
+                """, (user_id, n))
+                rows = c.fetchall()
+            
+            return map_rows(BloodPressureRecord, rows)
+        except Exception as e:
+            print(f"Error getting latest blood pressure records: {e}")
+            return []
+    
     def update_blood_pressure_record(self, record: BloodPressureRecord) -> bool:
         """Update a blood pressure record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE blood_pressure 
-                SET systolic = ?, diastolic = ?, pulse = ?, notes = ?, date = ?
-                WHERE id = ?
-            """, (record.systolic, record.diastolic, record.pulse, record.notes, 
-                  record.date, record.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE blood_pressure 
+                    SET systolic = ?, diastolic = ?, pulse = ?, notes = ?, date = ?
+                    WHERE id = ?
+                    RETURNING user_id
+                """, (record.systolic, record.diastolic, record.pulse, record.notes, 
+                      record.date, record.id))
+                changed = [user_id for (user_id,) in c.fetchall()]
+            self._notify_change(changed)
             return True
         except Exception as e:
             print(f"Error updating blood pressure record: {e}")
@@ -79,11 +167,11 @@ class HealthDataRepository(IHealthDataRepository):
     def delete_blood_pressure_record(self, record_id: int) -> bool:
         """Delete a blood pressure record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM blood_pressure WHERE id = ?", (record_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM blood_pressure WHERE id = ? RETURNING user_id", (record_id,))
+                changed = [user_id for (user_id,) in c.fetchall()]
+            self._notify_change(changed)
             return True
         except Exception as e:
             print(f"Error deleting blood pressure record: {e}")
@@ -93,60 +181,147 @@ class HealthDataRepository(IHealthDataRepository):
     def create_height_weight_record(self, record: HeightWeightRecord) -> bool:
         """Create a new height/weight record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO height_weight (user_id, height, weight, notes, date, recorded_at, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (record.user_id, record.height, record.weight, record.notes,
-                  record.date, record.recorded_at, record.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO height_weight (user_id, height, weight, notes, date, recorded_at, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, (record.user_id, record.height, record.weight, record.notes,
+                      record.date, record.recorded_at, record.created_at))
+            self._notify_change([record.user_id])
             return True
         except Exception as e:
             print(f"Error creating height/weight record: {e}")
             return False
     
+    def bulk_create_height_weight_records(self, records: List[HeightWeightRecord]) -> List[bool]:
+        """Insert a batch of height/weight records, skipping duplicate readings"""
+        try:
+            inserted = self._bulk_insert(
+                'height_weight',
+                ['user_id', 'height', 'weight', 'notes', 'date', 'recorded_at'],
+                [(r.user_id, r.height, r.weight, r.notes, r.date, r.recorded_at) for r in records]
+            )
+            self._notify_change(r.user_id for r, ok in zip(records, inserted) if ok)
+            return inserted
+        except Exception as e:
+            print(f"Error bulk creating height/weight records: {e}")
+            return []
+    
     def get_height_weight_records_by_user(self, user_id: int) -> List[HeightWeightRecord]:
         """Get all height/weight records for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("""
-                SELECT * FROM height_weight 
-                WHERE user_id = ? 
-                ORDER BY recorded_at DESC
-            """, (user_id,))
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(f"""
+                    SELECT {HW_COLUMNS} FROM height_weight 
+                    WHERE user_id = ? 
+                    ORDER BY recorded_at DESC
+                """, (user_id,))
+                rows = c.fetchall()
             
-            return [HeightWeightRecord(
-                id=row['id'],
-                user_id=row['user_id'],
-                height=row['height'],
-                weight=row['weight'],
-                notes=row['notes'],
-                date=row['date'],
-                recorded_at=row['recorded_at'],
-                created_at=row['created_at']
-            ) for row in rows]
+            return map_rows(HeightWeightRecord, rows)
         except Exception as e:
             print(f"Error getting height/weight records: {e}")
             return []
     
+    def get_height_weight_records_page(self, user_id: int, limit: Optional[int] = None,
+                                       cursor: Optional[str] = None) -> Page:
+        """Get one page of height/weight records, newest first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                return fetch_page(conn, f"SELECT {HW_COLUMNS} FROM height_weight", "user_id = ?", (user_id,),
+                                  'recorded_at', lambda row: HeightWeightRecord(*row), limit, cursor)
+        except Exception as e:
+            print(f"Error getting height/weight records page: {e}")
+            return Page()
+    
+    def get_latest_height_weight_record(self, user_id: int) -> Optional[HeightWeightRecord]:
+        """Get the most recent height/weight record for a user"""
+        records = self.get_latest_n_height_weight_records(user_id, 1)
+        return records[0] if records else None
+    
+    def get_latest_n_height_weight_records(self, user_id: int, n: int) -> List[HeightWeightRecord]:
+        """Get the n most recent height/weight records, newest first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(f"""
+                    SELECT {HW_COLUMNS} FROM height_weight 
+                    WHERE user_id = ? 
+                    ORDER BY recorded_at DESC, id DESC 
+                    LIMIT ?
+                """, (user_id, n))
+                rows = c.fetchall()
+            
+            return map_rows(HeightWeightRecord, rows)
+        except Exception as e:
+            print(f"Error getting latest height/weight records: {e}")
+            return []
+    
+    def get_height_weight_series(self, user_id: int, start: Optional[str] = None,
+                                 end: Optional[str] = None) -> List[Tuple[str, float, float]]:
+        """Get (recorded_at, height, weight) points oldest first; start/end are inclusive dates"""
+        try:
+            where, params = ["user_id = ?"], [user_id]
+            if start:
+                where.append("recorded_at >= ?")
+                params.append(start)
+            if end:
+                where.append("recorded_at < date(?, '+1 day')")
+                params.append(end)
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(f"""
+                    SELECT recorded_at, height, weight FROM height_weight
+                    WHERE {' AND '.join(where)}
+                    ORDER BY recorded_at, id
+                """, params)
+                return c.fetchall()
+        except Exception as e:
+            print(f"Error getting height/weight series: {e}")
+            return []
+    
+    def get_vitals_version(self, user_id: int) -> int:
+        """Get the user's vitals version, bumped by triggers on every reading change"""
+        try:
+            with self.connection_manager.connection() as conn:
+                row = conn.execute("SELECT version FROM vitals_versions WHERE user_id = ?",
+                                   (user_id,)).fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            print(f"Error getting vitals version: {e}")
+            return -1
+    
+    def get_vitals_rows(self, user_id: int) -> Tuple[int, List[tuple]]:
+        """Get (vitals version, every blood pressure and height/weight reading) in one fetch
+        
+        Rows are unordered (kind, epoch seconds, a, b, c) tuples as laid out in VITALS_SQL.
+        """
+        try:
+            with self.connection_manager.connection() as conn:
+                # Version first: a write landing in between leaves it stale, never ahead
+                row = conn.execute("SELECT version FROM vitals_versions WHERE user_id = ?",
+                                   (user_id,)).fetchone()
+                rows = conn.execute(VITALS_SQL, {'user_id': user_id}).fetchall()
+            return (row[0] if row else 0), rows
+        except Exception as e:
+            print(f"Error getting vitals rows: {e}")
+            return -1, []
+    
     def update_height_weight_record(self, record: HeightWeightRecord) -> bool:
         """Update a height/weight record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE height_weight 
-                SET height = ?, weight = ?, notes = ?, date = ?
-                WHERE id = ?
-            """, (record.height, record.weight, record.notes, record.date, record.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE height_weight 
+                    SET height = ?, weight = ?, notes = ?, date = ?
+                    WHERE id = ?
+                    RETURNING user_id
+                """, (record.height, record.weight, record.notes, record.date, record.id))
+                changed = [user_id for (user_id,) in c.fetchall()]
+            self._notify_change(changed)
             return True
         except Exception as e:
             print(f"Error updating height/weight record: {e}")
@@ -155,11 +330,11 @@ class HealthDataRepository(IHealthDataRepository):
     def delete_height_weight_record(self, record_id: int) -> bool:
         """Delete a height/weight record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM height_weight WHERE id = ?", (record_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM height_weight WHERE id = ? RETURNING user_id", (record_id,))
+                changed = [user_id for (user_id,) in c.fetchall()]
+            self._notify_change(changed)
             return True
         except Exception as e:
             print(f"Error deleting height/weight record: {e}")
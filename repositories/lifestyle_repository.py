@@ -1,28 +1,29 @@
 import sqlite3
-from typing import List, Optional
+from typing import List, Optional, Tuple
+from database.connection_manager import ConnectionManager
 from interfaces.repositories import ILifestyleRepository
-from models.domain import ExerciseRecord, DietRecord
+from models.domain import ExerciseRecord, DietRecord, Page
+from repositories.pagination import fetch_page
 
 
 class LifestyleRepository(ILifestyleRepository):
     """SQLite implementation of lifestyle repository"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
         self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
     
     # Exercise Record Methods
     def create_exercise_record(self, record: ExerciseRecord) -> bool:
         """Create a new exercise record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO exercise (user_id, exercise_type, duration, intensity, calories_burned, notes, date, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (record.user_id, record.exercise_type, record.duration, record.intensity,
-                  record.calories_burned, record.notes, record.date, record.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO exercise (user_id, exercise_type, duration, intensity, calories_burned, notes, date, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (record.user_id, record.exercise_type, record.duration, record.intensity,
+                      record.calories_burned, record.notes, record.date, record.created_at))
             return True
         except Exception as e:
             print(f"Error creating exercise record: {e}")
@@ -31,16 +32,15 @@ class LifestyleRepository(ILifestyleRepository):
     def get_exercise_records_by_user(self, user_id: int) -> List[ExerciseRecord]:
         """Get all exercise records for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("""
-                SELECT * FROM exercise 
-                WHERE user_id = ? 
-                ORDER BY date DESC
-            """, (user_id,))
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("""
+                    SELECT * FROM exercise 
+                    WHERE user_id = ? 
+                    ORDER BY date DESC
+                """, (user_id,))
+                rows = c.fetchall()
             
             return [ExerciseRecord(
                 id=row['id'],
@@ -57,19 +57,29 @@ class LifestyleRepository(ILifestyleRepository):
             print(f"Error getting exercise records: {e}")
             return []
     
+    def get_exercise_records_page(self, user_id: int, limit: Optional[int] = None,
+                                  cursor: Optional[str] = None) -> Page:
+        """Get one page of (id, exercise_date, exercise_type, duration, calories, notes) rows"""
+        try:
+            with self.connection_manager.connection() as conn:
+                return fetch_page(conn,
+                                  "SELECT id, exercise_date, exercise_type, duration, calories, notes FROM exercise_records",
+                                  "user_id = ?", (user_id,), 'exercise_date', tuple, limit, cursor)
+        except Exception as e:
+            print(f"Error getting exercise records page: {e}")
+            return Page()
+    
     def update_exercise_record(self, record: ExerciseRecord) -> bool:
         """Update an exercise record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE exercise 
-                SET exercise_type = ?, duration = ?, intensity = ?, calories_burned = ?, notes = ?, date = ?
-                WHERE id = ?
-            """, (record.exercise_type, record.duration, record.intensity, record.calories_burned,
-                  record.notes, record.date, record.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE exercise 
+                    SET exercise_type = ?, duration = ?, intensity = ?, calories_burned = ?, notes = ?, date = ?
+                    WHERE id = ?
+                """, (record.exercise_type, record.duration, record.intensity, record.calories_burned,
+                      record.notes, record.date, record.id))
             return True
         except Exception as e:
             print(f"Error updating exercise record: {e}")
@@ -78,11 +88,9 @@ class LifestyleRepository(ILifestyleRepository):
     def delete_exercise_record(self, record_id: int) -> bool:
         """Delete an exercise record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM exercise WHERE id = ?", (record_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM exercise WHERE id = ?", (record_id,))
             return True
         except Exception as e:
             print(f"Error deleting exercise record: {e}")
@@ -92,15 +100,13 @@ class LifestyleRepository(ILifestyleRepository):
     def create_diet_record(self, record: DietRecord) -> bool:
         """Create a new diet record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO diet (user_id, food_name, meal_type, portion_size, calories, notes, date, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (record.user_id, record.food_name, record.meal_type, record.portion_size,
-                  record.calories, record.notes, record.date, record.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO diet (user_id, food_name, meal_type, portion_size, calories, notes, date, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (record.user_id, record.food_name, record.meal_type, record.portion_size,
+                      record.calories, record.notes, record.date, record.created_at))
             return True
         except Exception as e:
             print(f"Error creating diet record: {e}")
@@ -109,16 +115,15 @@ class LifestyleRepository(ILifestyleRepository):
     def get_diet_records_by_user(self, user_id: int) -> List[DietRecord]:
         """Get all diet records for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("""
-                SELECT * FROM diet 
-                WHERE user_id = ? 
-                ORDER BY date DESC
-            """, (user_id,))
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("""
+                    SELECT * FROM diet 
+                    WHERE user_id = ? 
+                    ORDER BY date DESC
+                """, (user_id,))
+                rows = c.fetchall()
             
             return [DietRecord(
                 id=row['id'],
@@ -135,19 +140,41 @@ class LifestyleRepository(ILifestyleRepository):
             print(f"Error getting diet records: {e}")
             return []
     
+    def get_daily_calorie_totals(self, user_id: int, start: Optional[str] = None,
+                                 end: Optional[str] = None) -> List[Tuple[str, int]]:
+        """Get (diet_date, total calories) per day, oldest first; start/end are inclusive"""
+        try:
+            where, params = ["user_id = ?"], [user_id]
+            if start:
+                where.append("day >= ?")
+                params.append(start)
+            if end:
+                where.append("day <= ?")
+                params.append(end)
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                # Served from the trigger-maintained rollups: one row per day
+                c.execute(f"""
+                    SELECT day, calories_in FROM daily_rollups
+                    WHERE {' AND '.join(where)} AND calories_in IS NOT NULL
+                    ORDER BY day
+                """, params)
+                return c.fetchall()
+        except Exception as e:
+            print(f"Error getting daily calorie totals: {e}")
+            return []
+    
     def update_diet_record(self, record: DietRecord) -> bool:
         """Update a diet record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE diet 
-                SET food_name = ?, meal_type = ?, portion_size = ?, calories = ?, notes = ?, date = ?
-                WHERE id = ?
-            """, (record.food_name, record.meal_type, record.portion_size, record.calories,
-                  record.notes, record.date, record.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE diet 
+                    SET food_name = ?, meal_type = ?, portion_size = ?, calories = ?, notes = ?, date = ?
+                    WHERE id = ?
+                """, (record.food_name, record.meal_type, record.portion_size, record.calories,
+                      record.notes, record.date, record.id))
             return True
         except Exception as e:
             print(f"Error updating diet record: {e}")
@@ -156,11 +183,9 @@ class LifestyleRepository(ILifestyleRepository):
     def delete_diet_record(self, record_id: int) -> bool:
         """Delete a diet record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM diet WHERE id = ?", (record_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM diet WHERE id = ?", (record_id,))
             return True
         except Exception as e:
             print(f"Error deleting diet record: {e}")
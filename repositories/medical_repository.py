@@ -1,28 +1,29 @@
 import sqlite3
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+from database.connection_manager import ConnectionManager
 from interfaces.repositories import IMedicalRepository
-from models.domain import MedicalRecord, Appointment
+from models.domain import MedicalRecord, Appointment, Page
+from repositories.pagination import fetch_page
 
 
 class MedicalRepository(IMedicalRepository):
     """SQLite implementation of medical repository"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
         self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
     
     # Medical Record Methods
     def create_medical_record(self, record: MedicalRecord) -> bool:
         """Create a new medical record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO medical_records (user_id, record_type, description, doctor, hospital, date, notes, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (record.user_id, record.record_type, record.description, record.doctor,
-                  record.hospital, record.date, record.notes, record.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO medical_records (user_id, record_type, description, doctor, hospital, date, notes, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """, (record.user_id, record.record_type, record.description, record.doctor,
+                      record.hospital, record.date, record.notes, record.created_at))
             return True
         except Exception as e:
             print(f"Error creating medical record: {e}")
@@ -31,16 +32,15 @@ class MedicalRepository(IMedicalRepository):
     def get_medical_records_by_user(self, user_id: int) -> List[MedicalRecord]:
         """Get all medical records for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("""
-                SELECT * FROM medical_records 
-                WHERE user_id = ? 
-                ORDER BY date DESC
-            """, (user_id,))
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("""
+                    SELECT * FROM medical_records 
+                    WHERE user_id = ? 
+                    ORDER BY date DESC
+                """, (user_id,))
+                rows = c.fetchall()
             
             return [MedicalRecord(
                 id=row['id'],
@@ -57,19 +57,29 @@ class MedicalRepository(IMedicalRepository):
             print(f"Error getting medical records: {e}")
             return []
     
+    def get_medical_records_page(self, user_id: int, limit: Optional[int] = None,
+                                 cursor: Optional[str] = None) -> Page:
+        """Get one page of (id, visit_date, hospital, department, diagnosis, notes) rows"""
+        try:
+            with self.connection_manager.connection() as conn:
+                return fetch_page(conn,
+                                  "SELECT id, visit_date, hospital, department, diagnosis, notes FROM medical_records",
+                                  "user_id = ?", (user_id,), 'visit_date', tuple, limit, cursor)
+        except Exception as e:
+            print(f"Error getting medical records page: {e}")
+            return Page()
+    
     def update_medical_record(self, record: MedicalRecord) -> bool:
         """Update a medical record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE medical_records 
-                SET record_type = ?, description = ?, doctor = ?, hospital = ?, date = ?, notes = ?
-                WHERE id = ?
-            """, (record.record_type, record.description, record.doctor, record.hospital,
-                  record.date, record.notes, record.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE medical_records 
+                    SET record_type = ?, description = ?, doctor = ?, hospital = ?, date = ?, notes = ?
+                    WHERE id = ?
+                """, (record.record_type, record.description, record.doctor, record.hospital,
+                      record.date, record.notes, record.id))
             return True
         except Exception as e:
             print(f"Error updating medical record: {e}")
@@ -78,11 +88,9 @@ class MedicalRepository(IMedicalRepository):
     def delete_medical_record(self, record_id: int) -> bool:
         """Delete a medical record"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM medical_records WHERE id = ?", (record_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM medical_records WHERE id = ?", (record_id,))
             return True
         except Exception as e:
             print(f"Error deleting medical record: {e}")
@@ -92,15 +100,13 @@ class MedicalRepository(IMedicalRepository):
     def create_appointment(self, appointment: Appointment) -> bool:
         """Create a new appointment"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO appointments (user_id, doctor, hospital, appointment_date, appointment_time, purpose, notes, status, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (appointment.user_id, appointment.doctor, appointment.hospital, appointment.appointment_date,
-                  appointment.appointment_time, appointment.purpose, appointment.notes, appointment.status, appointment.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO appointments (user_id, doctor, hospital, appointment_date, appointment_time, purpose, notes, status, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (appointment.user_id, appointment.doctor, appointment.hospital, appointment.appointment_date,
+                      appointment.appointment_time, appointment.purpose, appointment.notes, appointment.status, appointment.created_at))
             return True
         except Exception as e:
             print(f"Error creating appointment: {e}")
@@ -109,16 +115,15 @@ class MedicalRepository(IMedicalRepository):
     def get_appointments_by_user(self, user_id: int) -> List[Appointment]:
         """Get all appointments for a user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("""
-                SELECT * FROM appointments 
-                WHERE user_id = ? 
-                ORDER BY appointment_date DESC, appointment_time DESC
-            """, (user_id,))
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("""
+                    SELECT * FROM appointments 
+                    WHERE user_id = ? 
+                    ORDER BY appointment_date DESC, appointment_time DESC
+                """, (user_id,))
+                rows = c.fetchall()
             
             return [Appointment(
                 id=row['id'],
@@ -136,20 +141,101 @@ class MedicalRepository(IMedicalRepository):
             print(f"Error getting appointments: {e}")
             return []
     
+    def get_appointments_between(self, user_id: int, start: str, end: str) -> List[Appointment]:
+        """Get a user's appointments dated from start to end inclusive, soonest first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("""
+                    SELECT id, user_id, doctor, hospital, department, appointment_date, reason, created_at
+                    FROM appointments
+                    WHERE user_id = ? AND appointment_date BETWEEN ? AND ?
+                    ORDER BY appointment_date
+                """, (user_id, start, end))
+                rows = c.fetchall()
+            return [Appointment(
+                id=row['id'],
+                user_id=row['user_id'],
+                doctor=row['doctor'] or ' '.join(filter(None, (row['hospital'], row['department']))),
+                hospital=row['hospital'],
+                appointment_date=row['appointment_date'],
+                purpose=row['reason'] or '',
+                created_at=row['created_at']
+            ) for row in rows]
+        except Exception as e:
+            print(f"Error getting appointments: {e}")
+            return []
+    
+    def get_pending_reminders(self, until: str) -> List[Tuple[str, int, int]]:
+        """Get (due_at, appointment id, user id) of unsent reminders due by ``until``, earliest first"""
+        try:
+            with self.connection_manager.connection() as conn:
+                return conn.execute("""
+                    SELECT due_at, id, user_id FROM appointments
+                    WHERE reminded_at IS NULL AND due_at <= ?
+                    ORDER BY due_at
+                """, (until,)).fetchall()
+        except Exception as e:
+            print(f"Error getting pending reminders: {e}")
+            return []
+    
+    def claim_reminder(self, appointment_id: int, due_at: str, now: str) -> Optional[Dict[str, Any]]:
+        """Mark a reminder handled; returns the appointment only if this call claimed it
+
+        The due_at check drops reminders whose appointment was rescheduled
+        after they were read.
+        """
+        try:
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("""
+                    UPDATE appointments SET reminded_at = ?
+                    WHERE id = ? AND due_at = ? AND reminded_at IS NULL
+                    RETURNING id, user_id, appointment_date, hospital, department, doctor
+                """, (now, appointment_id, due_at))
+                row = c.fetchone()
+            return dict(row) if row else None
+        except Exception as e:
+            print(f"Error claiming reminder: {e}")
+            return None
+    
+    def release_reminder(self, appointment_id: int, claimed_at: str) -> bool:
+        """Clear this tick's claim so the next refill loads the reminder again"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("UPDATE appointments SET reminded_at = NULL WHERE id = ? AND reminded_at = ?",
+                             (appointment_id, claimed_at))
+            return True
+        except Exception as e:
+            print(f"Error releasing reminder: {e}")
+            return False
+    
+    def get_appointments_page(self, user_id: int, limit: Optional[int] = None,
+                              cursor: Optional[str] = None) -> Page:
+        """Get one page of (id, appointment_date, hospital, department, reason) rows"""
+        try:
+            with self.connection_manager.connection() as conn:
+                return fetch_page(conn,
+                                  "SELECT id, appointment_date, hospital, department, reason FROM appointments",
+                                  "user_id = ?", (user_id,), 'appointment_date', tuple, limit, cursor)
+        except Exception as e:
+            print(f"Error getting appointments page: {e}")
+            return Page()
+    
     def update_appointment(self, appointment: Appointment) -> bool:
         """Update an appointment"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE appointments 
-                SET doctor = ?, hospital = ?, appointment_date = ?, appointment_time = ?, 
-                    purpose = ?, notes = ?, status = ?
-                WHERE id = ?
-            """, (appointment.doctor, appointment.hospital, appointment.appointment_date, appointment.appointment_time,
-                  appointment.purpose, appointment.notes, appointment.status, appointment.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE appointments 
+                    SET doctor = ?, hospital = ?, appointment_date = ?, appointment_time = ?, 
+                        purpose = ?, notes = ?, status = ?
+                    WHERE id = ?
+                """, (appointment.doctor, appointment.hospital, appointment.appointment_date, appointment.appointment_time,
+                      appointment.purpose, appointment.notes, appointment.status, appointment.id))
             return True
         except Exception as e:
             print(f"Error updating appointment: {e}")
@@ -158,11 +244,9 @@ class MedicalRepository(IMedicalRepository):
     def delete_appointment(self, appointment_id: int) -> bool:
         """Delete an appointment"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
             return True
         except Exception as e:
             print(f"Error deleting appointment: {e}")
@@ -0,0 +1,103 @@
+"""
+Notification outbox repository: durable queue between producers and dispatchers
+"""
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from database.connection_manager import ConnectionManager
+from models.domain import OutboxMessage
+
+
+# One statement claims the batch, so concurrent dispatchers (threads or
+# processes) can never claim the same row: SQLite runs it under the write lock.
+CLAIM_SQL = """
+    UPDATE notification_outbox
+    SET status = 'claimed', claimed_by = ?, claimed_at = ?
+    WHERE id IN (
+        SELECT id FROM notification_outbox
+        WHERE status = 'pending' AND available_at <= ?
+        ORDER BY available_at
+        LIMIT ?)
+    RETURNING id, user_id, channel, kind, payload, attempts, enqueued_at
+"""
+
+
+class NotificationOutboxRepository:
+    """SQLite-backed notification outbox"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+
+    def enqueue(self, user_id: int, channel: str, kind: str, payload: Dict[str, Any],
+                available_at: Optional[float] = None) -> Optional[int]:
+        """Add a message to the outbox; returns its id"""
+        try:
+            now = time.time()
+            with self.connection_manager.transaction() as conn:
+                cursor = conn.execute("""
+                    INSERT INTO notification_outbox (user_id, channel, kind, payload, enqueued_at, available_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (user_id, channel, kind, json.dumps(payload, ensure_ascii=False), now,
+                      now if available_at is None else available_at))
+                return cursor.lastrowid
+        except Exception as e:
+            print(f"Error enqueuing notification: {e}")
+            return None
+
+    def claim_batch(self, worker: str, limit: int, now: Optional[float] = None) -> List[OutboxMessage]:
+        """Claim up to ``limit`` due messages for ``worker``, oldest first"""
+        now = time.time() if now is None else now
+        with self.connection_manager.transaction() as conn:
+            rows = conn.execute(CLAIM_SQL, (worker, now, now, limit)).fetchall()
+        messages = [OutboxMessage(id=row[0], user_id=row[1], channel=row[2], kind=row[3],
+                                  payload=json.loads(row[4]), attempts=row[5], enqueued_at=row[6])
+                    for row in rows]
+        return sorted(messages, key=lambda m: m.id)
+
+    def release_expired_claims(self, lease_seconds: float, now: Optional[float] = None) -> int:
+        """Return messages claimed longer than ``lease_seconds`` ago (a crashed dispatcher) to pending"""
+        now = time.time() if now is None else now
+        with self.connection_manager.transaction() as conn:
+            return conn.execute("""
+                UPDATE notification_outbox
+                SET status = 'pending', claimed_by = NULL, claimed_at = NULL
+                WHERE status = 'claimed' AND claimed_at < ?
+            """, (now - lease_seconds,)).rowcount
+
+    def mark_sent(self, ids: Sequence[int], sent_at: Optional[float] = None):
+        """Mark claimed messages delivered and record enqueue-to-delivery latency"""
+        sent_at = time.time() if sent_at is None else sent_at
+        with self.connection_manager.transaction() as conn:
+            conn.executemany("""
+                UPDATE notification_outbox
+                SET status = 'sent', sent_at = ?, latency_ms = (? - enqueued_at) * 1000, attempts = attempts + 1
+                WHERE id = ? AND status = 'claimed'
+            """, [(sent_at, sent_at, message_id) for message_id in ids])
+
+    def mark_failed(self, failures: Sequence[Tuple[int, str, Optional[float]]]):
+        """Record failed attempts as (id, error, retry_at); a None retry_at fails the message for good"""
+        with self.connection_manager.transaction() as conn:
+            conn.executemany("""
+                UPDATE notification_outbox
+                SET status = CASE WHEN ? IS NULL THEN 'failed' ELSE 'pending' END,
+                    available_at = COALESCE(?, available_at), attempts = attempts + 1,
+                    last_error = ?, claimed_by = NULL, claimed_at = NULL
+                WHERE id = ? AND status = 'claimed'
+            """, [(retry_at, retry_at, error, message_id) for message_id, error, retry_at in failures])
+
+    def get_stats(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """Message counts per status and delivery latency of messages sent since ``since``"""
+        try:
+            with self.connection_manager.connection() as conn:
+                counts = dict(conn.execute(
+                    "SELECT status, COUNT(*) FROM notification_outbox GROUP BY status").fetchall())
+                sent, avg_ms, max_ms = conn.execute("""
+                    SELECT COUNT(*), AVG(latency_ms), MAX(latency_ms) FROM notification_outbox
+                    WHERE status = 'sent' AND sent_at >= ?
+                """, (since or 0,)).fetchone()
+            return {'counts': counts, 'sent': sent, 'avg_latency_ms': avg_ms, 'max_latency_ms': max_ms}
+        except Exception as e:
+            print(f"Error getting outbox stats: {e}")
+            return {'counts': {}, 'sent': 0, 'avg_latency_ms': None, 'max_latency_ms': None}
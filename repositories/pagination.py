@@ -0,0 +1,93 @@
+"""
+Keyset (cursor) pagination helpers shared by the repositories
+
+Pages are ordered newest first on ``(sort_column, id)``. A cursor encodes the
+key of the boundary row and the direction to read from it, so fetching any
+page costs one index range scan regardless of how deep into history it is.
+"""
+import base64
+import json
+import sqlite3
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+from models.domain import Page
+
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    """Clamp a requested page size to [1, MAX_PAGE_SIZE]"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def encode_cursor(direction: str, sort_value: Any, row_id: int) -> str:
+    """Encode a boundary key; direction is 'after' (older) or 'before' (newer)"""
+    raw = json.dumps([direction, sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, Any, int]]:
+    """Decode a cursor; invalid or missing cursors mean the first page"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ('after', 'before'):
+            return None
+        return direction, sort_value, int(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def fetch_page(conn: sqlite3.Connection, select_sql: str, where_sql: str, params: Sequence[Any],
+               sort_column: str, mapper: Callable[[tuple], Any],
+               limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+    """Fetch one page of ``select_sql WHERE where_sql`` ordered by (sort_column, id) DESC
+
+    The selected columns must include ``id`` and ``sort_column``. Rows reach
+    ``mapper`` as plain tuples in select order.
+    """
+    limit = clamp_page_size(limit)
+    key = decode_cursor(cursor)
+    where = [where_sql]
+    args = list(params)
+    order = 'DESC'
+    if key:
+        direction, sort_value, row_id = key
+        if direction == 'after':
+            where.append(f"({sort_column}, id) < (?, ?)")
+        else:
+            where.append(f"({sort_column}, id) > (?, ?)")
+            order = 'ASC'
+        args.extend([sort_value, row_id])
+
+    c = conn.cursor()
+    c.execute(
+        f"{select_sql} WHERE {' AND '.join(where)} "
+        f"ORDER BY {sort_column} {order}, id {order} LIMIT ?",
+        args + [limit + 1]
+    )
+    rows = c.fetchall()
+    names = [d[0] for d in c.description]
+    sort_at, id_at = names.index(sort_column), names.index('id')
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if order == 'ASC':
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        reading_older = key is None or key[0] == 'after'
+        if (has_more and reading_older) or not reading_older:
+            next_cursor = encode_cursor('after', last[sort_at], last[id_at])
+        if (key is not None and reading_older) or (has_more and not reading_older):
+            prev_cursor = encode_cursor('before', first[sort_at], first[id_at])
+
+    return Page(items=[mapper(row) for row in rows], next_cursor=next_cursor,
+                prev_cursor=prev_cursor, limit=limit)
@@ -0,0 +1,53 @@
+"""
+Rollup repository: reads the trigger-maintained daily_rollups table
+"""
+from typing import List, Optional, Tuple
+
+from database.connection_manager import ConnectionManager
+from models.domain import DailyRollup
+from repositories.row_mapping import map_rows, select_columns
+
+
+ROLLUP_COLUMNS = select_columns(DailyRollup)
+
+
+class RollupRepository:
+    """Read access to per-user daily aggregates"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+
+    def get_daily_rollups(self, user_id: int, start: Optional[str] = None,
+                          end: Optional[str] = None) -> List[DailyRollup]:
+        """Get a user's daily rollups oldest first; start/end are inclusive dates"""
+        try:
+            where, params = ["user_id = ?"], [user_id]
+            if start:
+                where.append("day >= ?")
+                params.append(start)
+            if end:
+                where.append("day <= ?")
+                params.append(end)
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute(f"SELECT {ROLLUP_COLUMNS} FROM daily_rollups WHERE {' AND '.join(where)} ORDER BY day", params)
+                rows = c.fetchall()
+            return map_rows(DailyRollup, rows)
+        except Exception as e:
+            print(f"Error getting daily rollups: {e}")
+            return []
+
+    def get_exercise_totals(self, user_id: int) -> Tuple[int, int]:
+        """Get (exercise count, calories burned) over a user's whole history"""
+        try:
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    SELECT COALESCE(SUM(exercise_count), 0), COALESCE(SUM(calories_burned), 0)
+                    FROM daily_rollups WHERE user_id = ?
+                """, (user_id,))
+                return tuple(c.fetchone())
+        except Exception as e:
+            print(f"Error getting exercise totals: {e}")
+            return (0, 0)
@@ -0,0 +1,25 @@
+"""
+Tuple-backed row mapping for the slotted domain models
+
+Selecting a model's columns in its field order lets a plain sqlite3 tuple be
+passed positionally to the constructor, skipping sqlite3.Row and the
+per-column name lookups (and the intermediate dict of ``Model(**dict(row))``).
+"""
+from dataclasses import fields
+from functools import lru_cache
+from itertools import starmap
+from typing import Iterable, List, Type, TypeVar
+
+
+T = TypeVar('T')
+
+
+@lru_cache(maxsize=None)
+def select_columns(model: type) -> str:
+    """Comma-separated column list in the model's field order"""
+    return ', '.join(f.name for f in fields(model))
+
+
+def map_rows(model: Type[T], rows: Iterable[tuple]) -> List[T]:
+    """Build one model per row selected with select_columns(model)"""
+    return list(starmap(model, rows))
@@ -0,0 +1,105 @@
+"""
+Session repository: server-side session records in the sessions table
+
+Shared by every worker on the database, so a logout or revocation in one
+process takes effect everywhere.
+"""
+from typing import Optional
+
+from database.connection_manager import ConnectionManager
+from interfaces.repositories import ISessionStore
+from models.domain import SessionRecord, User
+from repositories.row_mapping import select_columns
+
+
+SESSION_COLUMNS = select_columns(SessionRecord)
+
+
+class SessionRepository(ISessionStore):
+    """SQLite implementation of the session store"""
+
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
+        self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+
+    def save_session(self, record: SessionRecord) -> bool:
+        """Store a new session"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute(f"INSERT INTO sessions ({SESSION_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             (record.sid, record.user_id, record.username, record.gender,
+                              record.birthday, record.profile_version, record.expires_at))
+            return True
+        except Exception as e:
+            print(f"Error saving session: {e}")
+            return False
+
+    def get_session(self, sid: str, now: float) -> Optional[SessionRecord]:
+        """Get a session that has not expired by now"""
+        try:
+            with self.connection_manager.connection() as conn:
+                row = conn.execute(f"SELECT {SESSION_COLUMNS} FROM sessions WHERE sid = ? AND expires_at > ?",
+                                   (sid, now)).fetchone()
+            return SessionRecord(*row) if row else None
+        except Exception as e:
+            print(f"Error getting session: {e}")
+            return None
+
+    def extend_session(self, sid: str, expires_at: float) -> bool:
+        """Move a session's expiry"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("UPDATE sessions SET expires_at = ? WHERE sid = ?", (expires_at, sid))
+            return True
+        except Exception as e:
+            print(f"Error extending session: {e}")
+            return False
+
+    def delete_session(self, sid: str) -> bool:
+        """Delete one session"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+            return True
+        except Exception as e:
+            print(f"Error deleting session: {e}")
+            return False
+
+    def delete_user_sessions(self, user_id: int) -> int:
+        """Delete every session of a user; returns how many"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                return conn.execute("DELETE FROM sessions WHERE user_id = ?", (user_id,)).rowcount
+        except Exception as e:
+            print(f"Error revoking sessions: {e}")
+            return 0
+
+    def delete_all_sessions(self) -> int:
+        """Delete every session; returns how many"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                return conn.execute("DELETE FROM sessions").rowcount
+        except Exception as e:
+            print(f"Error revoking all sessions: {e}")
+            return 0
+
+    def update_session_profiles(self, user: User) -> int:
+        """Copy a user's current profile into their sessions; returns how many"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                return conn.execute("""
+                    UPDATE sessions SET username = ?, gender = ?, birthday = ?, profile_version = ?
+                    WHERE user_id = ?
+                """, (user.username, user.gender, user.birthday, user.profile_version, user.id)).rowcount
+        except Exception as e:
+            print(f"Error updating session profiles: {e}")
+            return 0
+
+    def delete_expired_sessions(self, now: float) -> int:
+        """Delete sessions expired by now; returns how many"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+        except Exception as e:
+            print(f"Error sweeping sessions: {e}")
+            return 0
@@ -1,27 +1,44 @@
 import sqlite3
-from typing import Optional, List
+from typing import Optional, List, Tuple
+from database.connection_manager import ConnectionManager
 from interfaces.repositories import IUserRepository
 from models.domain import User
+from repositories.change_listeners import ChangeNotifier
 
 
-class UserRepository(IUserRepository):
+class UserRepository(ChangeNotifier, IUserRepository):
     """SQLite implementation of user repository"""
     
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, connection_manager: Optional[ConnectionManager] = None):
         self.db_path = db_path
+        self.connection_manager = connection_manager or ConnectionManager(db_path)
+    
+    @staticmethod
+    def _to_user(row: sqlite3.Row) -> User:
+        return User(
+            id=row['id'],
+            username=row['username'],
+            password=row['password'],
+            email=row['email'],
+            gender=row['gender'],
+            birthday=row['birthday'],
+            created_at=row['created_at'],
+            profile_version=row['profile_version']
+        )
     
     def create_user(self, user: User) -> bool:
         """Create a new user"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                INSERT INTO users (username, password, email, gender, birthday, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (user.username, user.password, user.email, user.gender, 
-                  user.birthday, user.created_at))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    INSERT INTO users (username, password, email, gender, birthday, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (user.username, user.password, user.email, user.gender, 
+                      user.birthday, user.created_at))
+                user_id = c.lastrowid
+            # A reused id must not inherit anything cached for a deleted user
+            self._notify_change([user_id])
             return True
         except Exception as e:
             print(f"Error creating user: {e}")
@@ -30,23 +47,14 @@ class UserRepository(IUserRepository):
     def get_user_by_username(self, username: str) -> Optional[User]:
         """Get user by username"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("SELECT * FROM users WHERE username = ?", (username,))
-            row = c.fetchone()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("SELECT * FROM users WHERE username = ?", (username,))
+                row = c.fetchone()
             
             if row:
-                return User(
-                    id=row['id'],
-                    username=row['username'],
-                    password=row['password'],
-                    email=row['email'],
-                    gender=row['gender'],
-                    birthday=row['birthday'],
-                    created_at=row['created_at']
-                )
+                return self._to_user(row)
             return None
         except Exception as e:
             print(f"Error getting user: {e}")
@@ -55,23 +63,14 @@ class UserRepository(IUserRepository):
     def get_user_by_id(self, user_id: int) -> Optional[User]:
         """Get user by ID"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("SELECT * FROM users WHERE id = ?", (user_id,))
-            row = c.fetchone()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+                row = c.fetchone()
             
             if row:
-                return User(
-                    id=row['id'],
-                    username=row['username'],
-                    password=row['password'],
-                    email=row['email'],
-                    gender=row['gender'],
-                    birthday=row['birthday'],
-                    created_at=row['created_at']
-                )
+                return self._to_user(row)
             return None
         except Exception as e:
             print(f"Error getting user by ID: {e}")
@@ -80,28 +79,72 @@ class UserRepository(IUserRepository):
     def update_user(self, user: User) -> bool:
         """Update user information"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("""
-                UPDATE users 
-                SET username = ?, email = ?, gender = ?, birthday = ?
-                WHERE id = ?
-            """, (user.username, user.email, user.gender, user.birthday, user.id))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE users 
+                    SET username = ?, email = ?, gender = ?, birthday = ?,
+                        profile_version = profile_version + 1
+                    WHERE id = ?
+                """, (user.username, user.email, user.gender, user.birthday, user.id))
+            self._notify_change([user.id])
             return True
         except Exception as e:
             print(f"Error updating user: {e}")
             return False
     
+    def update_password(self, username: str, password_hash: str) -> bool:
+        """Update a user's password hash"""
+        try:
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("""
+                    UPDATE users SET password = ?, profile_version = profile_version + 1
+                    WHERE username = ?
+                    RETURNING id
+                """, (password_hash, username))
+                changed = [user_id for (user_id,) in c.fetchall()]
+            self._notify_change(changed)
+            return True
+        except Exception as e:
+            print(f"Error updating password: {e}")
+            return False
+    
+    def rehash_password(self, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """Replace a password hash with a stronger hash of the same password
+        
+        The password itself is unchanged, so sessions and cached profiles
+        stay valid. Only replaces old_hash, so a concurrent reset wins.
+        """
+        try:
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                          (new_hash, user_id, old_hash))
+                return c.rowcount == 1
+        except Exception as e:
+            print(f"Error rehashing password: {e}")
+            return False
+    
+    def get_profile_version(self, user_id: int) -> Optional[int]:
+        """Get the user's profile version, or None if the user no longer exists"""
+        try:
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.execute("SELECT profile_version FROM users WHERE id = ?", (user_id,))
+                row = c.fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Error getting profile version: {e}")
+            return None
+    
     def delete_user(self, user_id: int) -> bool:
         """Delete user by ID"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            conn.commit()
-            conn.close()
+            with self.connection_manager.transaction() as conn:
+                c = conn.cursor()
+                c.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            self._notify_change([user_id])
             return True
         except Exception as e:
             print(f"Error deleting user: {e}")
@@ -110,22 +153,25 @@ class UserRepository(IUserRepository):
     def get_all_users(self) -> List[User]:
         """Get all users"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute("SELECT * FROM users")
-            rows = c.fetchall()
-            conn.close()
+            with self.connection_manager.connection() as conn:
+                c = conn.cursor()
+                c.row_factory = sqlite3.Row
+                c.execute("SELECT * FROM users")
+                rows = c.fetchall()
             
-            return [User(
-                id=row['id'],
-                username=row['username'],
-                password=row['password'],
-                email=row['email'],
-                gender=row['gender'],
-                birthday=row['birthday'],
-                created_at=row['created_at']
-            ) for row in rows]
+            return [self._to_user(row) for row in rows]
         except Exception as e:
             print(f"Error getting all users: {e}")
-            return []
\ No newline at end of file
+            return []
+    
+    def get_user_id_range(self) -> Tuple[int, int]:
+        """Get the (lowest, highest) user id; (0, 0) when there are no users"""
+        try:
+            with self.connection_manager.connection() as conn:
+                low, high = conn.execute(
+                    "SELECT (SELECT MIN(id) FROM users), (SELECT MAX(id) FROM users)"
+                ).fetchone()
+            return (low or 0, high or 0)
+        except Exception as e:
+            print(f"Error getting user id range: {e}")
+            return (0, 0)
@@ -0,0 +1,78 @@
+"""
+Background health alert scan over all users
+
+The rules of NotificationService.check_health_alerts are evaluated in SQL
+for a whole chunk of user ids at a time. A thread pool runs the chunk reads
+concurrently (WAL readers do not block each other and sqlite3 releases the
+GIL while a statement runs) while the calling thread writes each finished
+chunk, so there is only ever one writer.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from interfaces.repositories import IUserRepository
+from interfaces.services import IAlertScanService
+from repositories.alert_repository import AlertRepository
+from services.periodic_task import PeriodicTask
+
+
+DEFAULT_CHUNK_SIZE = 2000
+DEFAULT_SCAN_INTERVAL = 900.0  # seconds
+
+
+class AlertScanService(IAlertScanService):
+    """Evaluates and stores health alerts for every user in chunks"""
+
+    def __init__(self, user_repository: IUserRepository, alert_repository: AlertRepository,
+                 workers: int = 4, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.user_repository = user_repository
+        self.alert_repository = alert_repository
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def scan_all(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """Replace every user's stored alerts; returns scan statistics"""
+        started = time.perf_counter()
+        today_str = (today or date.today()).strftime('%Y-%m-%d')
+        low, high = self.user_repository.get_user_id_range()
+        chunks = [(first, min(first + self.chunk_size - 1, high))
+                  for first in range(low, high + 1, self.chunk_size)] if high else []
+
+        alerts = failed = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='alert-scan') as pool:
+            futures = {pool.submit(self.alert_repository.evaluate_alerts, first, last, today_str): (first, last)
+                       for first, last in chunks}
+            for future in as_completed(futures):
+                first, last = futures[future]
+                try:
+                    rows = future.result()
+                except Exception as e:
+                    print(f"Error scanning alerts for users {first}-{last}: {e}")
+                    failed += 1
+                    continue
+                if self.alert_repository.replace_alerts(first, last, today_str, rows):
+                    alerts += len(rows)
+                else:
+                    failed += 1
+        self.alert_repository.prune_alerts(low, high)
+        return {
+            'scanned_on': today_str,
+            'chunks': len(chunks),
+            'failed_chunks': failed,
+            'alerts': alerts,
+            'duration_ms': (time.perf_counter() - started) * 1000
+        }
+
+    def get_alerts(self, user_id: int, today: Optional[date] = None) -> List[str]:
+        """Get a user's alerts from today's scan"""
+        return self.alert_repository.get_alerts(user_id, (today or date.today()).strftime('%Y-%m-%d'))
+
+
+class AlertScanScheduler(PeriodicTask):
+    """Runs the alert scan at startup and then every ``interval`` seconds"""
+
+    def __init__(self, alert_scan_service: AlertScanService, interval: float = DEFAULT_SCAN_INTERVAL):
+        super().__init__('alert-scan', alert_scan_service.scan_all, interval)
+        self.alert_scan_service = alert_scan_service
@@ -0,0 +1,87 @@
+"""
+Appointment reminders popped from a due-time priority queue
+
+Reminders due within the next ``window`` are loaded from the partial
+due_at index (unreminded appointments only, so past appointments are never
+read) into a min-heap. Each tick pops what has come due across all users;
+the heap is reloaded every ``refill_interval`` to pick up appointments
+booked or rescheduled since. A reminder is claimed with a conditional
+update before it is queued, so several app processes ticking at once still
+send each reminder once; a claim whose reminder cannot be queued is
+released again and retried after the next refill.
+"""
+import heapq
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from interfaces.repositories import IMedicalRepository
+from interfaces.services import INotificationService
+from services.periodic_task import PeriodicTask
+
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+DEFAULT_TICK_INTERVAL = 30.0  # seconds
+
+
+class AppointmentReminderQueue:
+    """Min-heap of (due_at, appointment id, user id) for reminders coming due"""
+
+    def __init__(self, medical_repository: IMedicalRepository, notification_service: INotificationService,
+                 window: timedelta = timedelta(minutes=10), refill_interval: timedelta = timedelta(minutes=1)):
+        self.medical_repository = medical_repository
+        self.notification_service = notification_service
+        # The window must outlast the refill interval or reminders could fall between loads
+        self.window = max(window, refill_interval)
+        self.refill_interval = refill_interval
+        self._heap: List[Tuple[str, int, int]] = []
+        self._next_refill: Optional[datetime] = None
+
+    def refill(self, now: datetime):
+        """Reload every unsent reminder due before now + window"""
+        until = (now + self.window).strftime(TIMESTAMP_FORMAT)
+        self._heap = list(self.medical_repository.get_pending_reminders(until))
+        heapq.heapify(self._heap)
+        self._next_refill = now + self.refill_interval
+
+    def pop_due(self, now: datetime) -> List[Tuple[str, int, int]]:
+        """Remove and return every reminder due at or before now"""
+        now_str = now.strftime(TIMESTAMP_FORMAT)
+        due = []
+        while self._heap and self._heap[0][0] <= now_str:
+            due.append(heapq.heappop(self._heap))
+        return due
+
+    def tick(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Send the reminders that have come due; returns counts"""
+        now = now or datetime.now()
+        if self._next_refill is None or now >= self._next_refill:
+            self.refill(now)
+        sent = skipped = failed = 0
+        now_str, today = now.strftime(TIMESTAMP_FORMAT), now.strftime('%Y-%m-%d')
+        for due_at, appointment_id, user_id in self.pop_due(now):
+            appointment = self.medical_repository.claim_reminder(appointment_id, due_at, now_str)
+            if appointment is None:
+                continue  # rescheduled, deleted or sent by another process
+            if appointment['appointment_date'] < today:
+                skipped += 1  # came due while nothing was running; too late to remind
+                continue
+            doctor = appointment['doctor'] or ' '.join(
+                filter(None, (appointment['hospital'], appointment['department'])))
+            if self.notification_service.send_appointment_reminder(
+                    user_id, {'doctor': doctor, 'appointment_date': appointment['appointment_date']}):
+                sent += 1
+            else:
+                failed += 1
+                self.medical_repository.release_reminder(appointment_id, now_str)
+        return {'sent': sent, 'skipped': skipped, 'failed': failed, 'queued': len(self._heap)}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+class AppointmentReminderScheduler(PeriodicTask):
+    """Ticks the reminder queue every ``interval`` seconds"""
+
+    def __init__(self, reminder_queue: AppointmentReminderQueue, interval: float = DEFAULT_TICK_INTERVAL):
+        super().__init__('appointment-reminders', reminder_queue.tick, interval)
+        self.reminder_queue = reminder_queue
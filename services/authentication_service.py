@@ -1,23 +1,24 @@
 """
 Authentication service implementation following SOLID principles
 """
-import hashlib
 from typing import Optional
 from datetime import datetime
 from interfaces.services import IAuthenticationService
 from interfaces.repositories import IUserRepository
 from models.domain import User
+from services.password_hashing import PasswordHasher, HashingBusy
 
 
 class AuthenticationService(IAuthenticationService):
     """Implementation of authentication service"""
     
-    def __init__(self, user_repository: IUserRepository):
+    def __init__(self, user_repository: IUserRepository, password_hasher: Optional[PasswordHasher] = None):
         self.user_repository = user_repository
+        self.password_hasher = password_hasher or PasswordHasher()
     
     def hash_password(self, password: str) -> str:
-        """Hash password using SHA-256"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hash password with a salted scrypt/PBKDF2 hash on the hashing pool"""
+        return self.password_hasher.hash(password)
     
     def register_user(self, username: str, password: str, email: Optional[str] = None, 
                      gender: Optional[str] = None, birthday: Optional[str] = None) -> bool:
@@ -40,6 +41,8 @@ class AuthenticationService(IAuthenticationService):
             )
             
             return self.user_repository.create_user(user)
+        except HashingBusy:
+            raise
         except Exception as e:
             print(f"Error registering user: {e}")
             return False
@@ -48,14 +51,17 @@ class AuthenticationService(IAuthenticationService):
         """Authenticate user credentials"""
         try:
             user = self.user_repository.get_user_by_username(username)
-            if not user:
+            if not self.password_hasher.verify(user.password if user else None, password):
                 return None
             
-            password_hash = self.hash_password(password)
-            if user.password == password_hash:
-                return user
-            
-            return None
+            # Upgrade legacy or weaker hashes while the plain password is at hand
+            if self.password_hasher.needs_rehash(user.password):
+                new_hash = self.hash_password(password)
+                if self.user_repository.rehash_password(user.id, user.password, new_hash):
+                    user.password = new_hash
+            return user
+        except HashingBusy:
+            raise
         except Exception as e:
             print(f"Error authenticating user: {e}")
             return None
@@ -67,6 +73,22 @@ class AuthenticationService(IAuthenticationService):
         except Exception as e:
             print(f"Error getting user by username: {e}")
             return None
+    
+    def get_user_by_id(self, user_id: int) -> Optional[User]:
+        """Get user by ID"""
+        try:
+            return self.user_repository.get_user_by_id(user_id)
+        except Exception as e:
+            print(f"Error getting user by ID: {e}")
+            return None
+    
+    def get_profile_version(self, user_id: int) -> Optional[int]:
+        """Get the user's profile version, or None if the user no longer exists"""
+        try:
+            return self.user_repository.get_profile_version(user_id)
+        except Exception as e:
+            print(f"Error getting profile version: {e}")
+            return None
         
     def update_user_password(self, username: str, new_password: str) -> bool:
         """Update user's password (for password reset)"""
@@ -75,14 +97,9 @@ class AuthenticationService(IAuthenticationService):
             if not user:
                 return False
             password_hash = self.hash_password(new_password)
-            # 直接更新密碼欄位
-            import sqlite3
-            conn = sqlite3.connect(self.user_repository.db_path)
-            c = conn.cursor()
-            c.execute("UPDATE users SET password=? WHERE username=?", (password_hash, username))
-            conn.commit()
-            conn.close()
-            return True
+            return self.user_repository.update_password(username, password_hash)
+        except HashingBusy:
+            raise
         except Exception as e:
             print(f"Error updating user password: {e}")
             return False
\ No newline at end of file
@@ -0,0 +1,117 @@
+"""
+NumPy batch classification of blood pressure and BMI readings
+
+Mirrors HealthEvaluationService._bp_category / _bmi_category / calculate_bmi
+for whole arrays at once. Categories are returned as small integer codes
+indexing BP_CATEGORIES / BMI_CATEGORIES; -1 marks a reading that cannot be
+classified (missing or non-positive values). The category labels double as
+the keys of BP_RECOMMENDATIONS / BMI_RECOMMENDATIONS.
+"""
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+
+INVALID = -1
+
+BP_CATEGORIES = ("低血壓", "正常血壓", "血壓偏高", "第一期高血壓", "第二期高血壓", "高血壓危機")
+BMI_CATEGORIES = ("體重過輕", "正常體重", "體重過重", "輕度肥胖", "中度肥胖", "重度肥胖")
+# Upper bounds (exclusive) of every BMI category but the last
+BMI_BOUNDS = np.array([18.5, 24, 27, 30, 35])
+# Same brackets as the general table of the guidance catalog (health_guidance.json)
+AGE_BANDS = ("<20", "20-29", "30-39", "40-49", "50-64", "65+")
+AGE_BOUNDS = np.array([20, 30, 40, 50, 65])
+
+BP_RECOMMENDATIONS = {
+    "低血壓": "建議諮詢醫師，注意水分攝取，避免突然起身",
+    "正常血壓": "請保持良好的生活習慣",
+    "血壓偏高": "建議減少鈉攝取，增加運動，定期監測",
+    "第一期高血壓": "建議就醫諮詢，調整生活型態",
+    "第二期高血壓": "建議盡快就醫治療",
+    "高血壓危機": "請立即就醫！"
+}
+BMI_RECOMMENDATIONS = {
+    "體重過輕": "建議增加營養攝取，適度重量訓練",
+    "正常體重": "請保持良好的飲食和運動習慣",
+    "體重過重": "建議控制飲食，增加有氧運動",
+    "輕度肥胖": "建議制定減重計畫，諮詢營養師",
+    "中度肥胖": "建議醫療減重介入，定期追蹤",
+    "重度肥胖": "強烈建議就醫評估，考慮醫療介入"
+}
+
+
+def _as_float(values: Sequence[Optional[float]]) -> np.ndarray:
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    # None becomes NaN so missing readings fall through to INVALID
+    return np.fromiter((np.nan if v is None else v for v in values), dtype=float)
+
+
+def classify_blood_pressure(systolic: Sequence[float], diastolic: Sequence[float]) -> np.ndarray:
+    """Category codes for paired systolic/diastolic arrays (first matching rule wins)"""
+    s, d = _as_float(systolic), _as_float(diastolic)
+    valid = ~(np.isnan(s) | np.isnan(d))
+    conditions = [
+        ~valid,
+        (s < 90) | (d < 60),
+        (s < 120) & (d < 80),
+        (s < 130) & (d < 80),
+        (s < 140) | (d < 90),
+        (s < 180) | (d < 120),
+    ]
+    return np.select(conditions, [INVALID, 0, 1, 2, 3, 4], default=5).astype(np.int8)
+
+
+def calculate_bmi(height_cm: Sequence[float], weight_kg: Sequence[float]) -> np.ndarray:
+    """BMI for paired height (cm) / weight (kg) arrays; NaN where either is missing or <= 0"""
+    h, w = _as_float(height_cm), _as_float(weight_kg)
+    valid = (h > 0) & (w > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = w / (h / 100) ** 2
+    return np.where(valid, bmi, np.nan)
+
+
+def classify_bmi(bmi: Sequence[float]) -> np.ndarray:
+    """Category codes for an array of BMI values"""
+    values = _as_float(bmi)
+    codes = np.searchsorted(BMI_BOUNDS, values, side='right').astype(np.int8)
+    return np.where(np.isnan(values), INVALID, codes).astype(np.int8)
+
+
+def classify_age(ages: Sequence[float]) -> np.ndarray:
+    """Age band codes for an array of ages in whole years"""
+    values = _as_float(ages)
+    codes = np.searchsorted(AGE_BOUNDS, values, side='right').astype(np.int8)
+    return np.where(np.isnan(values), INVALID, codes).astype(np.int8)
+
+
+def labels(codes: np.ndarray, categories: Sequence[str]) -> List[Optional[str]]:
+    """Category labels (recommendation keys) for codes; None for INVALID"""
+    lookup = list(categories)
+    return [lookup[code] if code != INVALID else None for code in codes.tolist()]
+
+
+@dataclass
+class BatchEvaluation:
+    """Result of evaluate_batch; arrays are aligned with the inputs"""
+    bp_codes: np.ndarray
+    bmi: np.ndarray
+    bmi_codes: np.ndarray
+
+    def bp_labels(self) -> List[Optional[str]]:
+        return labels(self.bp_codes, BP_CATEGORIES)
+
+    def bmi_labels(self) -> List[Optional[str]]:
+        return labels(self.bmi_codes, BMI_CATEGORIES)
+
+
+def evaluate_batch(systolic: Sequence[float] = (), diastolic: Sequence[float] = (),
+                   height: Sequence[float] = (), weight: Sequence[float] = ()) -> BatchEvaluation:
+    """Classify blood pressure and BMI readings in one call"""
+    bmi = calculate_bmi(height, weight)
+    return BatchEvaluation(
+        bp_codes=classify_blood_pressure(systolic, diastolic),
+        bmi=bmi,
+        bmi_codes=classify_bmi(bmi)
+    )
@@ -0,0 +1,411 @@
+"""
+Cache backends: in-process, shared SQLite file and Redis protocol
+
+The result caches store through an ICacheBackend chosen by URL
+(HEALTHTRACKER_CACHE_URL):
+
+    memory                      per-process LRU (the default)
+    sqlite:///path/cache.db     one file shared by every worker on the host
+    redis://host:6379/0         any server speaking the Redis protocol
+
+Shared backends pickle values, so a result computed by one gunicorn worker
+is a hit in every other worker and survives worker restarts. Each backend
+instance is bound to a namespace ('results', 'vitals', ...) that prefixes
+its keys and bounds its capacity. Failures are printed and treated as
+misses so a cache outage never fails a request.
+"""
+import pickle
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from database.connection_manager import ConnectionManager
+from interfaces.services import ICacheBackend
+
+
+DEFAULT_CACHE_URL = 'memory'
+
+
+class MemoryCacheBackend(ICacheBackend):
+    """Per-process LRU with per-entry expiry; values are stored as is"""
+    PRUNE_EVERY = 1024  # expiring counter writes between sweeps of expired counters
+
+    def __init__(self, max_entries: int = 4096, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()  # key -> (expires_at, value)
+        self._counters: Dict[str, Tuple[int, Optional[float]]] = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self._evictions = self._expirations = 0
+        self._expiring_writes = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                self._expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        with self._lock:
+            now = self.clock()
+            value, expires_at = self._counters.get(key, (0, None))
+            if expires_at is not None and expires_at <= now:
+                value = 0
+            if value == 0:
+                expires_at = None if ttl is None else now + ttl
+            self._counters[key] = (value + 1, expires_at)
+            if ttl is not None:
+                self._expiring_writes += 1
+                if self._expiring_writes % self.PRUNE_EVERY == 0:
+                    self._counters = {k: entry for k, entry in self._counters.items()
+                                      if entry[1] is None or entry[1] > now}
+            return value + 1
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            value, expires_at = self._counters.get(key, (0, None))
+            return 0 if expires_at is not None and expires_at <= self.clock() else value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries),
+                    'evictions': self._evictions, 'expirations': self._expirations}
+
+
+class SQLiteCacheBackend(ICacheBackend):
+    """Entries in a SQLite file shared by the processes on one host
+
+    LRU order is kept coarsely: a hit refreshes accessed_at at most every
+    TOUCH_INTERVAL seconds, and every EVICT_EVERY writes the namespace is
+    trimmed back to max_entries after dropping expired rows and counters.
+    """
+    TOUCH_INTERVAL = 30.0
+    EVICT_EVERY = 64
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS cache_entries (
+               namespace TEXT NOT NULL,
+               key TEXT NOT NULL,
+               value BLOB NOT NULL,
+               expires_at REAL NOT NULL,
+               accessed_at REAL NOT NULL,
+               PRIMARY KEY (namespace, key)
+           ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, accessed_at)",
+        """CREATE TABLE IF NOT EXISTS cache_counters (
+               namespace TEXT NOT NULL,
+               key TEXT NOT NULL,
+               value INTEGER NOT NULL,
+               expires_at REAL,
+               PRIMARY KEY (namespace, key)
+           ) WITHOUT ROWID""",
+    ]
+
+    def __init__(self, path: str, namespace: str, max_entries: int = 4096,
+                 clock: Callable[[], float] = time.time):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.clock = clock
+        # A cache can be rebuilt, so durability is traded for write speed
+        self.connection_manager = ConnectionManager(path, pragmas=[
+            ('busy_timeout', 2000), ('journal_mode', 'WAL'), ('synchronous', 'OFF')])
+        self._writes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+        with self.connection_manager.transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            # Files created before counters could expire
+            if 'expires_at' not in {row[1] for row in conn.execute("PRAGMA table_info(cache_counters)")}:
+                conn.execute("ALTER TABLE cache_counters ADD COLUMN expires_at REAL")
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            now = self.clock()
+            with self.connection_manager.connection() as conn:
+                row = conn.execute(
+                    "SELECT value, expires_at, accessed_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)).fetchone()
+            if row is None or row[1] <= now:
+                return None
+            if now - row[2] > self.TOUCH_INTERVAL:
+                with self.connection_manager.transaction() as conn:
+                    conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                                 (now, self.namespace, key))
+            return pickle.loads(row[0])
+        except Exception as e:
+            print(f"Error reading cache entry: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            now = self.clock()
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self.connection_manager.transaction() as conn:
+                conn.execute("""
+                    INSERT INTO cache_entries (namespace, key, value, expires_at, accessed_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(namespace, key) DO UPDATE SET
+                        value = excluded.value, expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+                """, (self.namespace, key, blob, now + ttl, now))
+            with self._lock:
+                self._writes += 1
+                due = self._writes % self.EVICT_EVERY == 0
+            if due:
+                self.evict()
+        except Exception as e:
+            print(f"Error writing cache entry: {e}")
+
+    def evict(self) -> int:
+        """Drop expired rows, then the least recently used beyond max_entries"""
+        with self.connection_manager.transaction() as conn:
+            now = self.clock()
+            removed = conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?",
+                                   (self.namespace, now)).rowcount
+            conn.execute("DELETE FROM cache_counters WHERE namespace = ? AND expires_at <= ?", (self.namespace, now))
+            count = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                                 (self.namespace,)).fetchone()[0]
+            if count > self.max_entries:
+                removed += conn.execute("""
+                    DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                        SELECT key FROM cache_entries WHERE namespace = ? ORDER BY accessed_at LIMIT ?)
+                """, (self.namespace, self.namespace, count - self.max_entries)).rowcount
+        with self._lock:
+            self._evictions += removed
+        return removed
+
+    def delete(self, key: str) -> None:
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key))
+        except Exception as e:
+            print(f"Error deleting cache entry: {e}")
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        try:
+            now = self.clock()
+            with self.connection_manager.transaction() as conn:
+                value = conn.execute("""
+                    INSERT INTO cache_counters (namespace, key, value, expires_at) VALUES (?, ?, 1, ?)
+                    ON CONFLICT(namespace, key) DO UPDATE SET
+                        value = CASE WHEN expires_at <= ? THEN 1 ELSE value + 1 END,
+                        expires_at = CASE WHEN expires_at <= ? THEN excluded.expires_at ELSE expires_at END
+                    RETURNING value
+                """, (self.namespace, key, None if ttl is None else now + ttl, now, now)).fetchone()[0]
+            if ttl is not None:
+                with self._lock:
+                    self._writes += 1
+                    due = self._writes % self.EVICT_EVERY == 0
+                if due:
+                    self.evict()
+            return value
+        except Exception as e:
+            print(f"Error incrementing cache counter: {e}")
+            return 0
+
+    def counter(self, key: str) -> int:
+        try:
+            with self.connection_manager.connection() as conn:
+                row = conn.execute("""
+                    SELECT value FROM cache_counters
+                    WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)
+                """, (self.namespace, key, self.clock())).fetchone()
+            return row[0] if row else 0
+        except Exception as e:
+            print(f"Error reading cache counter: {e}")
+            return 0
+
+    def clear(self) -> None:
+        try:
+            with self.connection_manager.transaction() as conn:
+                conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+        except Exception as e:
+            print(f"Error clearing cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with self.connection_manager.connection() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM cache_entries WHERE namespace = ?",
+                                       (self.namespace,)).fetchone()[0]
+        except sqlite3.Error:
+            entries = None
+        return {'backend': 'sqlite', 'entries': entries, 'evictions': self._evictions}
+
+
+class RedisError(Exception):
+    """An error reply from the server"""
+
+
+class RedisCacheBackend(ICacheBackend):
+    """Entries on a Redis-protocol server, spoken over a plain socket
+
+    Only GET, SET PX, DEL, INCR, PEXPIRE and SCAN are used, so any RESP2 server
+    (Redis, Valkey, KeyDB, a test fake) works. Capacity is the server's own
+    maxmemory policy; use volatile-lru so the version counters, which have
+    no TTL, are never evicted.
+    """
+
+    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0,
+                 namespace: str = 'cache', timeout: float = 0.5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.prefix = f"healthtracker:{namespace}:"
+        self.timeout = timeout
+        self._local = threading.local()
+
+    # -- RESP ---------------------------------------------------------------
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._local.sock, self._local.reader = sock, sock.makefile('rb')
+        if self.db:
+            self._roundtrip('SELECT', self.db)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("connection closed")
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            raise RedisError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(body)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise ConnectionError(f"unexpected reply: {line!r}")
+
+    def _roundtrip(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(f"${len(data)}\r\n".encode() + data + b"\r\n")
+        self._local.sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _command(self, *args):
+        """Send a command, reconnecting once if the connection went away"""
+        for attempt in range(2):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                return self._roundtrip(*args)
+            except (OSError, ConnectionError):
+                self._close()
+                if attempt:
+                    raise
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = self._local.reader = None
+
+    # -- ICacheBackend --------------------------------------------------------
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            data = self._command('GET', self.prefix + key)
+            return None if data is None else pickle.loads(data)
+        except Exception as e:
+            print(f"Error reading cache entry: {e}")
+            return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        try:
+            self._command('SET', self.prefix + key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+                          'PX', max(1, int(ttl * 1000)))
+        except Exception as e:
+            print(f"Error writing cache entry: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._command('DEL', self.prefix + key)
+        except Exception as e:
+            print(f"Error deleting cache entry: {e}")
+
+    def incr(self, key: str, ttl: Optional[float] = None) -> int:
+        try:
+            value = self._command('INCR', self.prefix + 'counter:' + key)
+            if value == 1 and ttl is not None:
+                self._command('PEXPIRE', self.prefix + 'counter:' + key, max(1, int(ttl * 1000)))
+            return value
+        except Exception as e:
+            print(f"Error incrementing cache counter: {e}")
+            return 0
+
+    def counter(self, key: str) -> int:
+        try:
+            value = self._command('GET', self.prefix + 'counter:' + key)
+            return int(value) if value is not None else 0
+        except Exception as e:
+            print(f"Error reading cache counter: {e}")
+            return 0
+
+    def clear(self) -> None:
+        try:
+            cursor = '0'
+            while True:
+                cursor, keys = self._command('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 1000)
+                cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+                doomed = [k for k in keys if not k.startswith((self.prefix + 'counter:').encode())]
+                if doomed:
+                    self._command('DEL', *doomed)
+                if cursor == '0':
+                    break
+        except Exception as e:
+            print(f"Error clearing cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': 'redis', 'server': f"{self.host}:{self.port}/{self.db}"}
+
+
+def build_cache_backend(url: str, namespace: str, max_entries: int = 4096,
+                        default_path: str = 'healthTracker.cache.db') -> ICacheBackend:
+    """Backend for a cache URL ('memory', 'sqlite:///path', 'redis://host:port/db')"""
+    parsed = urlparse(url or DEFAULT_CACHE_URL)
+    if parsed.scheme in ('', 'memory'):
+        return MemoryCacheBackend(max_entries)
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db and sqlite:////absolute/path.db as in SQLAlchemy URLs; sqlite:// for the default
+        return SQLiteCacheBackend(parsed.path[1:] or default_path, namespace, max_entries)
+    if parsed.scheme == 'redis':
+        db = int(parsed.path.lstrip('/') or 0)
+        return RedisCacheBackend(parsed.hostname or 'localhost', parsed.port or 6379, db, namespace)
+    raise ValueError(f"Unsupported cache URL: {url}")
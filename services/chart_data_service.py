@@ -0,0 +1,92 @@
+"""
+Chart data service: fixed-size, server-side reduced series for Chart.js
+"""
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from interfaces.repositories import IHealthDataRepository, ILifestyleRepository
+from interfaces.services import IChartDataService
+from services.batch_classifier import calculate_bmi
+from services.downsampling import DOWNSAMPLERS, RESOLUTIONS, bucket
+from services.vitals_series import VitalsSeriesCache, as_time
+
+
+DEFAULT_POINTS = 200
+MAX_POINTS = 1000
+CHART_SERIES = ('height_weight', 'calories')
+
+
+class ChartDataService(IChartDataService):
+    """Loads a series, buckets it by calendar period and downsamples it to a point budget"""
+
+    def __init__(self, health_data_repository: IHealthDataRepository,
+                 lifestyle_repository: ILifestyleRepository,
+                 vitals_series: Optional[VitalsSeriesCache] = None):
+        self.health_data_repository = health_data_repository
+        self.lifestyle_repository = lifestyle_repository
+        self.vitals_series = vitals_series or VitalsSeriesCache(health_data_repository)
+
+    def get_series(self, user_id: int, series: str, points: Optional[int] = None,
+                   resolution: str = 'raw', method: str = 'lttb',
+                   start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """Get one chart series as labels plus named datasets
+
+        Raises ValueError for an unknown series, resolution, method or date.
+        """
+        if series not in CHART_SERIES:
+            raise ValueError(f"unknown series: {series}")
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"unknown resolution: {resolution}")
+        if method not in DOWNSAMPLERS:
+            raise ValueError(f"unknown method: {method}")
+        for value in (start, end):
+            if value:
+                date.fromisoformat(value)
+        points = max(3, min(int(points or DEFAULT_POINTS), MAX_POINTS))
+
+        if series == 'height_weight':
+            readings = self.vitals_series.get(user_id).hw.between(
+                start, as_time(end) + np.timedelta64(1, 'D') if end else None)
+            readings = readings.select(~(np.isnan(readings['height']) | np.isnan(readings['weight'])))
+            labels = readings.labels()
+            columns = {'height': readings['height'].tolist(), 'weight': readings['weight'].tolist()}
+            primary = 'weight'
+        else:
+            rows = self.lifestyle_repository.get_daily_calorie_totals(user_id, start, end)
+            labels = [r[0] for r in rows]
+            # Daily totals; week/month buckets report the average day
+            columns = {'calories': [r[1] for r in rows]}
+            primary = 'calories'
+
+        total = len(labels)
+        labels, columns = bucket(labels, columns, resolution)
+        if len(labels) > points:
+            # Ordinal day (plus time of day) as the x axis for the triangle areas
+            xs = [self._to_x(label) for label in labels]
+            keep = DOWNSAMPLERS[method](xs, columns[primary], points)
+            labels = [labels[i] for i in keep]
+            columns = {name: [values[i] for i in keep] for name, values in columns.items()}
+
+        if series == 'height_weight':
+            bmi = calculate_bmi(columns['height'], columns['weight'])
+            columns['bmi'] = [None if np.isnan(v) else float(v) for v in bmi]
+        return {
+            'series': series,
+            'resolution': resolution,
+            'method': method,
+            'total_points': total,
+            'labels': labels,
+            'datasets': {name: [round(v, 1) if v is not None else None for v in values]
+                         for name, values in columns.items()}
+        }
+
+    @staticmethod
+    def _to_x(label: str) -> float:
+        if len(label) == 7:  # month bucket 'YYYY-MM'
+            label += '-01'
+        x = float(date.fromisoformat(label[:10]).toordinal())
+        if len(label) >= 16:
+            x += (int(label[11:13]) * 60 + int(label[14:16])) / 1440
+        return x
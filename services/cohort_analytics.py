@@ -0,0 +1,140 @@
+"""
+Population cohort analytics: BP and BMI category prevalence by age band and gender
+
+An offline run splits the user id range into shards. Each worker process
+streams its shard's latest vitals in chunks, classifies a whole chunk with
+the batch classifier and adds it into a count cube of
+(age band x gender x category) with one bincount. The parent sums the cubes
+and stores the run in cohort_report.
+"""
+import multiprocessing
+import os
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database.connection_manager import ConnectionManager
+from interfaces.services import ICohortAnalyticsService
+from models.domain import CohortReportRow
+from repositories.cohort_repository import CohortRepository, VitalsRow
+from services.batch_classifier import AGE_BANDS, BMI_CATEGORIES, BP_CATEGORIES, classify_age, evaluate_batch
+
+
+UNKNOWN = "未知"
+NO_DATA = "無資料"
+# Index 0 of every axis collects INVALID codes
+AGE_AXIS = (UNKNOWN,) + AGE_BANDS
+GENDER_AXIS = (UNKNOWN, 'male', 'female')
+CATEGORY_AXES = {
+    'blood_pressure': (NO_DATA,) + BP_CATEGORIES,
+    'bmi': (NO_DATA,) + BMI_CATEGORIES,
+}
+_GENDER_CODES = {gender: code for code, gender in enumerate(GENDER_AXIS) if code}
+
+DEFAULT_CHUNK_SIZE = 10000
+SHARDS_PER_WORKER = 4
+
+
+def empty_counts() -> Dict[str, np.ndarray]:
+    return {metric: np.zeros((len(AGE_AXIS), len(GENDER_AXIS), len(categories)), dtype=np.int64)
+            for metric, categories in CATEGORY_AXES.items()}
+
+
+def count_chunk(rows: Sequence[VitalsRow]) -> Dict[str, np.ndarray]:
+    """Count cubes for one chunk of (id, gender, age, systolic, diastolic, height, weight) rows"""
+    counts = empty_counts()
+    if not rows:
+        return counts
+    _, genders, ages, systolic, diastolic, height, weight = zip(*rows)
+    age = classify_age(ages).astype(np.intp) + 1
+    gender = np.fromiter((_GENDER_CODES.get(g, 0) for g in genders), dtype=np.intp, count=len(rows))
+    cohort = age * len(GENDER_AXIS) + gender
+    result = evaluate_batch(systolic, diastolic, height, weight)
+    for metric, codes in (('blood_pressure', result.bp_codes), ('bmi', result.bmi_codes)):
+        cube = counts[metric]
+        flat = cohort * cube.shape[2] + codes.astype(np.intp) + 1
+        cube += np.bincount(flat, minlength=cube.size).reshape(cube.shape)
+    return counts
+
+
+def shard_ranges(low: int, high: int, shards: int) -> List[Tuple[int, int]]:
+    """Split the inclusive id range [low, high] into at most ``shards`` contiguous ranges"""
+    if high < low:
+        return []
+    shards = max(1, min(shards, high - low + 1))
+    bounds = np.linspace(low, high + 1, shards + 1).astype(np.int64)
+    return [(int(a), int(b) - 1) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _count_shard(task: Tuple[str, List[Tuple[str, Any]], int, int, str, int]) -> Dict[str, np.ndarray]:
+    """Worker entry point: count one shard over its own connection"""
+    db_path, pragmas, first_id, last_id, as_of, chunk_size = task
+    connection_manager = ConnectionManager(db_path, pragmas=pragmas)
+    try:
+        repository = CohortRepository(db_path, connection_manager)
+        totals = empty_counts()
+        for rows in repository.iter_latest_vitals(first_id, last_id, as_of, chunk_size):
+            for metric, cube in count_chunk(rows).items():
+                totals[metric] += cube
+        return totals
+    finally:
+        connection_manager.close_all()
+
+
+def tabulate(counts: Dict[str, np.ndarray], generated_at: str, as_of: str) -> List[CohortReportRow]:
+    """Report rows for every non-empty cell; prevalence is among the cohort's classified users"""
+    rows = []
+    for metric, cube in counts.items():
+        categories = CATEGORY_AXES[metric]
+        classified = cube[:, :, 1:].sum(axis=2)
+        for a, g, c in zip(*np.nonzero(cube)):
+            users = int(cube[a, g, c])
+            prevalence = users / int(classified[a, g]) if c and classified[a, g] else None
+            rows.append(CohortReportRow(
+                generated_at=generated_at, as_of=as_of, metric=metric, age_band=AGE_AXIS[a],
+                gender=GENDER_AXIS[g], category=categories[c], users=users, prevalence=prevalence
+            ))
+    return rows
+
+
+class CohortAnalyticsService(ICohortAnalyticsService):
+    """Runs the sharded cohort aggregation and reads back its reports"""
+
+    def __init__(self, cohort_repository: CohortRepository):
+        self.cohort_repository = cohort_repository
+
+    def run(self, workers: Optional[int] = None, shards: Optional[int] = None,
+            chunk_size: int = DEFAULT_CHUNK_SIZE, as_of: Optional[str] = None) -> List[CohortReportRow]:
+        """Aggregate every user's latest vitals and store the report; [] if it cannot be saved
+
+        Raises ValueError for an invalid as_of date.
+        """
+        as_of = date.fromisoformat(as_of).isoformat() if as_of else date.today().isoformat()
+        workers = max(1, workers or os.cpu_count() or 1)
+        low, high = self.cohort_repository.get_user_id_range()
+        repository = self.cohort_repository
+        tasks = [(repository.db_path, repository.connection_manager.pragmas, first, last, as_of, chunk_size)
+                 for first, last in shard_ranges(low, high, shards or workers * SHARDS_PER_WORKER)]
+
+        generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if workers == 1 or len(tasks) < 2:
+            counts = self._sum(map(_count_shard, tasks))
+        else:
+            with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+                counts = self._sum(pool.imap_unordered(_count_shard, tasks))
+
+        rows = tabulate(counts, generated_at, as_of)
+        return rows if repository.save_report(rows) else []
+
+    def get_latest_report(self, metric: Optional[str] = None) -> List[CohortReportRow]:
+        """Get the rows of the most recent report run"""
+        return self.cohort_repository.get_latest_report(metric)
+
+    @staticmethod
+    def _sum(parts: Iterable[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        totals = empty_counts()
+        for part in parts:
+            for metric, cube in part.items():
+                totals[metric] += cube
+        return totals
@@ -0,0 +1,70 @@
+"""
+Dashboard service implementation following SOLID principles
+"""
+import time
+from datetime import datetime, date
+from typing import Optional
+
+from interfaces.services import IDashboardService
+from models.domain import DashboardSnapshot
+from repositories.dashboard_repository import DashboardRepository
+from services.health_evaluation_service import HealthEvaluationService
+
+
+class DashboardService(IDashboardService):
+    """Builds the dashboard snapshot from one repository read"""
+
+    def __init__(self, dashboard_repository: DashboardRepository, health_service: HealthEvaluationService):
+        self.dashboard_repository = dashboard_repository
+        self.health_service = health_service
+
+    def get_snapshot(self, user_id: int, today: Optional[date] = None) -> Optional[DashboardSnapshot]:
+        """Get everything the dashboard shows for a user, with per-section timings"""
+        today = today or date.today()
+        timings = {}
+        started = section = time.perf_counter()
+
+        def lap(name: str):
+            nonlocal section
+            now = time.perf_counter()
+            timings[name] = (now - section) * 1000
+            section = now
+
+        data = self.dashboard_repository.get_dashboard_data(user_id, today.strftime('%Y-%m-%d'))
+        lap('query')
+        if data is None:
+            return None
+
+        age_str, age_years = self.health_service.calculate_age_and_days(data['birthday'])
+        lap('profile')
+
+        appointment = data['appointment']
+        if appointment:
+            appt_date = datetime.strptime(appointment['date'], '%Y-%m-%d').date()
+            appointment['days_left'] = (appt_date - today).days
+        lap('appointment')
+
+        bp = data['blood_pressure']
+        hw = data['height_weight']
+        bp_evaluation = self.health_service.evaluate_blood_pressure(
+            {'systolic': bp.systolic, 'diastolic': bp.diastolic} if bp else None)
+        bmi_evaluation = self.health_service.evaluate_bmi(
+            {'height': hw.height, 'weight': hw.weight} if hw else None, data['gender'], age_years)
+        lap('evaluation')
+
+        timings['total'] = (time.perf_counter() - started) * 1000
+        return DashboardSnapshot(
+            user_id=user_id,
+            gender=data['gender'],
+            birthday=data['birthday'],
+            age_str=age_str,
+            age_years=age_years,
+            latest_blood_pressure=bp,
+            latest_height_weight=hw,
+            next_appointment=appointment,
+            today_mood=data['mood'],
+            bp_evaluation=bp_evaluation,
+            bmi_evaluation=bmi_evaluation,
+            alerts=data['alerts'],
+            timings=timings
+        )
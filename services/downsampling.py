@@ -0,0 +1,98 @@
+"""
+Time-series reduction for charts: calendar bucketing, LTTB and min-max
+
+The downsamplers return indices into the input, so a chart with several
+series sharing one x axis (height, weight, BMI) can keep the same points
+for all of them while choosing those points from the primary series.
+"""
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Sequence, Tuple
+
+
+RESOLUTIONS = ('raw', 'day', 'week', 'month')
+
+
+def bucket_key(timestamp: str, resolution: str) -> str:
+    """Label of the calendar bucket a 'YYYY-MM-DD[ HH:MM:SS]' timestamp falls in"""
+    if resolution == 'day':
+        return timestamp[:10]
+    if resolution == 'week':
+        day = date.fromisoformat(timestamp[:10])
+        return (day - timedelta(days=day.weekday())).isoformat()  # Monday of the ISO week
+    if resolution == 'month':
+        return timestamp[:7]
+    return timestamp
+
+
+def bucket(labels: Sequence[str], columns: Dict[str, Sequence[float]],
+           resolution: str) -> Tuple[List[str], Dict[str, List[float]]]:
+    """Average each column over day/week/month buckets; labels must be sorted"""
+    if resolution == 'raw':
+        return list(labels), {name: list(values) for name, values in columns.items()}
+    out_labels: List[str] = []
+    sums = {name: [] for name in columns}
+    counts: List[int] = []
+    for i, label in enumerate(labels):
+        key = bucket_key(label, resolution)
+        if not out_labels or out_labels[-1] != key:
+            out_labels.append(key)
+            counts.append(0)
+            for name in columns:
+                sums[name].append(0.0)
+        counts[-1] += 1
+        for name, values in columns.items():
+            sums[name][-1] += values[i]
+    return out_labels, {name: [total / n for total, n in zip(totals, counts)]
+                        for name, totals in sums.items()}
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """Largest-Triangle-Three-Buckets: indices of ``threshold`` visually significant points"""
+    n = len(ys)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the triangle's third vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        span = next_end - next_start
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(ys[next_start:next_end]) / span
+
+        best, best_area = -1, -1.0
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+def min_max(ys: Sequence[float], threshold: int) -> List[int]:
+    """Keep the minimum and maximum of each bucket so spikes survive; at most ``threshold`` indices"""
+    n = len(ys)
+    if threshold >= n or threshold < 4:
+        return list(range(n))
+    buckets = (threshold - 2) // 2
+    size = (n - 2) / buckets
+    selected = [0]
+    for b in range(buckets):
+        start = int(b * size) + 1
+        end = int((b + 1) * size) + 1
+        window = range(start, end)
+        low = min(window, key=ys.__getitem__)
+        high = max(window, key=ys.__getitem__)
+        selected.extend(sorted({low, high}))
+    selected.append(n - 1)
+    return selected
+
+
+DOWNSAMPLERS: Dict[str, Callable[[Sequence[float], Sequence[float], int], List[int]]] = {
+    'lttb': lttb,
+    'minmax': lambda xs, ys, threshold: min_max(ys, threshold),
+}
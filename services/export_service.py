@@ -0,0 +1,75 @@
+"""
+Export service: streams a user's health history as CSV or NDJSON
+"""
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from interfaces.services import IExportService
+from repositories.export_repository import ExportRepository, EXPORT_TABLES, EXPORT_TABLES_BY_NAME
+
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+FLUSH_SIZE = 64 * 1024
+
+
+class ExportService(IExportService):
+    """Turns repository batches into CSV or NDJSON chunks"""
+
+    def __init__(self, export_repository: ExportRepository):
+        self.export_repository = export_repository
+
+    def stream(self, user_id: int, fmt: str = 'csv', tables: Optional[List[str]] = None,
+               start: Optional[str] = None, end: Optional[str] = None) -> Iterator[str]:
+        """Validate the request and return a lazy iterator of text chunks
+
+        Raises ValueError for an unknown format, table or malformed date. CSV
+        output has one section per table: a header row prefixed with the
+        table name, its rows, and a blank line before the next table.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"unknown format: {fmt}")
+        unknown = [name for name in tables or [] if name not in EXPORT_TABLES_BY_NAME]
+        if unknown:
+            raise ValueError(f"unknown tables: {', '.join(unknown)}")
+        for value in (start, end):
+            if value:
+                datetime.strptime(value, '%Y-%m-%d')
+        selected = [t for t in EXPORT_TABLES if not tables or t.name in tables]
+        batches = self.export_repository.iter_history(user_id, selected, start, end)
+        return self._csv(batches) if fmt == 'csv' else self._ndjson(batches)
+
+    def _csv(self, batches) -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        current = None
+        for table, rows in batches:
+            if table is not current:
+                if current is not None:
+                    writer.writerow([])
+                writer.writerow(['table', *table.columns])
+                current = table
+            writer.writerows([table.name, *row] for row in rows)
+            if buffer.tell() >= FLUSH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    def _ndjson(self, batches) -> Iterator[str]:
+        chunk = []
+        size = 0
+        for table, rows in batches:
+            for row in rows:
+                line = json.dumps({'table': table.name, **dict(zip(table.columns, row))},
+                                  ensure_ascii=False) + '\n'
+                chunk.append(line)
+                size += len(line)
+            if size >= FLUSH_SIZE:
+                yield ''.join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield ''.join(chunk)
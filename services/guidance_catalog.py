@@ -0,0 +1,80 @@
+"""
+Age-bracket health guidance catalog
+
+Guidance text lives in health_guidance.json as bracket tables, each keyed
+by an optional gender and an optional condition (e.g. "hypertension"). A
+table's brackets start at age 0 and list the min_age where each bracket
+begins. The file is parsed once into immutable tuples; a lookup is a bisect
+over the bracket bounds and returns shared Guidance objects, so it builds
+no strings or lists. Bump "version" whenever the text changes.
+"""
+import bisect
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'health_guidance.json')
+
+
+@dataclass(frozen=True)
+class Guidance:
+    """Disease information and prevention tips for one bracket"""
+    disease_info: Tuple[str, ...]
+    prevention: Tuple[str, ...]
+
+
+TableKey = Tuple[Optional[str], Optional[str]]  # (gender, condition)
+
+
+class GuidanceCatalog:
+    """Immutable bracket tables; the (None, None) table is the fallback for every lookup"""
+
+    def __init__(self, version: int, tables: Dict[TableKey, Tuple[Tuple[int, ...], Tuple[Guidance, ...]]]):
+        if (None, None) not in tables:
+            raise ValueError("catalog needs a table without gender or condition")
+        self.version = version
+        self._tables = dict(tables)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'GuidanceCatalog':
+        """Build a catalog from parsed JSON; raises ValueError for malformed brackets"""
+        tables = {}
+        for table in data['tables']:
+            key = (table.get('gender'), table.get('condition'))
+            if key in tables:
+                raise ValueError(f"duplicate guidance table: {key}")
+            bounds = tuple(int(b['min_age']) for b in table['brackets'])
+            if not bounds or bounds[0] != 0 or any(a >= b for a, b in zip(bounds, bounds[1:])):
+                raise ValueError(f"brackets of {key} must start at 0 and increase: {bounds}")
+            tables[key] = (bounds, tuple(Guidance(tuple(b['disease_info']), tuple(b['prevention']))
+                                         for b in table['brackets']))
+        return cls(int(data['version']), tables)
+
+    @classmethod
+    def load(cls, path: str = CATALOG_PATH) -> 'GuidanceCatalog':
+        """Load a catalog file"""
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+    def bounds(self, gender: Optional[str] = None, condition: Optional[str] = None) -> Tuple[int, ...]:
+        """Bracket start ages of the table a lookup with these keys would use"""
+        return self._table(gender, condition)[0]
+
+    def lookup(self, age: int, gender: Optional[str] = None, condition: Optional[str] = None) -> Guidance:
+        """Guidance for an age; falls back from (gender, condition) to condition, gender, then general"""
+        bounds, entries = self._table(gender, condition)
+        return entries[max(bisect.bisect_right(bounds, age) - 1, 0)]
+
+    def _table(self, gender: Optional[str], condition: Optional[str]):
+        tables = self._tables
+        return (tables.get((gender, condition)) or tables.get((None, condition))
+                or tables.get((gender, None)) or tables[(None, None)])
+
+
+@lru_cache(maxsize=None)
+def default_catalog() -> GuidanceCatalog:
+    """The bundled catalog, loaded on first use and shared afterwards"""
+    return GuidanceCatalog.load()
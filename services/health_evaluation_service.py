@@ -6,14 +6,33 @@ from typing import Dict, Any, List, Optional
 from datetime import datetime, date
 from interfaces.services import IHealthEvaluationService
 from interfaces.repositories import IUserRepository, IHealthDataRepository
+from models.domain import BloodPressureRecord, HeightWeightRecord, Page
+from services.batch_classifier import BP_RECOMMENDATIONS, BMI_RECOMMENDATIONS, evaluate_batch
+from services.guidance_catalog import GuidanceCatalog, default_catalog
+from services.result_cache import ResultCache, next_midnight
+from services.vitals_series import VitalsSeriesCache
 
 
 class HealthEvaluationService(IHealthEvaluationService):
     """Implementation of health evaluation service"""
     
-    def __init__(self, user_repository: IUserRepository, health_data_repository: IHealthDataRepository):
+    def __init__(self, user_repository: IUserRepository, health_data_repository: IHealthDataRepository,
+                 guidance_catalog: Optional[GuidanceCatalog] = None,
+                 vitals_series: Optional[VitalsSeriesCache] = None,
+                 result_cache: Optional[ResultCache] = None):
         self.user_repository = user_repository
         self.health_data_repository = health_data_repository
+        self.guidance_catalog = guidance_catalog or default_catalog()
+        self.vitals_series = vitals_series or VitalsSeriesCache(health_data_repository)
+        self.result_cache = result_cache
+    
+    def _cached(self, user_id: Optional[int], name: str, args: tuple, compute,
+                until_midnight: bool = False):
+        """Serve compute() through the result cache when one is configured"""
+        if self.result_cache is None:
+            return compute()
+        expires_at = next_midnight(self.result_cache.clock()) if until_midnight else None
+        return self.result_cache.get_or_compute(user_id, name, args, compute, expires_at)
     
     def calculate_bmi(self, height: float, weight: float) -> float:
         """Calculate BMI"""
@@ -77,35 +96,41 @@ class HealthEvaluationService(IHealthEvaluationService):
     def get_health_trends(self, user_id: int) -> Dict[str, Any]:
         """Get health trends for user"""
         try:
-            # Get recent records
-            bp_records = self.health_data_repository.get_blood_pressure_records_by_user(user_id)
-            hw_records = self.health_data_repository.get_height_weight_records_by_user(user_id)
+            # Latest 10 readings of each kind as column views, newest first
+            series = self.vitals_series.get(user_id)
+            bp, hw = series.bp.tail(10), series.hw.tail(10)
             
-            # Prepare trend data (latest 10 records)
-            bp_trend = []
-            for record in bp_records[:10]:
-                bp_trend.append({
-                    'date': record.date,
-                    'systolic': record.systolic,
-                    'diastolic': record.diastolic,
-                    'category': self.evaluate_blood_pressure(record.systolic, record.diastolic)
-                })
+            # Classify every reading in one vectorized pass
+            evaluation = evaluate_batch(
+                systolic=bp['systolic'],
+                diastolic=bp['diastolic'],
+                height=hw['height'],
+                weight=hw['weight']
+            )
             
-            weight_trend = []
-            bmi_trend = []
-            for record in hw_records[:10]:
-                weight_trend.append({
-                    'date': record.date,
-                    'weight': record.weight
-                })
-                
-                if record.height > 0:
-                    bmi = self.calculate_bmi(record.height, record.weight)
-                    bmi_trend.append({
-                        'date': record.date,
-                        'bmi': round(bmi, 1),
-                        'category': self.evaluate_bmi(bmi)
-                    })
+            bp_trend = [
+                {
+                    'date': label[:10],
+                    'systolic': systolic if systolic is None else int(systolic),
+                    'diastolic': diastolic if diastolic is None else int(diastolic),
+                    'category': category
+                }
+                for label, systolic, diastolic, category in zip(
+                    bp.labels(), bp.values('systolic'), bp.values('diastolic'), evaluation.bp_labels())
+            ][::-1]
+            
+            hw_days = [label[:10] for label in hw.labels()]
+            weight_trend = [{'date': day, 'weight': weight}
+                            for day, weight in zip(hw_days, hw.values('weight'))][::-1]
+            bmi_trend = [
+                {
+                    'date': day,
+                    'bmi': round(bmi, 1),
+                    'category': category
+                }
+                for day, bmi, category in zip(hw_days, evaluation.bmi.tolist(), evaluation.bmi_labels())
+                if category is not None
+            ][::-1]
             
             return {
                 'blood_pressure_trend': bp_trend,
@@ -128,8 +153,8 @@ class HealthEvaluationService(IHealthEvaluationService):
                 return {}
             
             # Get latest records
-            bp_records = self.health_data_repository.get_blood_pressure_records_by_user(user_id)
-            hw_records = self.health_data_repository.get_height_weight_records_by_user(user_id)
+            latest_bp = self.health_data_repository.get_latest_blood_pressure_record(user_id)
+            latest_hw = self.health_data_repository.get_latest_height_weight_record(user_id)
             
             summary = {
                 'user_info': {
@@ -140,8 +165,7 @@ class HealthEvaluationService(IHealthEvaluationService):
             }
             
             # Blood pressure summary
-            if bp_records:
-                latest_bp = bp_records[0]
+            if latest_bp:
                 summary['blood_pressure'] = {
                     'systolic': latest_bp.systolic,
                     'diastolic': latest_bp.diastolic,
@@ -152,8 +176,7 @@ class HealthEvaluationService(IHealthEvaluationService):
                 summary['blood_pressure'] = None
             
             # BMI summary
-            if hw_records:
-                latest_hw = hw_records[0]
+            if latest_hw:
                 if latest_hw.height > 0:
                     bmi = self.calculate_bmi(latest_hw.height, latest_hw.weight)
                     summary['bmi'] = {
@@ -212,11 +235,11 @@ class HealthEvaluationService(IHealthEvaluationService):
     
     def get_user_profile(self, user_id: int) -> tuple:
         """Get user profile (gender, birthday)"""
-        try:
+        def load():
             user = self.user_repository.get_user_by_id(user_id)
-            if user:
-                return (user.gender, user.birthday)
-            return (None, None)
+            return (user.gender, user.birthday) if user else (None, None)
+        try:
+            return self._cached(user_id, 'profile', (), load)
         except Exception as e:
             print(f"Error getting user profile: {e}")
             return (None, None)
@@ -235,7 +258,11 @@ class HealthEvaluationService(IHealthEvaluationService):
             return False
     
     def calculate_age_and_days(self, birthday: str) -> tuple:
-        """Calculate age and days lived"""
+        """Calculate age and days lived (cached until midnight)"""
+        return self._cached(None, 'age', (birthday,), lambda: self._age_and_days(birthday),
+                            until_midnight=True)
+    
+    def _age_and_days(self, birthday: str) -> tuple:
         if not birthday:
             return ("未設定", 0)
         
@@ -249,67 +276,46 @@ class HealthEvaluationService(IHealthEvaluationService):
         except:
             return ("計算錯誤", 0)
     
-    def get_disease_info_and_prevention(self, age: int) -> tuple:
-        """Get disease information and prevention tips based on age"""
-        if age < 20:
-            disease_info = "青少年時期應注意：生長發育、營養均衡、運動習慣養成"
-            prevention = "建議：規律作息、均衡飲食、適度運動、避免熬夜"
-        elif age < 30:
-            disease_info = "青年時期應注意：代謝症候群預防、壓力管理"
-            prevention = "建議：定期健檢、維持運動習慣、注意心理健康"
-        elif age < 40:
-            disease_info = "成年時期應注意：高血壓、糖尿病、心血管疾病預防"
-            prevention = "建議：年度健檢、控制體重、戒菸限酒、壓力管理"
-        elif age < 50:
-            disease_info = "中年時期應注意：代謝疾病、癌症篩檢、骨質疏鬆預防"
-            prevention = "建議：定期癌症篩檢、補充鈣質、維持肌力訓練"
-        elif age < 65:
-            disease_info = "中老年時期應注意：心血管疾病、糖尿病併發症、關節退化"
-            prevention = "建議：定期追蹤慢性病、適度運動、社交活動參與"
-        else:
-            disease_info = "高齡時期應注意：失智症預防、跌倒預防、營養不良"
-            prevention = "建議：認知訓練、居家安全、營養評估、定期健檢"
-        
-        return (disease_info, prevention)
+    def get_disease_info_and_prevention(self, age: int, gender: Optional[str] = None) -> tuple:
+        """Get (disease info, prevention tips) for an age from the guidance catalog"""
+        guidance = self.guidance_catalog.lookup(age, gender)
+        return (guidance.disease_info, guidance.prevention)
     
-    def get_blood_pressure_records(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get blood pressure records for user"""
-        try:
-            records = self.health_data_repository.get_blood_pressure_records_by_user(user_id)
-            return [
-                {
-                    'id': record.id,
-                    'systolic': record.systolic,
-                    'diastolic': record.diastolic,
-                    'pulse': record.pulse,
-                    'notes': record.notes,
-                    'date': record.date,
-                    'created_at': record.created_at
-                }
-                for record in records
-            ]
-        except Exception as e:
-            print(f"Error getting blood pressure records: {e}")
-            return []
+    def get_blood_pressure_records(self, user_id: int) -> List[BloodPressureRecord]:
+        """Get blood pressure records for user, newest first"""
+        return self.health_data_repository.get_blood_pressure_records_by_user(user_id)
     
-    def get_height_weight_records(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get height/weight records for user"""
-        try:
-            records = self.health_data_repository.get_height_weight_records_by_user(user_id)
-            return [
-                {
-                    'id': record.id,
-                    'height': record.height,
-                    'weight': record.weight,
-                    'notes': record.notes,
-                    'date': record.date,
-                    'created_at': record.created_at
-                }
-                for record in records
-            ]
-        except Exception as e:
-            print(f"Error getting height/weight records: {e}")
-            return []
+    def get_height_weight_records(self, user_id: int) -> List[HeightWeightRecord]:
+        """Get height/weight records for user, newest first"""
+        return self.health_data_repository.get_height_weight_records_by_user(user_id)
+    
+    def get_blood_pressure_records_page(self, user_id: int, limit: Optional[int] = None,
+                                        cursor: Optional[str] = None) -> Page:
+        """Get one page of blood pressure records for user"""
+        return self.health_data_repository.get_blood_pressure_records_page(user_id, limit, cursor)
+    
+    def get_height_weight_records_page(self, user_id: int, limit: Optional[int] = None,
+                                       cursor: Optional[str] = None) -> Page:
+        """Get one page of height/weight records for user"""
+        return self.health_data_repository.get_height_weight_records_page(user_id, limit, cursor)
+    
+    def evaluate_latest_blood_pressure(self, user_id: int) -> Dict[str, str]:
+        """Evaluate the user's most recent blood pressure record"""
+        def evaluate():
+            record = self.health_data_repository.get_latest_blood_pressure_record(user_id)
+            if not record:
+                return self.evaluate_blood_pressure(None)
+            return self.evaluate_blood_pressure({'systolic': record.systolic, 'diastolic': record.diastolic})
+        return self._cached(user_id, 'bp_evaluation', (), evaluate)
+    
+    def evaluate_latest_bmi(self, user_id: int, gender: str, age: int) -> Dict[str, str]:
+        """Evaluate BMI from the user's most recent height/weight record"""
+        def evaluate():
+            record = self.health_data_repository.get_latest_height_weight_record(user_id)
+            if not record:
+                return self.evaluate_bmi(None, gender, age)
+            return self.evaluate_bmi({'height': record.height, 'weight': record.weight}, gender, age)
+        return self._cached(user_id, 'bmi_evaluation', (gender, age), evaluate)
     
     def evaluate_blood_pressure(self, bp_record: Optional[Dict]) -> Dict[str, str]:
         """Evaluate blood pressure record (dict input)"""
@@ -318,17 +324,9 @@ class HealthEvaluationService(IHealthEvaluationService):
         systolic = bp_record.get('systolic', 0)
         diastolic = bp_record.get('diastolic', 0)
         category = self._bp_category(systolic, diastolic)
-        recommendations = {
-            "低血壓": "建議諮詢醫師，注意水分攝取，避免突然起身",
-            "正常血壓": "請保持良好的生活習慣",
-            "血壓偏高": "建議減少鈉攝取，增加運動，定期監測",
-            "第一期高血壓": "建議就醫諮詢，調整生活型態",
-            "第二期高血壓": "建議盡快就醫治療",
-            "高血壓危機": "請立即就醫！"
-        }
         return {
             'status': category,
-            'recommendation': recommendations.get(category, '請諮詢醫師')
+            'recommendation': BP_RECOMMENDATIONS.get(category, '請諮詢醫師')
         }
 
     def _bp_category(self, systolic: int, diastolic: int) -> str:
@@ -355,17 +353,9 @@ class HealthEvaluationService(IHealthEvaluationService):
             return {'status': '數據錯誤', 'recommendation': '請確認身高體重數據正確性'}
         bmi = self.calculate_bmi(height, weight)
         category = self._bmi_category(bmi)
-        recommendations = {
-            "體重過輕": "建議增加營養攝取，適度重量訓練",
-            "正常體重": "請保持良好的飲食和運動習慣",
-            "體重過重": "建議控制飲食，增加有氧運動",
-            "輕度肥胖": "建議制定減重計畫，諮詢營養師",
-            "中度肥胖": "建議醫療減重介入，定期追蹤",
-            "重度肥胖": "強烈建議就醫評估，考慮醫療介入"
-        }
         return {
             'status': f"{category} (BMI: {bmi:.1f})",
-            'recommendation': recommendations.get(category, '請諮詢醫師')
+            'recommendation': BMI_RECOMMENDATIONS.get(category, '請諮詢醫師')
         }
 
     def _bmi_category(self, bmi: float) -> str:
@@ -0,0 +1,125 @@
+"""
+Bulk ingestion of home-device readings (BP cuffs, smart scales)
+"""
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from interfaces.repositories import IHealthDataRepository
+from interfaces.services import IIngestionService
+from models.domain import BloodPressureRecord, HeightWeightRecord
+
+
+MAX_BATCH_SIZE = 1000
+
+# Plausible ranges for device readings; anything outside is rejected per row
+BLOOD_PRESSURE_LIMITS = {'systolic': (50, 300), 'diastolic': (30, 200), 'pulse': (20, 250)}
+HEIGHT_WEIGHT_LIMITS = {'height': (50, 250), 'weight': (2, 400)}
+
+
+class IngestionService(IIngestionService):
+    """Validates a batch of readings and stores it with one insert per table"""
+
+    def __init__(self, health_data_repository: IHealthDataRepository):
+        self.health_data_repository = health_data_repository
+
+    def parse_payload(self, body: bytes, content_type: Optional[str]) -> List[Any]:
+        """Parse a JSON (list or {"readings": [...]}) or NDJSON request body
+
+        Raises ValueError if the body cannot be parsed or the batch is too large.
+        """
+        text = body.decode('utf-8')
+        if content_type and 'ndjson' in content_type:
+            readings = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            payload = json.loads(text)
+            readings = payload.get('readings') if isinstance(payload, dict) else payload
+            if not isinstance(readings, list):
+                raise ValueError('readings must be a list')
+        if len(readings) > MAX_BATCH_SIZE:
+            raise ValueError(f'batch exceeds {MAX_BATCH_SIZE} readings')
+        return readings
+
+    def ingest(self, user_id: int, readings: List[Any]) -> Dict[str, Any]:
+        """Validate and store readings; return a per-row result for each one"""
+        results = [{'index': i, 'status': 'invalid', 'errors': []} for i in range(len(readings))]
+        batches = {'blood_pressure': [], 'height_weight': []}
+        for i, reading in enumerate(readings):
+            record, errors = self._to_record(user_id, reading)
+            if errors:
+                results[i]['errors'] = errors
+            else:
+                batches[reading['type']].append((i, record))
+
+        for kind, batch in batches.items():
+            if not batch:
+                continue
+            records = [record for _, record in batch]
+            if kind == 'blood_pressure':
+                inserted = self.health_data_repository.bulk_create_blood_pressure_records(records)
+            else:
+                inserted = self.health_data_repository.bulk_create_height_weight_records(records)
+            for (i, _), created in zip(batch, inserted or [None] * len(batch)):
+                if created is None:
+                    results[i]['status'] = 'error'
+                    results[i]['errors'] = ['寫入失敗，請稍後再試']
+                else:
+                    results[i]['status'] = 'created' if created else 'duplicate'
+
+        summary = {status: sum(1 for r in results if r['status'] == status)
+                   for status in ('created', 'duplicate', 'invalid', 'error')}
+        return {**summary, 'results': results}
+
+    def _to_record(self, user_id: int, reading: Any) -> Tuple[Any, List[str]]:
+        if not isinstance(reading, dict):
+            return None, ['每筆資料必須是 JSON 物件']
+        kind = reading.get('type')
+        if kind not in ('blood_pressure', 'height_weight'):
+            return None, ['type 必須是 blood_pressure 或 height_weight']
+
+        errors = []
+        recorded_at = self._parse_recorded_at(reading.get('recorded_at'))
+        if not recorded_at:
+            errors.append('recorded_at 格式錯誤，請使用 ISO 8601 日期時間')
+
+        limits = BLOOD_PRESSURE_LIMITS if kind == 'blood_pressure' else HEIGHT_WEIGHT_LIMITS
+        values = {}
+        for field_name, (low, high) in limits.items():
+            value = reading.get(field_name)
+            if value is None and field_name == 'pulse':
+                values[field_name] = None
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append(f'{field_name} 必須是數字')
+            elif not low <= value <= high:
+                errors.append(f'{field_name} 超出合理範圍 ({low}-{high})')
+            else:
+                values[field_name] = value
+        if errors:
+            return None, errors
+
+        notes = reading.get('notes')
+        if kind == 'blood_pressure':
+            pulse = values['pulse']
+            return BloodPressureRecord(
+                user_id=user_id, systolic=int(values['systolic']), diastolic=int(values['diastolic']),
+                pulse=int(pulse) if pulse is not None else None, notes=notes,
+                date=recorded_at[:10], recorded_at=recorded_at
+            ), []
+        return HeightWeightRecord(
+            user_id=user_id, height=float(values['height']), weight=float(values['weight']),
+            notes=notes, date=recorded_at[:10], recorded_at=recorded_at
+        ), []
+
+    @staticmethod
+    def _parse_recorded_at(value: Any) -> Optional[str]:
+        """Normalize to the local 'YYYY-MM-DD HH:MM:SS' form the form routes store"""
+        if not isinstance(value, str):
+            return None
+        try:
+            parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed.strftime('%Y-%m-%d %H:%M:%S')
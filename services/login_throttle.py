@@ -0,0 +1,180 @@
+"""
+Sliding-window throttling of login and password reset attempts
+
+Each window is approximated from two fixed buckets, the current one and
+the one before it, with the previous count weighted by how much of it
+still overlaps the sliding window:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+so a key costs three numbers and an attempt is O(1), however many
+attempts it sees. In-process state is an LRU-bounded dict, so rotating
+usernames or addresses cannot grow memory without limit.
+
+With a shared ICacheBackend the buckets are TTL'd counters keyed by window
+number, and all workers see the same counts. Checking and counting are then
+two steps, so concurrent attempts can overshoot the limit slightly. An
+unreachable backend counts nothing, so logins stay possible.
+
+LoginThrottle checks a per-address and a per-username limiter before the
+route does any database or hashing work.
+"""
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from typing import Callable, List, Mapping, Optional
+
+from interfaces.services import ICacheBackend
+
+
+MAX_KEY_LENGTH = 128
+
+
+@dataclass
+class LoginThrottleConfig:
+    """Attempt limits per sliding window
+
+    Every field can be overridden with an environment variable named
+    ``HEALTHTRACKER_LOGIN_<FIELD>``, e.g. ``HEALTHTRACKER_LOGIN_IP_LIMIT``.
+    """
+    ip_limit: int = 30          # attempts per window from one address (or IPv6 /64)
+    username_limit: int = 10    # attempts per window against one username
+    window: float = 300.0       # seconds
+    max_keys: int = 100_000     # in-process keys per limiter before the least recent go
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'LoginThrottleConfig':
+        """Build config from HEALTHTRACKER_LOGIN_* environment variables"""
+        environ = os.environ if environ is None else environ
+        values = {}
+        for f in fields(cls):
+            raw = environ.get(f"HEALTHTRACKER_LOGIN_{f.name.upper()}")
+            if raw is not None:
+                values[f.name] = f.type(raw) if f.type in (int, float) else raw
+        return cls(**values)
+
+
+class SlidingWindowLimiter:
+    """At most ``limit`` attempts per key in any ``window`` seconds (approximately)"""
+
+    def __init__(self, name: str, limit: int, window: float, max_keys: int = 100_000,
+                 clock: Callable[[], float] = time.time, backend: Optional[ICacheBackend] = None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.clock = clock
+        self.backend = backend
+        self._buckets: 'OrderedDict[str, List[float]]' = OrderedDict()  # key -> [window number, current, previous]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _estimate(fraction: float, current: float, previous: float) -> float:
+        return previous * (1 - fraction) + current
+
+    def _retry_after(self, fraction: float, current: float, previous: float) -> float:
+        """Seconds until one more attempt fits, assuming none arrive meanwhile"""
+        if current >= self.limit:
+            # After this bucket becomes the previous one: current * (1 - f') + 1 <= limit
+            return ((1 - fraction) + max(0.0, 1 - (self.limit - 1) / current)) * self.window
+        # previous * (1 - f') + current + 1 <= limit
+        return max(0.001, (1 - (self.limit - current - 1) / previous - fraction) * self.window)
+
+    def _local_attempt(self, key: str, index: int, fraction: float) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [index, 0, 0]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                if bucket[0] != index:
+                    bucket[2] = bucket[1] if bucket[0] == index - 1 else 0
+                    bucket[0], bucket[1] = index, 0
+            if self._estimate(fraction, bucket[1], bucket[2]) + 1 > self.limit:
+                return self._retry_after(fraction, bucket[1], bucket[2])
+            bucket[1] += 1
+            return 0.0
+
+    def _shared_attempt(self, key: str, index: int, fraction: float) -> float:
+        prefix = f"limit:{self.name}:{key}:"
+        previous = self.backend.counter(f"{prefix}{index - 1}")
+        current = self.backend.counter(f"{prefix}{index}")
+        if self._estimate(fraction, current, previous) + 1 > self.limit:
+            return self._retry_after(fraction, current, previous)
+        current = self.backend.incr(f"{prefix}{index}", ttl=2 * self.window)
+        if current and self._estimate(fraction, current - 1, previous) + 1 > self.limit:
+            # Lost a race with another worker; this attempt stays counted
+            return self._retry_after(fraction, current, previous)
+        return 0.0
+
+    def attempt(self, key: str) -> float:
+        """Count an attempt for key; 0 if it is allowed, else seconds until one would be"""
+        now = self.clock()
+        index, offset = divmod(now, self.window)
+        index, fraction = int(index), offset / self.window
+        key = key[:MAX_KEY_LENGTH]
+        if self.backend is None:
+            return self._local_attempt(key, index, fraction)
+        return self._shared_attempt(key, index, fraction)
+
+    def reset(self, key: Optional[str] = None):
+        """Forget the in-process counts of one key, or of every key"""
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key[:MAX_KEY_LENGTH], None)
+
+
+def address_key(remote_addr: Optional[str]) -> str:
+    """Limiter key of a client address; IPv6 clients are grouped by /64"""
+    try:
+        address = ipaddress.ip_address(remote_addr or '')
+    except ValueError:
+        return remote_addr or '-'
+    if address.version == 6:
+        if address.ipv4_mapped:
+            return str(address.ipv4_mapped)
+        return str(ipaddress.ip_network(f"{address}/64", strict=False))
+    return str(address)
+
+
+class LoginThrottle:
+    """Per-address and per-username limits on one credential-checking action"""
+
+    def __init__(self, action: str, config: Optional[LoginThrottleConfig] = None,
+                 clock: Callable[[], float] = time.time, backend: Optional[ICacheBackend] = None):
+        config = config or LoginThrottleConfig()
+        self.by_address = SlidingWindowLimiter(f"{action}:ip", config.ip_limit, config.window,
+                                               config.max_keys, clock, backend)
+        self.by_username = SlidingWindowLimiter(f"{action}:user", config.username_limit, config.window,
+                                                config.max_keys, clock, backend)
+        self._lock = threading.Lock()
+        self.allowed = self.rejected = 0
+
+    def attempt(self, remote_addr: Optional[str], username: str) -> float:
+        """Count an attempt; 0 if it may proceed, else seconds to wait
+
+        A request rejected by the address limit is not counted against the
+        username, so one noisy address cannot lock an account by itself
+        faster than its own limit allows.
+        """
+        retry_after = self.by_address.attempt(address_key(remote_addr))
+        if not retry_after:
+            retry_after = self.by_username.attempt(username.strip().lower())
+        with self._lock:
+            if retry_after:
+                self.rejected += 1
+            else:
+                self.allowed += 1
+        return retry_after
+
+    def stats(self):
+        """Allowed and rejected attempt counts of this process"""
+        with self._lock:
+            return {'allowed': self.allowed, 'rejected': self.rejected}
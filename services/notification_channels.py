@@ -0,0 +1,52 @@
+"""
+Notification delivery channels for the outbox dispatcher
+
+A channel turns an outbox message into an actual delivery. The dispatcher
+looks channels up by the message's ``channel`` name, so adding SMS or push
+delivery means adding an adapter here and registering it in build_channels().
+"""
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from interfaces.services import INotificationChannel
+from models.domain import OutboxMessage
+
+
+class LogChannel(INotificationChannel):
+    """Prints the message, as reminders were delivered before the outbox existed"""
+
+    def send(self, message: OutboxMessage) -> None:
+        print(f"{message.payload.get('title', '通知')}給 {message.payload.get('username', message.user_id)}: "
+              f"{message.payload.get('message', '')}")
+
+
+class FileChannel(INotificationChannel):
+    """Appends each message as a JSON line to a local file; a stand-in for SMTP in development and tests"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, message: OutboxMessage) -> None:
+        self.send_batch([message])
+
+    def send_batch(self, messages: List[OutboxMessage]) -> Dict[int, Optional[str]]:
+        lines = [json.dumps({'id': m.id, 'user_id': m.user_id, 'kind': m.kind, 'payload': m.payload,
+                             'delivered_at': time.time()}, ensure_ascii=False) + '\n'
+                 for m in messages]
+        try:
+            with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+        except OSError as e:
+            return {m.id: str(e) for m in messages}
+        return {m.id: None for m in messages}
+
+
+def build_channels(file_path: Optional[str] = None) -> Dict[str, INotificationChannel]:
+    """Channels available to a dispatcher"""
+    channels: Dict[str, INotificationChannel] = {'log': LogChannel()}
+    if file_path:
+        channels['file'] = FileChannel(file_path)
+    return channels
@@ -0,0 +1,89 @@
+"""
+Outbox dispatcher: claims notifications in batches and delivers them through channels
+
+Any number of dispatchers (threads in one process or separate processes)
+can drain the same outbox; a claim is a single UPDATE ... RETURNING, so a
+message is only ever claimed by one of them. A failed delivery is retried
+with exponential backoff and jitter until max_attempts, then marked failed.
+Claims left by a dispatcher that died are released after lease_seconds.
+"""
+import os
+import random
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from interfaces.services import INotificationChannel
+from models.domain import OutboxMessage
+from repositories.notification_outbox_repository import NotificationOutboxRepository
+
+
+class NotificationDispatcher:
+    """Delivers outbox messages through the registered channels"""
+
+    def __init__(self, outbox_repository: NotificationOutboxRepository,
+                 channels: Dict[str, INotificationChannel], worker_id: Optional[str] = None,
+                 batch_size: int = 100, max_attempts: int = 5, base_delay: float = 5.0,
+                 max_delay: float = 3600.0, lease_seconds: float = 300.0):
+        self.outbox_repository = outbox_repository
+        self.channels = channels
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds to wait before retry number ``attempts`` (1-based)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        # Half fixed, half random, so failed batches do not retry in lockstep
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def dispatch_once(self) -> Dict[str, int]:
+        """Claim and deliver one batch; returns counts of claimed, sent, retried and failed messages"""
+        now = time.time()
+        messages = self.outbox_repository.claim_batch(self.worker_id, self.batch_size, now)
+        by_channel: Dict[str, List[OutboxMessage]] = {}
+        for message in messages:
+            by_channel.setdefault(message.channel, []).append(message)
+
+        sent: List[int] = []
+        failures: List[Tuple[int, str, Optional[float]]] = []
+        for name, batch in by_channel.items():
+            channel = self.channels.get(name)
+            errors = channel.send_batch(batch) if channel else {m.id: f"unknown channel: {name}" for m in batch}
+            for message in batch:
+                error = errors.get(message.id, 'no delivery result')
+                if error is None:
+                    sent.append(message.id)
+                    continue
+                attempts = message.attempts + 1
+                retry_at = None
+                if channel and attempts < self.max_attempts:
+                    retry_at = time.time() + self.backoff(attempts)
+                failures.append((message.id, error, retry_at))
+
+        if sent:
+            self.outbox_repository.mark_sent(sent)
+        if failures:
+            self.outbox_repository.mark_failed(failures)
+        retried = sum(1 for _, _, retry_at in failures if retry_at is not None)
+        return {'claimed': len(messages), 'sent': len(sent), 'retried': retried,
+                'failed': len(failures) - retried}
+
+    def run(self, stop: threading.Event, poll_interval: float = 1.0):
+        """Dispatch until ``stop`` is set, sleeping only when the outbox has nothing due"""
+        next_release = 0.0
+        while not stop.is_set():
+            try:
+                if time.time() >= next_release:
+                    self.outbox_repository.release_expired_claims(self.lease_seconds)
+                    next_release = time.time() + self.lease_seconds / 2
+                result = self.dispatch_once()
+            except Exception as e:
+                print(f"Error dispatching notifications: {e}")
+                result = {'claimed': 0}
+            if result['claimed'] < self.batch_size:
+                stop.wait(poll_interval)
@@ -1,10 +1,12 @@
 """
 Notification service implementation following SOLID principles
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from interfaces.services import INotificationService
 from interfaces.repositories import IUserRepository, IHealthDataRepository, IMedicalRepository
+from models.domain import User
+from repositories.notification_outbox_repository import NotificationOutboxRepository
 
 
 class NotificationService(INotificationService):
@@ -12,27 +14,28 @@ class NotificationService(INotificationService):
     
     def __init__(self, user_repository: IUserRepository, 
                  health_data_repository: IHealthDataRepository,
-                 medical_repository: IMedicalRepository):
+                 medical_repository: IMedicalRepository,
+                 outbox_repository: Optional[NotificationOutboxRepository] = None,
+                 channel: str = 'log'):
         self.user_repository = user_repository
         self.health_data_repository = health_data_repository
         self.medical_repository = medical_repository
+        self.outbox_repository = outbox_repository
+        self.channel = channel
     
     def send_health_reminder(self, user_id: int, message: str) -> bool:
-        """Send health reminder to user"""
+        """Queue a health reminder for the dispatcher"""
         try:
-            # In a real implementation, this would send actual notifications
-            # For now, just log the reminder
             user = self.user_repository.get_user_by_id(user_id)
             if user:
-                print(f"健康提醒給 {user.username}: {message}")
-                return True
+                return self._enqueue(user, 'health_reminder', '健康提醒', message)
             return False
         except Exception as e:
             print(f"Error sending health reminder: {e}")
             return False
     
     def send_appointment_reminder(self, user_id: int, appointment_details: Dict[str, Any]) -> bool:
-        """Send appointment reminder"""
+        """Queue an appointment reminder for the dispatcher"""
         try:
             user = self.user_repository.get_user_by_id(user_id)
             if user:
@@ -40,25 +43,31 @@ class NotificationService(INotificationService):
                 date = appointment_details.get('appointment_date', '')
                 time = appointment_details.get('appointment_time', '')
                 message = f"預約提醒：您有與 {doctor} 的預約，時間為 {date} {time}"
-                print(f"預約提醒給 {user.username}: {message}")
-                return True
+                return self._enqueue(user, 'appointment_reminder', '預約提醒', message)
             return False
         except Exception as e:
             print(f"Error sending appointment reminder: {e}")
             return False
     
+    def _enqueue(self, user: User, kind: str, title: str, message: str) -> bool:
+        """Write the notification to the outbox; delivery happens in the dispatcher"""
+        if self.outbox_repository is None:
+            print(f"{title}給 {user.username}: {message}")
+            return True
+        payload = {'username': user.username, 'email': user.email, 'title': title, 'message': message}
+        return self.outbox_repository.enqueue(user.id, self.channel, kind, payload) is not None
+    
     def check_health_alerts(self, user_id: int) -> List[str]:
         """Check for health alerts for user"""
         alerts = []
         
         try:
             # Check for overdue health records
-            bp_records = self.health_data_repository.get_blood_pressure_records_by_user(user_id)
-            hw_records = self.health_data_repository.get_height_weight_records_by_user(user_id)
+            latest_bp = self.health_data_repository.get_latest_blood_pressure_record(user_id)
+            latest_hw = self.health_data_repository.get_latest_height_weight_record(user_id)
             
             # Check if no blood pressure records in last 30 days
-            if bp_records:
-                latest_bp = bp_records[0]
+            if latest_bp:
                 latest_date = datetime.strptime(latest_bp.date, '%Y-%m-%d').date()
                 if (datetime.now().date() - latest_date).days > 30:
                     alerts.append("已超過30天未測量血壓，建議定期監測")
@@ -66,8 +75,7 @@ class NotificationService(INotificationService):
                 alerts.append("尚無血壓記錄，建議開始監測血壓")
             
             # Check if no weight records in last 30 days
-            if hw_records:
-                latest_hw = hw_records[0]
+            if latest_hw:
                 latest_date = datetime.strptime(latest_hw.date, '%Y-%m-%d').date()
                 if (datetime.now().date() - latest_date).days > 30:
                     alerts.append("已超過30天未記錄體重，建議定期監測")
@@ -75,16 +83,16 @@ class NotificationService(INotificationService):
                 alerts.append("尚無體重記錄，建議開始監測體重變化")
             
             # Check for abnormal blood pressure values
-            if bp_records:
-                latest_bp = bp_records[0]
+            if latest_bp:
                 if latest_bp.systolic > 140 or latest_bp.diastolic > 90:
                     alerts.append("最近血壓偏高，建議諮詢醫師")
                 elif latest_bp.systolic < 90 or latest_bp.diastolic < 60:
                     alerts.append("最近血壓偏低，如有不適請諮詢醫師")
             
-            # Check upcoming appointments
-            appointments = self.medical_repository.get_appointments_by_user(user_id)
+            # Check appointments from a week ago through tomorrow
             today = datetime.now().date()
+            appointments = self.medical_repository.get_appointments_between(
+                user_id, str(today - timedelta(days=6)), str(today + timedelta(days=1)))
             for appointment in appointments:
                 appointment_date = datetime.strptime(appointment.appointment_date, '%Y-%m-%d').date()
                 days_until = (appointment_date - today).days
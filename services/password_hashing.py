@@ -0,0 +1,234 @@
+"""
+Password hashing with calibrated cost on a bounded worker pool
+
+Hashes use werkzeug's storage format ('scrypt:N:r:p$salt$hex' or
+'pbkdf2:sha256:iterations$salt$hex'), so hashes written by the older
+werkzeug-based app keep verifying. Unsalted SHA-256 hex digests from the
+first versions of the app are still accepted and reported by needs_rehash,
+as is anything hashed with another scheme or a lower cost; the caller
+stores a fresh hash after the next successful login.
+
+When no cost is configured it is calibrated once per process: the largest
+scrypt N (a power of two) or PBKDF2 iteration count that stays within
+target_ms on this machine, but never below the MIN_* floors.
+
+hashlib releases the GIL while it hashes, so the pool's threads use real
+cores. Only ``workers`` hashes run at once, leaving the remaining cores to
+request handling, and at most ``queue_size`` more wait; beyond that a
+caller waits up to ``wait_timeout`` for a slot and then gets HashingBusy.
+"""
+import hashlib
+import hmac
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from werkzeug.security import check_password_hash, gen_salt
+
+
+SCHEMES = ('scrypt', 'pbkdf2')
+SCRYPT_R, SCRYPT_P = 8, 1
+MIN_SCRYPT_N = 2 ** 15
+MAX_SCRYPT_N = 2 ** 17            # 128 MiB per hash at r=8
+MIN_PBKDF2_ITERATIONS = 600_000   # PBKDF2-HMAC-SHA256
+SALT_LENGTH = 16
+
+_LEGACY_SHA256 = re.compile(r'[0-9a-f]{64}')
+_calibrated: Dict[Tuple[str, float], int] = {}
+_calibrate_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """No hashing slot became free within the wait timeout"""
+
+
+@dataclass
+class PasswordHashConfig:
+    """Password hashing settings
+
+    Every field can be overridden with an environment variable named
+    ``HEALTHTRACKER_PASSWORD_<FIELD>``, e.g. ``HEALTHTRACKER_PASSWORD_TARGET_MS``.
+    """
+    scheme: str = 'scrypt'
+    cost: int = 0               # scrypt N or PBKDF2 iterations; 0 calibrates to target_ms
+    target_ms: float = 100.0
+    workers: int = 0            # 0 means half the cores, at least one
+    queue_size: int = 32        # hashes allowed to wait for a worker
+    wait_timeout: float = 5.0   # seconds to wait for a queue slot
+
+    def __post_init__(self):
+        self.scheme = str(self.scheme).lower()
+        if self.scheme not in SCHEMES:
+            raise ValueError(f"Invalid scheme: {self.scheme!r}")
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> 'PasswordHashConfig':
+        """Build config from HEALTHTRACKER_PASSWORD_* environment variables"""
+        environ = os.environ if environ is None else environ
+        values = {}
+        for f in fields(cls):
+            raw = environ.get(f"HEALTHTRACKER_PASSWORD_{f.name.upper()}")
+            if raw is not None:
+                values[f.name] = f.type(raw) if f.type in (int, float) else raw
+        return cls(**values)
+
+
+def _method(scheme: str, cost: int) -> str:
+    if scheme == 'scrypt':
+        return f"scrypt:{cost}:{SCRYPT_R}:{SCRYPT_P}"
+    return f"pbkdf2:sha256:{cost}"
+
+
+def _derive(scheme: str, cost: int, salt: str, password: str) -> str:
+    if scheme == 'scrypt':
+        return hashlib.scrypt(password.encode(), salt=salt.encode(), n=cost, r=SCRYPT_R, p=SCRYPT_P,
+                              maxmem=132 * cost * SCRYPT_R * SCRYPT_P).hex()
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), cost).hex()
+
+
+def _time_ms(scheme: str, cost: int) -> float:
+    started = time.perf_counter()
+    _derive(scheme, cost, 'calibration', 'calibration')
+    return (time.perf_counter() - started) * 1000
+
+
+def calibrate(scheme: str, target_ms: float) -> int:
+    """The highest cost hashing within target_ms here, at least the scheme's floor"""
+    key = (scheme, target_ms)
+    with _calibrate_lock:
+        if key not in _calibrated:
+            if scheme == 'scrypt':
+                n = MIN_SCRYPT_N
+                # Each doubling of N doubles the time
+                while n < MAX_SCRYPT_N and _time_ms(scheme, n) * 2 <= target_ms:
+                    n *= 2
+                _calibrated[key] = n
+            else:
+                probe = 100_000
+                iterations = int(probe * target_ms / _time_ms(scheme, probe)) // 10_000 * 10_000
+                _calibrated[key] = max(MIN_PBKDF2_ITERATIONS, iterations)
+        return _calibrated[key]
+
+
+def parse_method(stored: str) -> Optional[Tuple[str, int]]:
+    """(scheme, cost) of a stored hash at the current scrypt r and p; None for anything else"""
+    method = stored.split('$', 1)[0].split(':')
+    try:
+        if method[0] == 'scrypt' and len(method) == 4 and (int(method[2]), int(method[3])) == (SCRYPT_R, SCRYPT_P):
+            return 'scrypt', int(method[1])
+        if method[:2] == ['pbkdf2', 'sha256'] and len(method) == 3:
+            return 'pbkdf2', int(method[2])
+    except ValueError:
+        pass
+    return None
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a bounded thread pool"""
+
+    def __init__(self, scheme: str = 'scrypt', cost: Optional[int] = None, target_ms: float = 100.0,
+                 workers: Optional[int] = None, queue_size: int = 32, wait_timeout: float = 5.0):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Invalid scheme: {scheme!r}")
+        self.scheme = scheme
+        self.target_ms = target_ms
+        self._cost = cost or None
+        self.workers = workers or max(1, (os.cpu_count() or 2) // 2)
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(self.workers + queue_size)
+        self._lock = threading.Lock()
+        self._dummy: Optional[str] = None
+        self._hashes = self._rejected = 0
+        self._hash_ms = 0.0
+
+    @classmethod
+    def from_config(cls, config: PasswordHashConfig) -> 'PasswordHasher':
+        return cls(config.scheme, config.cost, config.target_ms, config.workers,
+                   config.queue_size, config.wait_timeout)
+
+    @property
+    def cost(self) -> int:
+        """scrypt N or PBKDF2 iterations of new hashes, calibrated on first use"""
+        if self._cost is None:
+            self._cost = calibrate(self.scheme, self.target_ms)
+        return self._cost
+
+    @property
+    def method(self) -> str:
+        """werkzeug method string of new hashes"""
+        return _method(self.scheme, self.cost)
+
+    def _submit(self, fn: Callable[..., Any], *args) -> Future:
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self._rejected += 1
+            raise HashingBusy("password hashing queue is full")
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _timed(self, fn: Callable[..., Any], *args) -> Any:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._hashes += 1
+                self._hash_ms += elapsed
+
+    def _hash(self, password: str) -> str:
+        salt = gen_salt(SALT_LENGTH)
+        return f"{self.method}${salt}${_derive(self.scheme, self.cost, salt, password)}"
+
+    @staticmethod
+    def _verify(stored: str, password: str) -> bool:
+        if _LEGACY_SHA256.fullmatch(stored):
+            return hmac.compare_digest(stored, hashlib.sha256(password.encode()).hexdigest())
+        return check_password_hash(stored, password)
+
+    def hash(self, password: str) -> str:
+        """Salted hash of a password at the current scheme and cost"""
+        return self._submit(self._timed, self._hash, password).result()
+
+    def verify(self, stored: Optional[str], password: str) -> bool:
+        """Check a password against a stored hash
+
+        With no stored hash (an unknown user) a dummy hash is checked instead,
+        so the response time does not reveal whether the account exists.
+        """
+        if stored is None:
+            if self._dummy is None:
+                self._dummy = self.hash(gen_salt(SALT_LENGTH))
+            self._submit(self._timed, self._verify, self._dummy, password).result()
+            return False
+        return self._submit(self._timed, self._verify, stored, password).result()
+
+    def needs_rehash(self, stored: str) -> bool:
+        """True if the hash is legacy, of another scheme or weaker than new hashes"""
+        parsed = parse_method(stored)
+        return parsed is None or parsed[0] != self.scheme or parsed[1] < self.cost
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size, hash counts and average hash time"""
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'hashes': self._hashes,
+                'avg_ms': self._hash_ms / self._hashes if self._hashes else 0.0,
+                'rejected': self._rejected
+            }
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,46 @@
+"""
+Background thread that runs a task at startup and then every ``interval`` seconds
+"""
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+class PeriodicTask:
+    """Runs ``task`` on a daemon thread; an interval <= 0 disables it"""
+
+    def __init__(self, name: str, task: Callable[[], Dict[str, Any]], interval: float):
+        self.name = name
+        self.task = task
+        self.interval = interval
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> Dict[str, Any]:
+        """Run the task now"""
+        self.last_result = self.task()
+        return self.last_result
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error running {self.name}: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def start(self):
+        """Start the background thread (no-op if disabled or already running)"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
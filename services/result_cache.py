@@ -0,0 +1,97 @@
+"""
+LRU + TTL cache for per-user derived results
+
+Entries are keyed by (user id, the user's data version, name, args). A
+repository write bumps the user's version through invalidate_user (wired up
+as a ChangeNotifier listener), so a cached evaluation is never served after
+the rows it was computed from changed; superseded entries are simply never
+read again and age out. Every entry also expires after a TTL, or at an
+explicit time such as next_midnight() for results that depend on today's
+date. Results are shared between callers and must be treated as read-only.
+
+Storage is an ICacheBackend. The versions live in the backend too, so with
+a shared backend a write handled by one worker invalidates every worker.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from interfaces.services import ICacheBackend
+from services.cache_backends import MemoryCacheBackend
+
+
+T = TypeVar('T')
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL = 300.0  # seconds
+
+
+def next_midnight(now: Optional[float] = None) -> float:
+    """Epoch seconds of the next local midnight"""
+    today = datetime.fromtimestamp(time.time() if now is None else now).date()
+    return datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
+
+
+class ResultCache:
+    """Per-user versioned result cache over a pluggable backend"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.time, backend: Optional[ICacheBackend] = None):
+        self.ttl = ttl
+        self.clock = clock
+        self.backend = backend or MemoryCacheBackend(max_entries, clock)
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._invalidations = 0
+
+    def version(self, user_id: Optional[int]) -> int:
+        """The user's data version, bumped on every invalidation"""
+        return 0 if user_id is None else self.backend.counter(f"version:{user_id}")
+
+    @staticmethod
+    def _key(user_id: Optional[int], version: int, name: str, args: Tuple[Hashable, ...]) -> str:
+        return f"{name}:{'-' if user_id is None else user_id}:{version}:{args!r}"
+
+    def get_or_compute(self, user_id: Optional[int], name: str, args: Tuple[Hashable, ...],
+                       compute: Callable[[], T], expires_at: Optional[float] = None) -> T:
+        """Cached result of ``compute()``; user_id None for results not tied to a user"""
+        version = self.version(user_id)
+        key = self._key(user_id, version, name, args)
+        entry = self.backend.get(key)
+        if entry is not None:
+            with self._lock:
+                self._hits += 1
+            return entry[0]
+        with self._lock:
+            self._misses += 1
+
+        now = self.clock()
+        value = compute()
+        ttl = self.ttl if expires_at is None else min(self.ttl, expires_at - now)
+        # A write that landed while computing makes this result stale already
+        if ttl > 0 and self.version(user_id) == version:
+            self.backend.set(key, (value,), ttl)  # boxed so a None result is still a hit
+        return value
+
+    def invalidate_user(self, user_id: int):
+        """Forget everything cached for a user (a ChangeNotifier listener)"""
+        self.backend.incr(f"version:{user_id}")
+        with self._lock:
+            self._invalidations += 1
+
+    def clear(self):
+        """Drop every entry"""
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters of this process plus the backend's own"""
+        with self._lock:
+            total = self._hits + self._misses
+            stats = {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': self._hits / total if total else 0.0,
+                'invalidations': self._invalidations,
+            }
+        stats.update(self.backend.stats())
+        return stats
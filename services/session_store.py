@@ -0,0 +1,169 @@
+"""
+Server-side sessions
+
+The session cookie carries only a random token. SessionManager keeps a
+compact SessionRecord per token in an ISessionStore: the user's id,
+username, gender, birthday and profile version. Resolving the current user
+is therefore one session lookup, with no users query. The store is keyed
+by a SHA-256 of the token, so a leaked sessions table cannot be replayed
+as cookies.
+
+Records stay consistent with the profile through a UserRepository change
+listener (refresh_user): an update rewrites the user's records and a
+deleted user loses them. Sessions expire after ``ttl`` seconds of
+inactivity; a lookup moves the expiry forward once less than half of it
+is left, so an active session costs one write per half TTL. Expired rows
+are removed by SessionSweeper.
+
+Two stores are available: SessionRepository (the sessions table, shared by
+every worker) and MemorySessionStore (one process only, for development
+and tests).
+"""
+import hashlib
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from interfaces.repositories import ISessionStore, IUserRepository
+from models.domain import SessionRecord, User
+from services.periodic_task import PeriodicTask
+
+
+DEFAULT_SESSION_TTL = 7 * 24 * 3600.0  # seconds
+DEFAULT_SWEEP_INTERVAL = 3600.0        # seconds
+
+
+class MemorySessionStore(ISessionStore):
+    """Sessions in a dict, with a per-user index for bulk revocation"""
+
+    def __init__(self):
+        self._sessions: Dict[str, SessionRecord] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def save_session(self, record: SessionRecord) -> bool:
+        with self._lock:
+            self._sessions[record.sid] = record
+            self._by_user.setdefault(record.user_id, set()).add(record.sid)
+        return True
+
+    def get_session(self, sid: str, now: float) -> Optional[SessionRecord]:
+        record = self._sessions.get(sid)
+        return record if record is not None and record.expires_at > now else None
+
+    def extend_session(self, sid: str, expires_at: float) -> bool:
+        with self._lock:
+            record = self._sessions.get(sid)
+            if record is not None:
+                record.expires_at = expires_at
+        return True
+
+    def _remove(self, sids: Iterable[str]) -> int:
+        removed = 0
+        for sid in list(sids):
+            record = self._sessions.pop(sid, None)
+            if record is None:
+                continue
+            removed += 1
+            user_sids = self._by_user.get(record.user_id)
+            if user_sids is not None:
+                user_sids.discard(sid)
+                if not user_sids:
+                    del self._by_user[record.user_id]
+        return removed
+
+    def delete_session(self, sid: str) -> bool:
+        with self._lock:
+            self._remove([sid])
+        return True
+
+    def delete_user_sessions(self, user_id: int) -> int:
+        with self._lock:
+            return self._remove(self._by_user.get(user_id, ()))
+
+    def delete_all_sessions(self) -> int:
+        with self._lock:
+            removed = len(self._sessions)
+            self._sessions.clear()
+            self._by_user.clear()
+            return removed
+
+    def update_session_profiles(self, user: User) -> int:
+        with self._lock:
+            sids = self._by_user.get(user.id, ())
+            for sid in sids:
+                record = self._sessions[sid]
+                record.username, record.gender, record.birthday = user.username, user.gender, user.birthday
+                record.profile_version = user.profile_version
+            return len(sids)
+
+    def delete_expired_sessions(self, now: float) -> int:
+        with self._lock:
+            return self._remove([sid for sid, record in self._sessions.items() if record.expires_at <= now])
+
+
+class SessionManager:
+    """Opens, resolves and revokes sessions on top of a session store"""
+
+    def __init__(self, store: ISessionStore, user_repository: IUserRepository,
+                 ttl: float = DEFAULT_SESSION_TTL, clock: Callable[[], float] = time.time):
+        self.store = store
+        self.user_repository = user_repository
+        self.ttl = ttl
+        self.clock = clock
+
+    @staticmethod
+    def _sid(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def open(self, user: User) -> Tuple[Optional[str], SessionRecord]:
+        """Start a session for an authenticated user; returns (token, record), token None on failure"""
+        token = secrets.token_urlsafe(32)
+        record = SessionRecord(sid=self._sid(token), user_id=user.id, username=user.username,
+                               gender=user.gender, birthday=user.birthday,
+                               profile_version=user.profile_version, expires_at=self.clock() + self.ttl)
+        return (token if self.store.save_session(record) else None), record
+
+    def lookup(self, token: str) -> Optional[SessionRecord]:
+        """The live session for a cookie token, or None"""
+        now = self.clock()
+        record = self.store.get_session(self._sid(token), now)
+        if record is not None and record.expires_at - now < self.ttl / 2:
+            record.expires_at = now + self.ttl
+            self.store.extend_session(record.sid, record.expires_at)
+        return record
+
+    def close(self, token: str):
+        """End one session (logout)"""
+        self.store.delete_session(self._sid(token))
+
+    def revoke_user(self, user_id: int) -> int:
+        """End every session of a user, in every worker sharing the store"""
+        return self.store.delete_user_sessions(user_id)
+
+    def revoke_all(self) -> int:
+        """End every session"""
+        return self.store.delete_all_sessions()
+
+    def refresh_user(self, user_id: int):
+        """Bring a user's sessions up to date with the profile (a ChangeNotifier listener)"""
+        user = self.user_repository.get_user_by_id(user_id)
+        if user is None:
+            self.store.delete_user_sessions(user_id)
+        else:
+            self.store.update_session_profiles(user)
+
+    def sweep(self) -> Dict[str, Any]:
+        """Delete expired sessions"""
+        started = time.perf_counter()
+        expired = self.store.delete_expired_sessions(self.clock())
+        return {'expired': expired, 'duration_ms': (time.perf_counter() - started) * 1000}
+
+
+class SessionSweeper(PeriodicTask):
+    """Sweeps expired sessions at startup and then every ``interval`` seconds"""
+
+    def __init__(self, session_manager: SessionManager, interval: float = DEFAULT_SWEEP_INTERVAL):
+        super().__init__('session-sweep', session_manager.sweep, interval)
+        self.session_manager = session_manager
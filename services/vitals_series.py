@@ -0,0 +1,187 @@
+"""
+Columnar in-memory time series of one user's vitals
+
+A VitalsSeries holds the blood pressure readings (systolic, diastolic,
+pulse) and the height/weight readings (height, weight) as read-only,
+contiguous NumPy columns sorted by the time each reading was taken. Range
+selection is two binary searches returning views, so slicing never copies
+the history; rolling means and BMI are computed over those views. Missing
+values are NaN.
+
+The whole history is loaded in one fetch (HealthDataRepository.get_vitals_rows)
+and, being immutable, can be shared between requests: VitalsSeriesCache keeps
+series in a cache backend under the trigger-maintained vitals version, so a
+lookup only hits while no reading has changed.
+"""
+import threading
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from interfaces.repositories import IHealthDataRepository
+from interfaces.services import ICacheBackend
+from services.batch_classifier import calculate_bmi
+from services.cache_backends import MemoryCacheBackend
+
+
+BP_COLUMNS = ('systolic', 'diastolic', 'pulse')
+HW_COLUMNS = ('height', 'weight')
+DEFAULT_MAX_USERS = 256
+DEFAULT_SERIES_TTL = 3600.0  # seconds; correctness comes from the version check
+
+TimeBound = Union[str, date, datetime, np.datetime64]
+
+
+def as_time(value: TimeBound) -> np.datetime64:
+    """A 'YYYY-MM-DD[ HH:MM:SS]' string, date or datetime as a datetime64[s]"""
+    if isinstance(value, str):
+        value = value.replace(' ', 'T')
+    return np.datetime64(value, 's')
+
+
+class Readings:
+    """One kind of reading as parallel NumPy columns sorted by time"""
+    __slots__ = ('times', 'columns')
+
+    def __init__(self, times: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.times = times  # datetime64[s]
+        self.columns = columns
+
+    @classmethod
+    def from_array(cls, data: np.ndarray, names: Sequence[str]) -> 'Readings':
+        """Build from an (n, 1 + len(names)) float array of (epoch seconds, values...) rows"""
+        data = data[np.argsort(data[:, 0], kind='stable')]
+        # One transposed copy makes every column contiguous
+        block = np.ascontiguousarray(data[:, :1 + len(names)].T)
+        block.flags.writeable = False
+        times = block[0].astype(np.int64).astype('datetime64[s]')
+        times.flags.writeable = False
+        return cls(times, {name: block[i + 1] for i, name in enumerate(names)})
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getstate__(self):
+        return self.times, self.columns
+
+    def __setstate__(self, state):
+        # Unpickled from a shared cache backend: keep the columns read-only
+        self.times, self.columns = state
+        for values in (self.times, *self.columns.values()):
+            values.flags.writeable = False
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def values(self, name: str) -> List[Optional[float]]:
+        """A column as Python floats, None where missing"""
+        return [None if value != value else value for value in self.columns[name].tolist()]
+
+    def _slice(self, lo: int, hi: int) -> 'Readings':
+        return Readings(self.times[lo:hi], {name: values[lo:hi] for name, values in self.columns.items()})
+
+    def select(self, mask: np.ndarray) -> 'Readings':
+        """Readings where mask is true (a copy)"""
+        return Readings(self.times[mask], {name: values[mask] for name, values in self.columns.items()})
+
+    def between(self, start: Optional[TimeBound] = None, end: Optional[TimeBound] = None) -> 'Readings':
+        """Readings taken in [start, end), as views"""
+        lo = 0 if start is None else int(np.searchsorted(self.times, as_time(start), side='left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.times, as_time(end), side='left'))
+        return self._slice(lo, max(lo, hi))
+
+    def tail(self, n: int) -> 'Readings':
+        """The n most recent readings, oldest first, as views"""
+        return self._slice(max(0, len(self) - n), len(self))
+
+    def rolling_mean(self, name: str, window: int) -> np.ndarray:
+        """Mean of each reading and the window - 1 before it, skipping NaN"""
+        values = self.columns[name]
+        valid = ~np.isnan(values)
+        sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+        counts = np.concatenate(([0], np.cumsum(valid)))
+        ends = np.arange(1, len(values) + 1)
+        starts = np.maximum(ends - window, 0)
+        n = counts[ends] - counts[starts]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(n > 0, (sums[ends] - sums[starts]) / n, np.nan)
+
+    def labels(self) -> List[str]:
+        """Reading times as 'YYYY-MM-DD HH:MM:SS' strings"""
+        return [label.replace('T', ' ') for label in np.datetime_as_string(self.times, unit='s').tolist()]
+
+
+class VitalsSeries:
+    """A user's blood pressure and height/weight readings as columns"""
+    __slots__ = ('user_id', 'version', 'bp', 'hw')
+
+    def __init__(self, user_id: int, version: int, bp: Readings, hw: Readings):
+        self.user_id = user_id
+        self.version = version
+        self.bp = bp
+        self.hw = hw
+
+    @classmethod
+    def from_rows(cls, user_id: int, version: int, rows: List[tuple]) -> 'VitalsSeries':
+        """Build from get_vitals_rows() output"""
+        data = np.array(rows, dtype=float).reshape(-1, 5)  # None becomes NaN
+        kind = data[:, 0]
+        return cls(user_id, version,
+                   Readings.from_array(data[kind == 0, 1:], BP_COLUMNS),
+                   Readings.from_array(data[kind == 1, 1:], HW_COLUMNS))
+
+    def between(self, start: Optional[TimeBound] = None, end: Optional[TimeBound] = None) -> 'VitalsSeries':
+        """Readings taken in [start, end), as views"""
+        return VitalsSeries(self.user_id, self.version, self.bp.between(start, end), self.hw.between(start, end))
+
+    def bmi(self) -> np.ndarray:
+        """BMI of every height/weight reading; NaN where it cannot be computed"""
+        return calculate_bmi(self.hw['height'], self.hw['weight'])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the columns"""
+        return sum(values.nbytes for readings in (self.bp, self.hw)
+                   for values in (readings.times, *readings.columns.values()))
+
+
+class VitalsSeriesCache:
+    """VitalsSeries per user in a cache backend, revalidated by vitals version"""
+
+    def __init__(self, health_data_repository: IHealthDataRepository, max_users: int = DEFAULT_MAX_USERS,
+                 backend: Optional[ICacheBackend] = None, ttl: float = DEFAULT_SERIES_TTL):
+        self.health_data_repository = health_data_repository
+        self.backend = backend or MemoryCacheBackend(max_users)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, user_id: int) -> VitalsSeries:
+        """Read a user's series from the database, bypassing the cache"""
+        version, rows = self.health_data_repository.get_vitals_rows(user_id)
+        return VitalsSeries.from_rows(user_id, version, rows)
+
+    def get(self, user_id: int) -> VitalsSeries:
+        """Get a user's series, reloading it if a reading changed since it was cached"""
+        version = self.health_data_repository.get_vitals_version(user_id)
+        # Versioned keys: a stale series is never even fetched from a shared backend
+        cached = self.backend.get(f"series:{user_id}:{version}") if version >= 0 else None
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        series = self.load(user_id)
+        if series.version >= 0:
+            self.backend.set(f"series:{user_id}:{series.version}", series, self.ttl)
+        return series
+
+    def stats(self) -> Dict[str, int]:
+        """Hit counts of this process plus the backend's own"""
+        with self._lock:
+            stats = {'hits': self.hits, 'misses': self.misses}
+        stats.update(self.backend.stats())
+        return stats
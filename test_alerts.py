@@ -0,0 +1,83 @@
+"""
+Tests for the chunked background health alert scan
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+
+import pytest
+
+from database.alerts import main as alerts_main
+from repositories.alert_repository import AlertRepository
+from repositories.dashboard_repository import DashboardRepository
+from repositories.user_repository import UserRepository
+from services.alert_scan_service import AlertScanService
+
+
+TODAY = date(2024, 3, 10)
+
+
+@pytest.fixture
+def cm(migrated_cm):
+    cm = migrated_cm
+    with cm.transaction() as conn:
+        conn.executemany("INSERT INTO users (id, username, password) VALUES (?, ?, 'x')",
+                         [(i, f"user{i}") for i in range(1, 6)])
+        conn.executemany(
+            "INSERT INTO blood_pressure (user_id, systolic, diastolic, date, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [(1, 120, 75, '2024-03-01', '2024-03-01 08:00:00'),
+             (1, 150, 95, '2024-03-09', '2024-03-09 08:00:00'),   # latest for user 1: high
+             (2, 85, 55, '2024-03-09', '2024-03-09 08:00:00'),    # low
+             (3, 118, 76, '2024-01-01', '2024-01-01 08:00:00')])  # normal but overdue
+        conn.executemany(
+            "INSERT INTO height_weight (user_id, height, weight, date, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [(i, 170, 65, '2024-03-09', '2024-03-09 08:00:00') for i in (1, 2, 3)])
+        conn.executemany(
+            "INSERT INTO appointments (user_id, appointment_date, hospital, department) VALUES (?, ?, ?, ?)",
+            [(4, '2024-03-10', '台大醫院', '心臟科'), (4, '2024-03-11', '榮總', '家醫科'),
+             (4, '2024-03-05', '長庚', '眼科'), (4, '2024-03-01', '馬偕', '骨科'), (4, '2024-03-20', '國泰', '牙科')])
+    return cm
+
+
+def test_scan_persists_alerts_for_every_user(cm):
+    alerts = AlertRepository(cm.db_path, cm)
+    service = AlertScanService(UserRepository(cm.db_path, cm), alerts, workers=3, chunk_size=2)
+    result = service.scan_all(TODAY)
+    assert (result['chunks'], result['failed_chunks']) == (3, 0)
+
+    assert service.get_alerts(1, TODAY) == ["最近血壓偏高，建議諮詢醫師"]
+    assert service.get_alerts(2, TODAY) == ["最近血壓偏低，如有不適請諮詢醫師"]
+    assert service.get_alerts(3, TODAY) == ["已超過30天未測量血壓，建議定期監測"]
+    assert service.get_alerts(4, TODAY) == [
+        "今天有預約：台大醫院 心臟科 (2024-03-10)",
+        "明天有預約：榮總 家醫科 (2024-03-11)",
+        "錯過的預約：長庚 眼科 (2024-03-05)",
+        "尚無血壓記錄，建議開始監測血壓",
+        "尚無體重記錄，建議開始監測體重變化",
+    ]
+    # Alerts from an earlier day's scan are not shown
+    assert service.get_alerts(1, date(2024, 3, 11)) == []
+    dashboard = DashboardRepository(cm.db_path, cm)
+    assert dashboard.get_dashboard_data(4, '2024-03-10')['alerts'] == service.get_alerts(4, TODAY)
+
+
+def test_rescan_replaces_stale_alerts(cm):
+    service = AlertScanService(UserRepository(cm.db_path, cm), AlertRepository(cm.db_path, cm), workers=2)
+    service.scan_all(TODAY)
+    with cm.transaction() as conn:
+        conn.execute("INSERT INTO blood_pressure (user_id, systolic, diastolic, date, recorded_at) "
+                     "VALUES (1, 118, 76, '2024-03-10', '2024-03-10 08:00:00')")
+        conn.execute("DELETE FROM users WHERE id = 5")
+    service.scan_all(TODAY)
+    assert service.get_alerts(1, TODAY) == []
+    with cm.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM health_alerts WHERE user_id = 5").fetchone()[0] == 0
+
+
+def test_command_line_scan(cm, capsys):
+    assert alerts_main(['--db', cm.db_path, 'scan', '--chunk-size', '2']) == 0
+    assert '3 chunks' in capsys.readouterr().out
+    service = AlertScanService(UserRepository(cm.db_path, cm), AlertRepository(cm.db_path, cm))
+    assert service.get_alerts(5)
@@ -0,0 +1,82 @@
+"""
+Tests for the due-time appointment reminder queue
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models.domain import User
+from repositories.medical_repository import MedicalRepository
+from repositories.notification_outbox_repository import NotificationOutboxRepository
+from repositories.user_repository import UserRepository
+from services.appointment_reminders import AppointmentReminderQueue
+from services.notification_service import NotificationService
+
+
+@pytest.fixture
+def setup(migrated_cm):
+    cm = migrated_cm
+    users = UserRepository(cm.db_path, cm)
+    for name in ("amy", "bob"):
+        users.create_user(User(username=name, password="x"))
+    outbox = NotificationOutboxRepository(cm.db_path, cm)
+    medical = MedicalRepository(cm.db_path, cm)
+    queue = AppointmentReminderQueue(medical, NotificationService(users, None, medical, outbox))
+    return cm, outbox, queue
+
+
+def _book(cm, user_id, day, hospital='台大醫院'):
+    with cm.transaction() as conn:
+        return conn.execute("INSERT INTO appointments (user_id, appointment_date, hospital, department) "
+                            "VALUES (?, ?, ?, '心臟科')", (user_id, day, hospital)).lastrowid
+
+
+def test_reminders_pop_when_due(setup):
+    cm, outbox, queue = setup
+    _book(cm, 1, '2024-03-11')
+    _book(cm, 2, '2024-03-11', '榮總')
+    _book(cm, 2, '2024-03-20')
+
+    assert queue.tick(datetime(2024, 3, 10, 8, 59))['sent'] == 0
+    assert len(queue) == 2  # only reminders inside the window are loaded
+    assert queue.tick(datetime(2024, 3, 10, 9, 0)) == {'sent': 2, 'skipped': 0, 'failed': 0, 'queued': 0}
+    assert queue.tick(datetime(2024, 3, 10, 9, 5))['sent'] == 0
+
+    messages = outbox.claim_batch('test', 10)
+    assert sorted(m.user_id for m in messages) == [1, 2]
+    assert {m.kind for m in messages} == {'appointment_reminder'}
+    assert any('榮總 心臟科' in m.payload['message'] for m in messages)
+
+
+def test_rescheduled_and_late_reminders(setup):
+    cm, outbox, queue = setup
+    moved = _book(cm, 1, '2024-03-11')
+    _book(cm, 2, '2024-03-09')
+    queue.refill_interval = timedelta(hours=1)
+    queue.refill(datetime(2024, 3, 10, 8, 55))
+    with cm.transaction() as conn:
+        conn.execute("UPDATE appointments SET appointment_date = '2024-03-15' WHERE id = ?", (moved,))
+
+    # The stale heap entry is dropped; the past appointment is marked but not sent
+    assert queue.tick(datetime(2024, 3, 10, 9, 0)) == {'sent': 0, 'skipped': 1, 'failed': 0, 'queued': 0}
+    assert queue.tick(datetime(2024, 3, 14, 9, 0))['sent'] == 1
+    assert [m.user_id for m in outbox.claim_batch('test', 10)] == [1]
+
+
+def test_reminder_that_cannot_be_queued_is_retried(setup, monkeypatch):
+    cm, outbox, queue = setup
+    _book(cm, 1, '2024-03-11')
+    enqueue = outbox.enqueue
+    monkeypatch.setattr(outbox, 'enqueue', lambda *args, **kwargs: None)
+    assert queue.tick(datetime(2024, 3, 10, 9, 0))['failed'] == 1
+    with cm.connection() as conn:
+        assert conn.execute("SELECT reminded_at FROM appointments").fetchone()[0] is None
+
+    monkeypatch.setattr(outbox, 'enqueue', enqueue)
+    assert queue.tick(datetime(2024, 3, 10, 9, 0, 30))['sent'] == 0  # not reloaded until the next refill
+    assert queue.tick(datetime(2024, 3, 10, 9, 1))['sent'] == 1
+    assert len(outbox.claim_batch('test', 10)) == 1
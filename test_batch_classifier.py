@@ -0,0 +1,33 @@
+"""
+Tests for the NumPy batch classifier against the per-reading evaluation
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from services.batch_classifier import (BP_CATEGORIES, BMI_CATEGORIES, INVALID, calculate_bmi,
+                                       classify_blood_pressure, classify_bmi, evaluate_batch)
+from services.health_evaluation_service import HealthEvaluationService
+
+
+def test_matches_scalar_rules_on_a_grid():
+    scalar = HealthEvaluationService(None, None)
+    systolic, diastolic = np.meshgrid(np.arange(70, 200, 3), np.arange(40, 130, 3))
+    codes = classify_blood_pressure(systolic.ravel(), diastolic.ravel())
+    expected = [scalar._bp_category(s, d) for s, d in zip(systolic.ravel(), diastolic.ravel())]
+    assert [BP_CATEGORIES[c] for c in codes] == expected
+
+    bmi = np.arange(14.0, 40.0, 0.25)
+    assert [BMI_CATEGORIES[c] for c in classify_bmi(bmi)] == [scalar._bmi_category(b) for b in bmi]
+    assert np.allclose(calculate_bmi([170, 160], [65, 80]),
+                       [scalar.calculate_bmi(170, 65), scalar.calculate_bmi(160, 80)])
+
+
+def test_missing_and_invalid_readings():
+    result = evaluate_batch(systolic=[115, None], diastolic=[70, 80],
+                            height=[170, 0, None], weight=[60, 60, 60])
+    assert result.bp_labels() == ['正常血壓', None]
+    assert result.bmi_codes.tolist() == [1, INVALID, INVALID]
+    assert np.isnan(result.bmi[1:]).all()
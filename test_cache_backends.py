@@ -0,0 +1,211 @@
+"""
+Tests for the pluggable cache backends shared between workers
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import fnmatch
+import socketserver
+import threading
+import time
+
+import pytest
+
+from repositories.health_data_repository import HealthDataRepository
+from services.cache_backends import (
+    MemoryCacheBackend, SQLiteCacheBackend, RedisCacheBackend, build_cache_backend
+)
+from services.result_cache import ResultCache
+from services.vitals_series import VitalsSeriesCache
+from models.domain import BloodPressureRecord
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Just enough of RESP2 for RedisCacheBackend"""
+
+    def _read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _bulk(self, value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        store = self.server.store
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            name, args = args[0].upper(), args[1:]
+            with self.server.lock:
+                now = time.time()
+                for key in [k for k, (_, expires) in store.items() if expires and expires <= now]:
+                    del store[key]
+                if name in (b'PING', b'SELECT'):
+                    reply = b"+OK\r\n"
+                elif name == b'GET':
+                    reply = self._bulk(store.get(args[0], (None, None))[0])
+                elif name == b'SET':
+                    store[args[0]] = (args[1], now + int(args[3]) / 1000 if len(args) > 3 else None)
+                    reply = b"+OK\r\n"
+                elif name == b'DEL':
+                    reply = b":%d\r\n" % sum(store.pop(key, None) is not None for key in args)
+                elif name == b'INCR':
+                    value, expires = store.get(args[0], (b'0', None))
+                    value = int(value) + 1
+                    store[args[0]] = (str(value).encode(), expires)  # INCR keeps the TTL
+                    reply = b":%d\r\n" % value
+                elif name == b'PEXPIRE':
+                    found = args[0] in store
+                    if found:
+                        store[args[0]] = (store[args[0]][0], now + int(args[1]) / 1000)
+                    reply = b":%d\r\n" % found
+                elif name == b'SCAN':
+                    keys = [k for k in store if fnmatch.fnmatchcase(k.decode(), args[2].decode())]
+                    reply = b"*2\r\n" + self._bulk(b'0') + b"*%d\r\n" % len(keys) + b''.join(map(self._bulk, keys))
+                else:
+                    reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+@pytest.fixture
+def fake_redis():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.store, server.lock = {}, threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _contract(backend):
+    """The behaviour every backend shares"""
+    assert backend.get('missing') is None
+    backend.set('a', {'value': [1, 2]}, 60)
+    assert backend.get('a') == {'value': [1, 2]}
+    backend.delete('a')
+    assert backend.get('a') is None
+
+    assert backend.counter('version:1') == 0
+    assert backend.incr('version:1') == 1
+    assert backend.incr('version:1') == 2
+    backend.set('b', 'x', 60)
+    backend.clear()
+    assert backend.get('b') is None
+    assert backend.counter('version:1') == 2  # clearing entries keeps the versions
+
+    assert backend.incr('window', ttl=60) == 1
+    assert backend.incr('window', ttl=60) == 2
+    assert backend.counter('window') == 2
+
+
+def test_memory_and_sqlite_contract(tmp_path):
+    _contract(MemoryCacheBackend())
+    _contract(SQLiteCacheBackend(str(tmp_path / "cache.db"), 'results'))
+
+
+def test_redis_contract_against_fake_server(fake_redis):
+    backend = RedisCacheBackend(*fake_redis.server_address, namespace='results')
+    _contract(backend)
+    assert all(key.startswith(b'healthtracker:results:') for key in fake_redis.store)
+
+    backend.set('short', 1, 0.001)
+    backend.incr('short-counter', ttl=0.001)
+    time.sleep(0.01)
+    assert backend.get('short') is None
+    assert backend.counter('short-counter') == 0
+
+
+def test_redis_outage_is_a_miss(fake_redis):
+    backend = RedisCacheBackend(*fake_redis.server_address)
+    cache = ResultCache(backend=backend)
+    assert cache.get_or_compute(1, 'value', (), lambda: 'a') == 'a'
+    fake_redis.shutdown()
+    fake_redis.server_close()
+    backend._close()
+    backend.port = 1  # nothing listens here
+    assert cache.get_or_compute(1, 'value', (), lambda: 'b') == 'b'
+
+
+def test_sqlite_evicts_expired_then_least_recently_used(tmp_path):
+    clock_now = [1000.0]
+    backend = SQLiteCacheBackend(str(tmp_path / "cache.db"), 'results', max_entries=2,
+                                 clock=lambda: clock_now[0])
+    backend.set('old', 1, 10)
+    clock_now[0] += 1
+    backend.set('a', 2, 600)
+    clock_now[0] += 1
+    backend.set('b', 3, 600)
+    clock_now[0] += 1
+    backend.set('c', 4, 600)
+    clock_now[0] += 20  # 'old' has expired
+
+    assert backend.evict() == 2
+    assert [backend.get(key) for key in ('old', 'a', 'b', 'c')] == [None, None, 3, 4]
+
+
+def test_workers_share_results_and_invalidations(tmp_path):
+    """Two processes on one cache file: a result computed by one is a hit in the other"""
+    path = str(tmp_path / "shared.cache.db")
+    worker_a = ResultCache(backend=SQLiteCacheBackend(path, 'results'))
+    worker_b = ResultCache(backend=SQLiteCacheBackend(path, 'results'))
+    calls = []
+
+    def evaluate(worker):
+        return worker.get_or_compute(1, 'bp', (), lambda: calls.append(worker) or len(calls))
+
+    assert evaluate(worker_a) == 1
+    assert evaluate(worker_b) == 1
+    assert calls == [worker_a]
+
+    worker_a.invalidate_user(1)
+    assert evaluate(worker_b) == 2
+    assert evaluate(worker_a) == 2
+    assert (worker_a.stats()['hits'], worker_b.stats()['hits']) == (1, 1)
+
+
+def test_vitals_series_round_trip_stays_read_only(migrated_cm, tmp_path):
+    cm = migrated_cm
+    health = HealthDataRepository(cm.db_path, cm)
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=1, systolic=120, diastolic=80, recorded_at='2024-01-01 08:00:00'))
+    path = str(tmp_path / "shared.cache.db")
+    worker_a = VitalsSeriesCache(health, backend=SQLiteCacheBackend(path, 'vitals'))
+    worker_b = VitalsSeriesCache(health, backend=SQLiteCacheBackend(path, 'vitals'))
+
+    worker_a.get(1)
+    series = worker_b.get(1)
+    assert worker_b.stats()['hits'] == 1
+    assert series.bp['systolic'].tolist() == [120]
+    with pytest.raises(ValueError):
+        series.bp['systolic'][0] = 0
+
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=1, systolic=130, diastolic=85, recorded_at='2024-01-02 08:00:00'))
+    assert len(worker_b.get(1).bp) == 2
+
+
+def test_build_cache_backend_from_url(tmp_path):
+    assert isinstance(build_cache_backend('memory', 'results'), MemoryCacheBackend)
+    assert isinstance(build_cache_backend('', 'results'), MemoryCacheBackend)
+
+    path = tmp_path / "cache.db"
+    backend = build_cache_backend(f"sqlite:///{path}", 'vitals', 16)
+    assert isinstance(backend, SQLiteCacheBackend)
+    assert (backend.namespace, backend.max_entries) == ('vitals', 16)
+    assert os.path.exists(path)
+
+    backend = build_cache_backend('redis://cache.internal:6380/2', 'results')
+    assert (backend.host, backend.port, backend.db, backend.prefix) == (
+        'cache.internal', 6380, 2, 'healthtracker:results:')
+    with pytest.raises(ValueError):
+        build_cache_backend('memcached://localhost', 'results')
@@ -0,0 +1,79 @@
+"""
+Tests for the sharded cohort analytics run
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from repositories.cohort_repository import CohortRepository
+from services.cohort_analytics import CohortAnalyticsService, shard_ranges
+from services.health_evaluation_service import HealthEvaluationService
+
+
+USERS = [
+    # gender, birthday, latest (systolic, diastolic), latest (height, weight)
+    ('male', '1990-06-15', (150, 95), (170, 80)),
+    ('male', '1990-06-16', (118, 76), (170, 60)),
+    ('female', '1950-01-01', (185, 100), (160, 45)),
+    ('female', '2010-03-03', None, (150, 40)),
+    ('', None, (125, 70), None),
+]
+
+
+@pytest.fixture
+def service(migrated_cm):
+    cm = migrated_cm
+    with cm.transaction() as conn:
+        for i, (gender, birthday, bp, hw) in enumerate(USERS, start=1):
+            conn.execute("INSERT INTO users (id, username, password, gender, birthday) VALUES (?, ?, 'x', ?, ?)",
+                         (i, f"user{i}", gender, birthday))
+            if bp:
+                # An older reading that must not be counted
+                conn.execute("INSERT INTO blood_pressure (user_id, systolic, diastolic, date, recorded_at) "
+                             "VALUES (?, 90, 50, '2023-01-01', '2023-01-01 08:00:00')", (i,))
+                conn.execute("INSERT INTO blood_pressure (user_id, systolic, diastolic, date, recorded_at) "
+                             "VALUES (?, ?, ?, '2024-01-01', '2024-01-01 08:00:00')", (i, *bp))
+            if hw:
+                conn.execute("INSERT INTO height_weight (user_id, height, weight, date, recorded_at) "
+                             "VALUES (?, ?, ?, '2024-01-01', '2024-01-01 08:00:00')", (i, *hw))
+    return CohortAnalyticsService(CohortRepository(cm.db_path, cm))
+
+
+def _expected():
+    scalar = HealthEvaluationService(None, None)
+    counts = {}
+    for gender, birthday, bp, hw in USERS:
+        age = None
+        if birthday:
+            y, m, d = map(int, birthday.split('-'))
+            age = 2024 - y - ((6, 15) < (m, d))
+        band = '未知' if age is None else ['<20', '20-29', '30-39', '40-49', '50-64', '65+'][
+            sum(age >= bound for bound in (20, 30, 40, 50, 65))]
+        cohort = (band, gender or '未知')
+        bp_category = scalar._bp_category(*bp) if bp else '無資料'
+        bmi_category = scalar._bmi_category(scalar.calculate_bmi(*hw)) if hw else '無資料'
+        for key in (('blood_pressure',) + cohort + (bp_category,), ('bmi',) + cohort + (bmi_category,)):
+            counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+@pytest.mark.parametrize("workers,shards", [(1, 1), (1, 3), (2, 4)])
+def test_report_matches_scalar_classification(service, workers, shards):
+    rows = service.run(workers=workers, shards=shards, chunk_size=2, as_of='2024-06-15')
+    assert {(r.metric, r.age_band, r.gender, r.category): r.users for r in rows} == _expected()
+    assert service.get_latest_report('bmi') == sorted(
+        [r for r in rows if r.metric == 'bmi'], key=lambda r: (r.age_band, r.gender, r.category))
+
+    bp = {(r.age_band, r.gender, r.category): r.prevalence for r in rows if r.metric == 'blood_pressure'}
+    assert bp[('30-39', 'male', '第二期高血壓')] == 0.5
+    assert bp[('<20', 'female', '無資料')] is None
+
+
+def test_shard_ranges_cover_the_id_range():
+    ranges = shard_ranges(3, 20, 4)
+    assert ranges[0][0] == 3 and ranges[-1][1] == 20
+    assert all(a[1] + 1 == b[0] for a, b in zip(ranges, ranges[1:]))
+    assert shard_ranges(5, 6, 8) == [(5, 5), (6, 6)]
+    assert shard_ranges(0, -1, 4) == []
@@ -0,0 +1,136 @@
+"""
+Tests for the shared SQLite connection manager
+"""
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from database.connection_manager import ConnectionManager
+from database.storage_config import StorageConfig
+from database.checkpoint_scheduler import CheckpointScheduler
+from repositories.user_repository import UserRepository
+from models.domain import User
+
+
+def _create_users_table(cm):
+    with cm.transaction() as conn:
+        conn.execute("""
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                email TEXT,
+                gender TEXT,
+                birthday TEXT,
+                created_at TEXT,
+                profile_version INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+
+
+def test_connection_reused_across_calls(tmp_path):
+    """Repository calls on one thread share a single pooled connection"""
+    cm = ConnectionManager(str(tmp_path / "test.db"))
+    _create_users_table(cm)
+    repo = UserRepository(cm.db_path, cm)
+
+    assert repo.create_user(User(username="alice", password="x"))
+    for _ in range(5):
+        assert repo.get_user_by_username("alice").username == "alice"
+
+    stats = cm.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 6
+    assert stats['open'] == 1
+
+
+def test_nested_connection_is_same_object(tmp_path):
+    """Nested blocks on one thread get the same connection"""
+    cm = ConnectionManager(str(tmp_path / "test.db"))
+    with cm.connection() as outer:
+        with cm.connection() as inner:
+            assert inner is outer
+
+
+def test_pragmas_applied_once_per_connection(tmp_path):
+    """PRAGMAs are applied when the connection is created"""
+    cm = ConnectionManager(str(tmp_path / "test.db"), pragmas=[('foreign_keys', 'ON')])
+    with cm.connection() as conn:
+        assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+
+def test_failed_transaction_rolls_back(tmp_path):
+    """An exception inside a transaction leaves no partial writes"""
+    cm = ConnectionManager(str(tmp_path / "test.db"))
+    _create_users_table(cm)
+    try:
+        with cm.transaction() as conn:
+            conn.execute("INSERT INTO users (username, password) VALUES ('bob', 'x')")
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    with cm.connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 0
+
+
+def test_threads_get_distinct_connections(tmp_path):
+    """Concurrent threads never share a connection"""
+    cm = ConnectionManager(str(tmp_path / "test.db"))
+    seen = []
+    barrier = threading.Barrier(3)
+
+    def worker():
+        with cm.connection() as conn:
+            seen.append(id(conn))
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(seen)) == 3
+    assert cm.stats()['idle'] == 3
+
+
+def test_storage_config_enables_wal(tmp_path):
+    """Pooled connections run in WAL mode with the configured PRAGMAs"""
+    config = StorageConfig(cache_size=-4000, synchronous='normal')
+    cm = ConnectionManager(str(tmp_path / "test.db"), pragmas=config.pragmas())
+    with cm.connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4000
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+
+
+def test_storage_config_from_env():
+    """Environment variables override defaults and are validated"""
+    config = StorageConfig.from_env({
+        'HEALTHTRACKER_SQLITE_MMAP_SIZE': '0',
+        'HEALTHTRACKER_SQLITE_CHECKPOINT_INTERVAL': '2.5',
+    })
+    assert config.mmap_size == 0
+    assert config.checkpoint_interval == 2.5
+    with pytest.raises(ValueError):
+        StorageConfig.from_env({'HEALTHTRACKER_SQLITE_SYNCHRONOUS': 'sometimes'})
+
+
+def test_checkpoint_truncates_wal(tmp_path):
+    """A checkpoint run empties the WAL file"""
+    db_path = str(tmp_path / "test.db")
+    cm = ConnectionManager(db_path, pragmas=StorageConfig().pragmas())
+    _create_users_table(cm)
+    for i in range(50):
+        with cm.transaction() as conn:
+            conn.execute("INSERT INTO users (username, password) VALUES (?, 'x')", (f"u{i}",))
+    assert os.path.getsize(db_path + "-wal") > 0
+
+    result = CheckpointScheduler(cm).run_once()
+
+    assert not result['busy']
+    assert os.path.getsize(db_path + "-wal") == 0
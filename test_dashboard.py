@@ -0,0 +1,67 @@
+"""
+Tests for the single-statement dashboard snapshot
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import date
+
+from repositories.user_repository import UserRepository
+from repositories.health_data_repository import HealthDataRepository
+from repositories.dashboard_repository import DashboardRepository
+from services.health_evaluation_service import HealthEvaluationService
+from services.dashboard_service import DashboardService
+from models.domain import User, BloodPressureRecord, HeightWeightRecord
+
+
+def _setup(cm):
+    users = UserRepository(cm.db_path, cm)
+    health = HealthDataRepository(cm.db_path, cm)
+    users.create_user(User(username="dash", password="x", gender="男", birthday="1990-05-01"))
+    service = DashboardService(DashboardRepository(cm.db_path, cm), HealthEvaluationService(users, health))
+    return cm, health, service
+
+
+def test_snapshot_reads_everything_in_one_statement(migrated_cm):
+    """Profile, latest vitals, next appointment and mood come from one query"""
+    cm, health, service = _setup(migrated_cm)
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=1, systolic=150, diastolic=95, date='2024-03-01', recorded_at='2024-03-01 08:00:00'))
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=1, systolic=115, diastolic=75, date='2024-03-02', recorded_at='2024-03-02 08:00:00'))
+    health.create_height_weight_record(HeightWeightRecord(
+        user_id=1, height=175, weight=70, date='2024-03-02', recorded_at='2024-03-02 08:00:00'))
+    with cm.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO appointments (user_id, appointment_date, hospital, department, reason) VALUES (?, ?, ?, ?, ?)",
+            [(1, '2024-02-01', 'A', 'X', 'past'), (1, '2024-03-20', 'B', 'Y', 'old'), (1, '2024-03-05', 'C', 'Z', 'next')])
+        conn.execute("INSERT INTO mood_records (user_id, mood, mood_date) VALUES (1, 'happy', '2024-03-02')")
+
+    statements = []
+    with cm.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        snapshot = service.get_snapshot(1, today=date(2024, 3, 2))
+        conn.set_trace_callback(None)
+
+    assert len(statements) == 1
+    assert snapshot.latest_blood_pressure.systolic == 115
+    assert snapshot.bp_evaluation['status'] == '正常血壓'
+    assert snapshot.bmi_evaluation['status'].startswith('正常體重')
+    assert snapshot.next_appointment['reason'] == 'next'
+    assert snapshot.next_appointment['days_left'] == 3
+    assert snapshot.today_mood == 'happy'
+    assert snapshot.gender == '男'
+    assert set(snapshot.timings) == {'query', 'profile', 'appointment', 'evaluation', 'total'}
+
+
+def test_snapshot_for_new_user(migrated_cm):
+    """A user without records still gets a snapshot; unknown users get None"""
+    _, _, service = _setup(migrated_cm)
+    snapshot = service.get_snapshot(1, today=date(2024, 3, 2))
+    assert snapshot.latest_blood_pressure is None
+    assert snapshot.latest_height_weight is None
+    assert snapshot.next_appointment is None
+    assert snapshot.today_mood is None
+    assert snapshot.bp_evaluation['status'] == '無血壓數據'
+    assert service.get_snapshot(99) is None
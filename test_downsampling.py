@@ -0,0 +1,41 @@
+"""
+Tests for chart bucketing and downsampling
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import math
+
+from services.downsampling import bucket, lttb, min_max
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    xs = list(range(1000))
+    ys = [math.sin(x / 50) for x in xs]
+    ys[500] = 10.0
+    keep = lttb(xs, ys, 50)
+    assert len(keep) == 50
+    assert keep[0] == 0 and keep[-1] == 999
+    assert keep == sorted(set(keep))
+    assert 500 in keep
+    # Already small enough: every point is kept
+    assert lttb(xs[:10], ys[:10], 50) == list(range(10))
+
+
+def test_min_max_keeps_each_bucket_extremes():
+    ys = [float(i % 7) for i in range(300)]
+    ys[123] = -5.0
+    keep = min_max(ys, 40)
+    assert len(keep) <= 40
+    assert keep[0] == 0 and keep[-1] == 299
+    assert 123 in keep
+
+
+def test_bucket_by_week_and_month_averages():
+    labels = ['2024-01-01 08:00:00', '2024-01-03 08:00:00', '2024-01-08 08:00:00', '2024-02-01 08:00:00']
+    columns = {'weight': [70.0, 72.0, 71.0, 69.0]}
+    assert bucket(labels, columns, 'week') == (
+        ['2024-01-01', '2024-01-08', '2024-01-29'], {'weight': [71.0, 71.0, 69.0]})
+    assert bucket(labels, columns, 'month') == (
+        ['2024-01', '2024-02'], {'weight': [71.0, 69.0]})
@@ -0,0 +1,54 @@
+"""
+Tests for the streaming history export
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import csv
+import io
+import json
+
+import pytest
+
+from repositories.export_repository import ExportRepository
+from repositories.health_data_repository import HealthDataRepository
+from services.export_service import ExportService
+from models.domain import BloodPressureRecord
+
+
+@pytest.fixture
+def service(migrated_cm):
+    cm = migrated_cm
+    health = HealthDataRepository(cm.db_path, cm)
+    for day in range(1, 8):
+        health.create_blood_pressure_record(BloodPressureRecord(
+            user_id=1, systolic=110 + day, diastolic=75, date=f'2024-01-0{day}',
+            recorded_at=f'2024-01-0{day} 08:00:00'))
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=2, systolic=200, diastolic=100, date='2024-01-03', recorded_at='2024-01-03 08:00:00'))
+    with cm.transaction() as conn:
+        conn.execute("INSERT INTO mood_records (user_id, mood, mood_date) VALUES (1, '開心', '2024-01-02')")
+    # A batch size smaller than the history exercises repeated fetchmany calls
+    return ExportService(ExportRepository(cm.db_path, cm, batch_size=2))
+
+
+def test_ndjson_export_filters_by_table_and_date(service):
+    chunks = service.stream(1, 'ndjson', ['blood_pressure'], '2024-01-02', '2024-01-05')
+    rows = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert [r['systolic'] for r in rows] == [112, 113, 114, 115]
+    assert {r['table'] for r in rows} == {'blood_pressure'}
+
+
+def test_csv_export_has_one_section_per_table(service):
+    text = ''.join(service.stream(1, 'csv'))
+    sections = [list(csv.reader(io.StringIO(part))) for part in text.split('\r\n\r\n')]
+    assert [s[0][:2] for s in sections] == [['table', 'id'], ['table', 'id']]
+    assert len(sections[0]) == 1 + 7
+    assert sections[1][1][:3] == ['mood_records', '1', '開心']
+
+
+def test_invalid_options_are_rejected_before_streaming(service):
+    for kwargs in ({'fmt': 'xml'}, {'tables': ['users']}, {'start': '01/02/2024'}):
+        with pytest.raises(ValueError):
+            service.stream(1, **kwargs)
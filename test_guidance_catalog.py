@@ -0,0 +1,54 @@
+"""
+Tests for the age-bracket health guidance catalog
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from services.batch_classifier import AGE_BOUNDS
+from services.guidance_catalog import GuidanceCatalog, default_catalog
+from services.health_evaluation_service import HealthEvaluationService
+
+
+def _bracket(min_age, text):
+    return {'min_age': min_age, 'disease_info': [text], 'prevention': [text + '建議']}
+
+
+def test_bundled_catalog_brackets():
+    catalog = default_catalog()
+    assert catalog is default_catalog()
+    assert catalog.bounds()[1:] == tuple(AGE_BOUNDS.tolist())
+    assert catalog.lookup(19).disease_info[0].startswith('青少年')
+    assert catalog.lookup(20).disease_info[0].startswith('青年')
+    assert catalog.lookup(64).disease_info[0].startswith('中老年')
+    assert catalog.lookup(120).disease_info[0].startswith('高齡')
+    assert catalog.lookup(-1) is catalog.lookup(0)
+
+    disease_info, prevention = HealthEvaluationService(None, None).get_disease_info_and_prevention(35, 'male')
+    assert disease_info == ("成年時期應注意：高血壓、糖尿病、心血管疾病預防",)
+    assert prevention == ("建議：年度健檢、控制體重、戒菸限酒、壓力管理",)
+
+
+def test_gender_and_condition_tables_fall_back_to_general():
+    catalog = GuidanceCatalog.from_dict({'version': 2, 'tables': [
+        {'brackets': [_bracket(0, 'general'), _bracket(40, 'general 40')]},
+        {'gender': 'female', 'brackets': [_bracket(0, 'female'), _bracket(45, 'female 45')]},
+        {'condition': 'hypertension', 'brackets': [_bracket(0, 'hypertension')]},
+    ]})
+    assert catalog.lookup(44, 'female').disease_info == ('female',)
+    assert catalog.lookup(45, 'female').disease_info == ('female 45',)
+    assert catalog.lookup(45, 'male').disease_info == ('general 40',)
+    assert catalog.lookup(45, 'female', 'hypertension').disease_info == ('hypertension',)
+    assert catalog.lookup(45, None, 'asthma').disease_info == ('general 40',)
+
+
+@pytest.mark.parametrize("tables", [
+    [{'brackets': [_bracket(10, 'x')]}],
+    [{'brackets': [_bracket(0, 'x'), _bracket(30, 'y'), _bracket(30, 'z')]}],
+    [{'gender': 'female', 'brackets': [_bracket(0, 'x')]}],
+])
+def test_malformed_catalogs_are_rejected(tables):
+    with pytest.raises(ValueError):
+        GuidanceCatalog.from_dict({'version': 1, 'tables': tables})
@@ -0,0 +1,52 @@
+"""
+Tests for bulk ingestion of device readings
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+
+import pytest
+
+from repositories.health_data_repository import HealthDataRepository
+from services.ingestion_service import IngestionService, MAX_BATCH_SIZE
+
+
+@pytest.fixture
+def service(migrated_cm):
+    return IngestionService(HealthDataRepository(migrated_cm.db_path, migrated_cm))
+
+
+def test_batch_is_deduplicated_and_reported_per_row(service):
+    """Rows are created once per (user, recorded_at); bad rows are reported, not fatal"""
+    readings = [
+        {'type': 'blood_pressure', 'systolic': 120, 'diastolic': 80, 'recorded_at': '2024-05-01T07:30:00'},
+        {'type': 'blood_pressure', 'systolic': 121, 'diastolic': 81, 'recorded_at': '2024-05-01 07:30:00'},
+        {'type': 'blood_pressure', 'systolic': 999, 'diastolic': 80, 'recorded_at': '2024-05-01T08:00:00'},
+        {'type': 'height_weight', 'height': 170, 'weight': 65.5, 'recorded_at': '2024-05-01T07:35:00'},
+        {'type': 'glucose', 'value': 5.4, 'recorded_at': '2024-05-01T07:35:00'},
+    ]
+    result = service.ingest(1, readings)
+    assert [r['status'] for r in result['results']] == ['created', 'duplicate', 'invalid', 'created', 'invalid']
+    assert (result['created'], result['duplicate'], result['invalid']) == (2, 1, 2)
+
+    # Re-syncing the same device upload stores nothing new
+    again = service.ingest(1, readings)
+    assert again['created'] == 0 and again['duplicate'] == 3
+
+    # The same timestamp for another user is not a duplicate
+    assert service.ingest(2, readings[:1])['created'] == 1
+
+    latest = service.health_data_repository.get_latest_blood_pressure_record(1)
+    assert (latest.systolic, latest.date, latest.recorded_at) == (120, '2024-05-01', '2024-05-01 07:30:00')
+
+
+def test_parse_json_and_ndjson(service):
+    rows = [{'type': 'height_weight', 'height': 170, 'weight': 65, 'recorded_at': '2024-05-01T07:35:00'}] * 2
+    assert service.parse_payload(json.dumps({'readings': rows}).encode(), 'application/json') == rows
+    assert service.parse_payload(json.dumps(rows).encode(), 'application/json') == rows
+    ndjson = '\n'.join(json.dumps(r) for r in rows) + '\n'
+    assert service.parse_payload(ndjson.encode(), 'application/x-ndjson') == rows
+    with pytest.raises(ValueError):
+        service.parse_payload(json.dumps(rows * MAX_BATCH_SIZE).encode(), 'application/json')
@@ -0,0 +1,94 @@
+"""
+Tests for the sliding-window login throttle, in-process and over a shared backend
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from services.cache_backends import MemoryCacheBackend, SQLiteCacheBackend
+from services.login_throttle import (
+    LoginThrottle, LoginThrottleConfig, SlidingWindowLimiter, address_key
+)
+
+
+class FakeClock:
+    def __init__(self, now=6000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_previous_window_is_weighted_by_overlap():
+    clock = FakeClock()  # exactly at the start of a window
+    limiter = SlidingWindowLimiter('t', limit=3, window=60, clock=clock)
+    assert [limiter.attempt('k') for _ in range(3)] == [0, 0, 0]
+    assert limiter.attempt('k') == pytest.approx(80)  # 60 s to roll over, then a third of the next
+
+    clock.now += 79
+    assert limiter.attempt('k') > 0  # 3 * (1 - 19/60) + 1 > 3
+    clock.now += 1
+    assert limiter.attempt('k') == 0  # 3 * (1 - 20/60) + 1 == 3
+    clock.now += 120
+    assert [limiter.attempt('k') for _ in range(3)] == [0, 0, 0]  # two windows later nothing is left
+
+
+def test_in_process_keys_are_bounded():
+    limiter = SlidingWindowLimiter('t', limit=1, window=60, max_keys=2, clock=FakeClock())
+    assert limiter.attempt('a') == 0
+    assert limiter.attempt('a') > 0
+    limiter.attempt('b'), limiter.attempt('c')  # 'a' is the least recent and goes
+    assert limiter.attempt('a') == 0
+    assert len(limiter._buckets) == 2
+
+
+def test_login_throttle_limits_addresses_and_usernames():
+    config = LoginThrottleConfig(ip_limit=3, username_limit=2, window=60)
+    throttle = LoginThrottle('login', config, clock=FakeClock())
+
+    assert throttle.attempt('10.0.0.1', 'Alice') == 0
+    assert throttle.attempt('10.0.0.2', ' alice') == 0
+    assert throttle.attempt('10.0.0.3', 'ALICE') > 0  # same account from anywhere
+
+    assert throttle.attempt('10.0.0.4', 'u1') == 0
+    assert throttle.attempt('10.0.0.4', 'u2') == 0
+    assert throttle.attempt('10.0.0.4', 'u3') == 0
+    assert throttle.attempt('10.0.0.4', 'bob') > 0
+    assert throttle.attempt('10.0.0.5', 'bob') == 0  # the rejected attempt was not counted for bob
+    assert throttle.stats() == {'allowed': 6, 'rejected': 2}
+
+
+def test_address_keys():
+    assert address_key('2001:db8::1') == address_key('2001:db8::ffff') == '2001:db8::/64'
+    assert address_key('::ffff:10.0.0.1') == '10.0.0.1'
+    assert address_key(None) == '-'
+    assert address_key('not-an-ip') == 'not-an-ip'
+
+
+def test_expiring_counters():
+    clock = FakeClock()
+    backend = MemoryCacheBackend(clock=clock)
+    assert backend.incr('k', ttl=10) == 1
+    assert backend.incr('k', ttl=10) == 2
+    clock.now += 10
+    assert backend.counter('k') == 0
+    assert backend.incr('k', ttl=10) == 1
+
+
+def test_workers_share_limits(tmp_path):
+    """Two processes throttling through one SQLite cache file see each other's attempts"""
+    clock = FakeClock()
+    path = str(tmp_path / "limits.cache.db")
+    config = LoginThrottleConfig(ip_limit=100, username_limit=3, window=60)
+    worker_a = LoginThrottle('login', config, clock, SQLiteCacheBackend(path, 'limits', clock=clock))
+    worker_b = LoginThrottle('login', config, clock, SQLiteCacheBackend(path, 'limits', clock=clock))
+
+    assert worker_a.attempt('10.0.0.1', 'carol') == 0
+    assert worker_b.attempt('10.0.0.2', 'carol') == 0
+    assert worker_a.attempt('10.0.0.3', 'carol') == 0
+    assert worker_b.attempt('10.0.0.4', 'carol') > 0
+
+    clock.now += 121  # both buckets expired
+    assert worker_b.attempt('10.0.0.4', 'carol') == 0
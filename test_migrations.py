@@ -0,0 +1,93 @@
+"""
+Tests for the versioned schema migration engine
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database.connection_manager import ConnectionManager
+from database.migrator import Migrator
+from database.migrate import main as migrate_main
+
+
+def _columns(cm, table):
+    with cm.connection() as conn:
+        return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+
+def test_upgrade_fresh_database(tmp_path):
+    """A new database is migrated to the head version"""
+    cm = ConnectionManager(str(tmp_path / "fresh.db"))
+    migrator = Migrator(cm)
+
+    applied = migrator.upgrade()
+
+    assert [m.version for m in applied] == [m.version for m in migrator.discover()]
+    assert migrator.current_version() == migrator.head_version
+    assert migrator.pending() == []
+    assert migrator.upgrade() == []
+
+
+def test_upgrade_legacy_database(tmp_path):
+    """An unversioned database created by the old init_db() is adopted"""
+    cm = ConnectionManager(str(tmp_path / "legacy.db"))
+    with cm.transaction() as conn:
+        conn.execute("""
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL
+            )
+        """)
+        conn.execute("INSERT INTO users (username, password) VALUES ('old', 'x')")
+
+    Migrator(cm).ensure_current()
+
+    assert {'email', 'gender', 'birthday', 'created_at'} <= set(_columns(cm, 'users'))
+    with cm.connection() as conn:
+        assert conn.execute("SELECT username FROM users").fetchall() == [('old',)]
+
+
+def test_ensure_current_is_single_query(tmp_path):
+    """Startup on an up-to-date database runs one version check"""
+    cm = ConnectionManager(str(tmp_path / "current.db"))
+    Migrator(cm).upgrade()
+
+    statements = []
+    with cm.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        Migrator(cm).ensure_current()
+        conn.set_trace_callback(None)
+
+    assert statements == ["SELECT MAX(version) FROM schema_version"]
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    """A failing migration leaves neither schema changes nor a version row"""
+    migrations_dir = tmp_path / "migrations"
+    migrations_dir.mkdir()
+    (migrations_dir / "0001_create_t.py").write_text(
+        "def upgrade(conn):\n    conn.execute('CREATE TABLE t (a)')\n")
+    (migrations_dir / "0002_broken.py").write_text(
+        "def upgrade(conn):\n    conn.execute('ALTER TABLE t ADD COLUMN b')\n"
+        "    raise RuntimeError('boom')\n")
+    cm = ConnectionManager(str(tmp_path / "broken.db"))
+    migrator = Migrator(cm, str(migrations_dir))
+
+    try:
+        migrator.upgrade()
+    except RuntimeError:
+        pass
+
+    assert migrator.current_version() == 1
+    assert _columns(cm, 't') == ['a']
+
+
+def test_cli_status_and_upgrade(tmp_path, capsys):
+    """The CLI upgrades a database and reports its status"""
+    db_path = str(tmp_path / "cli.db")
+    assert migrate_main(['--db', db_path, 'upgrade']) == 0
+    assert migrate_main(['--db', db_path, 'status']) == 0
+    out = capsys.readouterr().out
+    assert "Applied 0001 initial_schema" in out
+    assert "missing index" not in out
@@ -0,0 +1,99 @@
+"""
+Tests for the notification outbox and its dispatcher
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import json
+import threading
+import time
+
+import pytest
+
+from interfaces.services import INotificationChannel
+from models.domain import User
+from repositories.notification_outbox_repository import NotificationOutboxRepository
+from repositories.user_repository import UserRepository
+from services.notification_channels import FileChannel
+from services.notification_dispatcher import NotificationDispatcher
+from services.notification_service import NotificationService
+
+
+class FlakyChannel(INotificationChannel):
+    """Fails every delivery"""
+
+    def send(self, message):
+        raise ConnectionError("smtp down")
+
+
+@pytest.fixture
+def cm(migrated_cm):
+    UserRepository(migrated_cm.db_path, migrated_cm).create_user(
+        User(username="amy", password="x", email="amy@example.com"))
+    return migrated_cm
+
+
+def test_reminders_are_queued_then_delivered(cm, tmp_path):
+    outbox = NotificationOutboxRepository(cm.db_path, cm)
+    service = NotificationService(UserRepository(cm.db_path, cm), None, None, outbox, channel='file')
+    assert service.send_health_reminder(1, "記得量血壓")
+    assert service.send_appointment_reminder(1, {'doctor': '王醫師', 'appointment_date': '2024-03-01'})
+    assert not service.send_health_reminder(99, "nobody")
+    assert outbox.get_stats()['counts'] == {'pending': 2}
+
+    path = tmp_path / "mail.jsonl"
+    dispatcher = NotificationDispatcher(outbox, {'file': FileChannel(str(path))})
+    assert dispatcher.dispatch_once() == {'claimed': 2, 'sent': 2, 'retried': 0, 'failed': 0}
+    delivered = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [d['kind'] for d in delivered] == ['health_reminder', 'appointment_reminder']
+    assert delivered[0]['payload']['email'] == 'amy@example.com'
+
+    stats = outbox.get_stats()
+    assert stats['counts'] == {'sent': 2} and stats['avg_latency_ms'] >= 0
+    assert dispatcher.dispatch_once()['claimed'] == 0
+
+
+def test_failed_delivery_backs_off_then_fails(cm):
+    outbox = NotificationOutboxRepository(cm.db_path, cm)
+    outbox.enqueue(1, 'email', 'health_reminder', {'message': 'x'})
+    outbox.enqueue(1, 'pager', 'health_reminder', {'message': 'y'})
+    dispatcher = NotificationDispatcher(outbox, {'email': FlakyChannel()}, max_attempts=2, base_delay=60)
+
+    assert dispatcher.dispatch_once() == {'claimed': 2, 'sent': 0, 'retried': 1, 'failed': 1}
+    # Not due again until the backoff has passed
+    assert dispatcher.dispatch_once()['claimed'] == 0
+    retry = outbox.claim_batch('test', 10, now=time.time() + 60)
+    assert [m.attempts for m in retry] == [1]
+    outbox.mark_failed([(retry[0].id, 'smtp down', None)])
+    assert outbox.get_stats()['counts'] == {'failed': 2}
+
+
+def test_concurrent_dispatchers_deliver_each_message_once(cm, tmp_path):
+    outbox = NotificationOutboxRepository(cm.db_path, cm)
+    for i in range(200):
+        outbox.enqueue(1, 'file', 'health_reminder', {'message': str(i)})
+    channel = FileChannel(str(tmp_path / "mail.jsonl"))
+    dispatchers = [NotificationDispatcher(outbox, {'file': channel}, worker_id=f"w{i}", batch_size=7)
+                   for i in range(4)]
+
+    def drain(dispatcher):
+        while dispatcher.dispatch_once()['claimed']:
+            pass
+
+    threads = [threading.Thread(target=drain, args=(d,)) for d in dispatchers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    delivered = [json.loads(line)['id'] for line in (tmp_path / "mail.jsonl").read_text(encoding='utf-8').splitlines()]
+    assert sorted(delivered) == list(range(1, 201))
+
+
+def test_expired_claims_are_released(cm):
+    outbox = NotificationOutboxRepository(cm.db_path, cm)
+    outbox.enqueue(1, 'log', 'health_reminder', {'message': 'x'})
+    assert len(outbox.claim_batch('crashed', 10)) == 1
+    assert outbox.release_expired_claims(300) == 0
+    assert outbox.release_expired_claims(300, now=time.time() + 301) == 1
+    assert len(outbox.claim_batch('next', 10)) == 1
@@ -0,0 +1,54 @@
+"""
+Tests for keyset pagination through the repositories
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from repositories.health_data_repository import HealthDataRepository
+from repositories.pagination import MAX_PAGE_SIZE, clamp_page_size, decode_cursor
+from models.domain import BloodPressureRecord
+
+
+def _repo_with_readings(cm, count):
+    repo = HealthDataRepository(cm.db_path, cm)
+    for i in range(count):
+        # Two readings share each timestamp so the id tie-breaker is exercised
+        day = f"2024-01-{i // 2 + 1:02d}"
+        repo.create_blood_pressure_record(BloodPressureRecord(
+            user_id=1, systolic=100 + i, diastolic=70, date=day, recorded_at=f"{day} 08:00:00"))
+    repo.create_blood_pressure_record(BloodPressureRecord(
+        user_id=2, systolic=999, diastolic=99, date='2024-01-01', recorded_at='2024-01-01 08:00:00'))
+    return repo
+
+
+def test_walk_forward_and_back(migrated_cm):
+    """Following next then prev cursors visits every row exactly once, in order"""
+    repo = _repo_with_readings(migrated_cm, 11)
+    expected = [r.id for r in repo.get_blood_pressure_records_by_user(1)]
+
+    pages = [repo.get_blood_pressure_records_page(1, 4)]
+    assert pages[0].prev_cursor is None
+    while pages[-1].next_cursor:
+        pages.append(repo.get_blood_pressure_records_page(1, 4, pages[-1].next_cursor))
+
+    assert [len(p.items) for p in pages] == [4, 4, 3]
+    assert [r.id for p in pages for r in p.items] == expected
+
+    back = repo.get_blood_pressure_records_page(1, 4, pages[-1].prev_cursor)
+    assert [r.id for r in back.items] == [r.id for r in pages[1].items]
+    first = repo.get_blood_pressure_records_page(1, 4, back.prev_cursor)
+    assert [r.id for r in first.items] == [r.id for r in pages[0].items]
+    assert first.prev_cursor is None
+
+
+def test_page_size_limits_and_bad_cursor(migrated_cm):
+    """Page sizes are clamped and an invalid cursor falls back to the first page"""
+    assert clamp_page_size(None) > 0
+    assert clamp_page_size(0) > 0
+    assert clamp_page_size(10_000) == MAX_PAGE_SIZE
+    assert decode_cursor("not-a-cursor") is None
+
+    repo = _repo_with_readings(migrated_cm, 3)
+    page = repo.get_blood_pressure_records_page(1, 2, "garbage")
+    assert [r.systolic for r in page.items] == [102, 101]
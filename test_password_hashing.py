@@ -0,0 +1,103 @@
+"""
+Tests for the password hashing pool, legacy hash upgrades and cost calibration
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import hashlib
+import threading
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+from repositories.user_repository import UserRepository
+from services.authentication_service import AuthenticationService
+from services.password_hashing import (
+    PasswordHasher, PasswordHashConfig, HashingBusy, calibrate, parse_method, MIN_PBKDF2_ITERATIONS
+)
+from models.domain import User
+
+
+def _auth(cm, hasher):
+    users = UserRepository(cm.db_path, cm)
+    return users, AuthenticationService(users, hasher)
+
+
+def test_hashes_are_salted_and_verify():
+    hasher = PasswordHasher('scrypt', cost=2 ** 10)
+    first, second = hasher.hash('secret'), hasher.hash('secret')
+    assert first != second and first.startswith('scrypt:1024:8:1$')
+    assert hasher.verify(first, 'secret') and not hasher.verify(first, 'Secret')
+    assert not hasher.verify(None, 'secret')  # unknown user: dummy check, never a match
+
+    pbkdf2 = PasswordHasher('pbkdf2', cost=1000)
+    assert parse_method(pbkdf2.hash('secret')) == ('pbkdf2', 1000)
+    assert pbkdf2.verify(first, 'secret')  # any stored scheme still verifies
+    assert pbkdf2.stats()['hashes'] == 2
+
+
+def test_needs_rehash_only_upgrades():
+    hasher = PasswordHasher('scrypt', cost=2 ** 11)
+    assert hasher.needs_rehash(hashlib.sha256(b'pw').hexdigest())
+    assert hasher.needs_rehash(generate_password_hash('pw', 'scrypt:1024:8:1'))
+    assert hasher.needs_rehash(generate_password_hash('pw', 'scrypt:2048:16:1'))
+    assert hasher.needs_rehash(generate_password_hash('pw', 'pbkdf2:sha256:1000'))
+    assert not hasher.needs_rehash(generate_password_hash('pw', 'scrypt:2048:8:1'))
+    assert not hasher.needs_rehash(generate_password_hash('pw', 'scrypt:4096:8:1'))
+
+
+def test_login_upgrades_legacy_hash(migrated_cm):
+    """A SHA-256 account logs in and is rehashed without touching its sessions"""
+    users, auth = _auth(migrated_cm, PasswordHasher('scrypt', cost=2 ** 10))
+    legacy = hashlib.sha256(b'old-pw').hexdigest()
+    users.create_user(User(username='legacy', password=legacy))
+
+    assert auth.authenticate_user('legacy', 'wrong') is None
+    assert users.get_user_by_username('legacy').password == legacy
+
+    assert auth.authenticate_user('legacy', 'old-pw').username == 'legacy'
+    upgraded = users.get_user_by_username('legacy')
+    assert upgraded.password.startswith('scrypt:1024:8:1$')
+    assert upgraded.profile_version == 0
+    assert auth.authenticate_user('legacy', 'old-pw') is not None
+    assert users.get_user_by_username('legacy').password == upgraded.password
+
+
+def test_werkzeug_hashes_from_the_old_app_upgrade(migrated_cm):
+    users, auth = _auth(migrated_cm, PasswordHasher('pbkdf2', cost=2000))
+    users.create_user(User(username='old', password=generate_password_hash('pw', 'pbkdf2:sha256:1000')))
+    assert auth.authenticate_user('old', 'pw') is not None
+    assert parse_method(users.get_user_by_username('old').password) == ('pbkdf2', 2000)
+
+
+def test_rehash_loses_to_a_concurrent_reset(migrated_cm):
+    users, _ = _auth(migrated_cm, PasswordHasher('scrypt', cost=2 ** 10))
+    users.create_user(User(username='u', password='old-hash'))
+    users.update_password('u', 'reset-hash')
+    assert not users.rehash_password(1, 'old-hash', 'upgraded-hash')
+    assert users.get_user_by_username('u').password == 'reset-hash'
+
+
+def test_pool_rejects_when_saturated():
+    hasher = PasswordHasher('scrypt', cost=2 ** 10, workers=1, queue_size=1, wait_timeout=0.05)
+    release = threading.Event()
+    running = hasher._submit(release.wait)
+    queued = hasher._submit(lambda: 'queued')
+    with pytest.raises(HashingBusy):
+        hasher.hash('pw')
+    release.set()
+    running.result(), queued.result()
+    assert hasher.verify(hasher.hash('pw'), 'pw')
+    assert hasher.stats()['rejected'] == 1
+
+
+def test_calibration_and_config():
+    assert calibrate('pbkdf2', 1.0) == MIN_PBKDF2_ITERATIONS  # a tiny target falls back to the floor
+    config = PasswordHashConfig.from_env({'HEALTHTRACKER_PASSWORD_SCHEME': 'PBKDF2',
+                                          'HEALTHTRACKER_PASSWORD_COST': '5000',
+                                          'HEALTHTRACKER_PASSWORD_WORKERS': '2'})
+    hasher = PasswordHasher.from_config(config)
+    assert (hasher.method, hasher.workers) == ('pbkdf2:sha256:5000', 2)
+    with pytest.raises(ValueError):
+        PasswordHashConfig(scheme='md5')
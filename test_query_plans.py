@@ -0,0 +1,196 @@
+"""
+Query-plan regression suite: every per-user query must use an index
+
+Repository queries are captured with a trace callback while the repository
+methods run, then each one is checked with EXPLAIN QUERY PLAN. Queries still
+issued directly from app.py routes are listed in ROUTE_QUERIES.
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from database.indexes import missing_indexes
+from database.rollups import ROLLUP_SOURCES, refresh_sql
+from repositories.user_repository import UserRepository
+from repositories.health_data_repository import HealthDataRepository
+from repositories.mood_repository import MoodRepository
+from repositories.medical_repository import MedicalRepository
+from repositories.lifestyle_repository import LifestyleRepository
+from repositories.dashboard_repository import DashboardRepository
+from repositories.export_repository import ExportRepository, EXPORT_TABLES
+from repositories.rollup_repository import RollupRepository
+from repositories.cohort_repository import CohortRepository
+from repositories.alert_repository import AlertRepository
+from repositories.notification_outbox_repository import NotificationOutboxRepository
+from repositories.session_repository import SessionRepository
+from models.domain import User, BloodPressureRecord, HeightWeightRecord, SessionRecord
+
+
+# Queries that are expected to read every row of their table
+ALLOWED_FULL_SCANS = {
+    "SELECT * FROM users",  # UserRepository.get_all_users
+    "SELECT status, COUNT(*) FROM notification_outbox GROUP BY status",  # outbox stats
+}
+
+ROUTE_QUERIES = [
+    ("diet: today's records",
+     "SELECT id, diet_date, meal_type, description, calories "
+     "FROM diet_records WHERE user_id=? AND diet_date=? ORDER BY created_at DESC",
+     (1, '2024-01-01')),
+]
+
+
+def _plan_problems(conn, sql, params=()):
+    """Return plan steps that scan a whole table or sort in a temp b-tree"""
+    details = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    # Only scans of stored tables count: not a materialized CTE, and not the
+    # CONSTANT ROW of a FROM-less select around scalar subqueries
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return [d for d in details
+            if (d.startswith('SCAN ') and d.split()[1] in tables) or 'TEMP B-TREE' in d]
+
+
+def test_managed_indexes_exist(migrated_cm):
+    """Migrations create the whole managed index set"""
+    with migrated_cm.connection() as conn:
+        assert missing_indexes(conn) == []
+
+
+def _repository_calls(cm):
+    users = UserRepository(cm.db_path, cm)
+    health = HealthDataRepository(cm.db_path, cm)
+    mood = MoodRepository(cm.db_path, cm)
+    medical = MedicalRepository(cm.db_path, cm)
+    lifestyle = LifestyleRepository(cm.db_path, cm)
+    dashboard = DashboardRepository(cm.db_path, cm)
+    export = ExportRepository(cm.db_path, cm)
+    rollups = RollupRepository(cm.db_path, cm)
+    cohorts = CohortRepository(cm.db_path, cm)
+    alerts = AlertRepository(cm.db_path, cm)
+    outbox = NotificationOutboxRepository(cm.db_path, cm)
+    sessions = SessionRepository(cm.db_path, cm)
+
+    def walk_pages(fetch):
+        # First page, then one page older and one page newer through the cursors
+        first = fetch(1, None)
+        older = fetch(1, first.next_cursor)
+        fetch(1, older.prev_cursor)
+
+    return [
+        lambda: users.create_user(User(username="plan", password="x")),
+        lambda: users.get_user_by_username("plan"),
+        lambda: users.get_user_by_id(1),
+        lambda: users.update_user(User(id=1, username="plan")),
+        lambda: users.update_password("plan", "y"),
+        lambda: users.rehash_password(1, "y", "z"),
+        lambda: users.get_profile_version(1),
+        lambda: users.get_all_users(),
+        lambda: health.create_blood_pressure_record(
+            BloodPressureRecord(user_id=1, systolic=120, diastolic=80, date='2024-01-01',
+                                recorded_at='2024-01-01T08:00:00')),
+        lambda: health.bulk_create_blood_pressure_records([
+            BloodPressureRecord(user_id=1, systolic=118, diastolic=78, date='2023-12-31',
+                                recorded_at='2023-12-31 08:00:00')]),
+        lambda: health.get_blood_pressure_records_by_user(1),
+        lambda: health.get_latest_n_blood_pressure_records(1, 10),
+        lambda: health.get_latest_blood_pressure_record(1),
+        lambda: health.create_blood_pressure_record(
+            BloodPressureRecord(user_id=1, systolic=125, diastolic=82, date='2024-01-02',
+                                recorded_at='2024-01-02T08:00:00')),
+        lambda: walk_pages(lambda n, c: health.get_blood_pressure_records_page(1, n, c)),
+        lambda: health.update_blood_pressure_record(BloodPressureRecord(id=1, user_id=1)),
+        lambda: health.create_height_weight_record(
+            HeightWeightRecord(user_id=1, height=170, weight=65, date='2024-01-01',
+                               recorded_at='2024-01-01T08:00:00')),
+        lambda: health.bulk_create_height_weight_records([
+            HeightWeightRecord(user_id=1, height=170, weight=66, date='2023-12-31',
+                               recorded_at='2023-12-31 08:00:00')]),
+        lambda: health.get_height_weight_records_by_user(1),
+        lambda: health.get_latest_n_height_weight_records(1, 10),
+        lambda: health.get_latest_height_weight_record(1),
+        lambda: health.get_height_weight_series(1),
+        lambda: health.get_height_weight_series(1, '2024-01-01', '2024-12-31'),
+        lambda: health.get_vitals_version(1),
+        lambda: health.get_vitals_rows(1),
+        lambda: lifestyle.get_daily_calorie_totals(1, '2024-01-01', '2024-12-31'),
+        lambda: walk_pages(lambda n, c: health.get_height_weight_records_page(1, n, c)),
+        lambda: walk_pages(lambda n, c: medical.get_medical_records_page(1, n, c)),
+        lambda: walk_pages(lambda n, c: medical.get_appointments_page(1, n, c)),
+        lambda: walk_pages(lambda n, c: lifestyle.get_exercise_records_page(1, n, c)),
+        lambda: health.update_height_weight_record(HeightWeightRecord(id=1, user_id=1)),
+        lambda: mood.add_mood(1, 'happy'),
+        lambda: mood.get_today_mood(1),
+        lambda: mood.get_last_7_days(1),
+        lambda: dashboard.get_dashboard_data(1, '2024-01-01'),
+        lambda: list(export.iter_history(1, EXPORT_TABLES)),
+        lambda: rollups.get_daily_rollups(1, '2024-01-01', '2024-12-31'),
+        lambda: rollups.get_exercise_totals(1),
+        lambda: cohorts.get_user_id_range(),
+        lambda: list(cohorts.iter_latest_vitals(1, 1000, '2024-01-01')),
+        lambda: cohorts.get_latest_report('bmi'),
+        lambda: users.get_user_id_range(),
+        lambda: alerts.replace_alerts(1, 2000, '2024-01-01', alerts.evaluate_alerts(1, 2000, '2024-01-01')),
+        lambda: alerts.get_alerts(1, '2024-01-01'),
+        lambda: alerts.prune_alerts(1, 2000),
+        lambda: outbox.enqueue(1, 'log', 'health_reminder', {'message': 'x'}),
+        lambda: outbox.claim_batch('plan', 10),
+        lambda: outbox.mark_sent([1]),
+        lambda: outbox.mark_failed([(1, 'error', None)]),
+        lambda: outbox.release_expired_claims(300),
+        lambda: outbox.get_stats(),
+        lambda: medical.get_appointments_between(1, '2024-01-01', '2024-01-08'),
+        lambda: medical.get_pending_reminders('2024-01-01 09:00:00'),
+        lambda: medical.claim_reminder(1, '2024-01-01 09:00:00', '2024-01-01 09:00:00'),
+        lambda: medical.release_reminder(1, '2024-01-01 09:00:00'),
+        lambda: list(export.iter_history(1, EXPORT_TABLES, '2024-01-01', '2024-12-31')),
+        lambda: sessions.save_session(SessionRecord(sid='s1', user_id=1, username='plan', expires_at=2e9)),
+        lambda: sessions.get_session('s1', 1e9),
+        lambda: sessions.extend_session('s1', 3e9),
+        lambda: sessions.update_session_profiles(User(id=1, username='plan')),
+        lambda: sessions.delete_expired_sessions(1e9),
+        lambda: sessions.delete_session('s1'),
+        lambda: sessions.delete_user_sessions(1),
+        lambda: sessions.delete_all_sessions(),
+        lambda: health.delete_blood_pressure_record(1),
+        lambda: health.delete_height_weight_record(1),
+        lambda: users.delete_user(1),
+    ]
+
+
+def test_repository_queries_use_indexes(migrated_cm):
+    """No repository query falls back to a full table scan"""
+    statements = []
+    with migrated_cm.connection() as conn:
+        conn.set_trace_callback(statements.append)
+        for call in _repository_calls(migrated_cm):
+            call()
+        conn.set_trace_callback(None)
+
+        queries = {s.strip() for s in statements
+                   if s.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE'))}
+        assert queries, "no repository queries were captured"
+
+        failures = {}
+        for sql in queries:
+            if ' '.join(sql.split()) in ALLOWED_FULL_SCANS:
+                continue
+            problems = _plan_problems(conn, sql)
+            if problems:
+                failures[sql] = problems
+    assert not failures, failures
+
+
+@pytest.mark.parametrize("name,sql,params", ROUTE_QUERIES, ids=[q[0] for q in ROUTE_QUERIES])
+def test_route_queries_use_indexes(migrated_cm, name, sql, params):
+    """Queries issued from app.py routes do not scan full tables"""
+    with migrated_cm.connection() as conn:
+        assert _plan_problems(conn, sql, params) == []
+
+
+@pytest.mark.parametrize("source", ROLLUP_SOURCES, ids=[s.table for s in ROLLUP_SOURCES])
+def test_rollup_trigger_statements_use_indexes(migrated_cm, source):
+    """The per-day re-aggregation run by each rollup trigger is an index range read"""
+    with migrated_cm.connection() as conn:
+        assert _plan_problems(conn, refresh_sql(source, '1', "'2024-01-01'")) == []
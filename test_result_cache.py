@@ -0,0 +1,109 @@
+"""
+Tests for the per-user LRU + TTL result cache and its write-through invalidation
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+from repositories.user_repository import UserRepository
+from repositories.health_data_repository import HealthDataRepository
+from services.health_evaluation_service import HealthEvaluationService
+from services.result_cache import ResultCache, next_midnight
+from models.domain import User, BloodPressureRecord, HeightWeightRecord
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _service(cm, cache):
+    users = UserRepository(cm.db_path, cm)
+    health = HealthDataRepository(cm.db_path, cm)
+    for repository in (users, health):
+        repository.add_change_listener(cache.invalidate_user)
+    users.create_user(User(username="cached", password="x", gender="女", birthday="1990-05-01"))
+    return users, health, HealthEvaluationService(users, health, result_cache=cache)
+
+
+def test_lru_eviction_ttl_and_metrics():
+    """Least recently used entries go first; entries expire after the TTL"""
+    clock = FakeClock()
+    cache = ResultCache(max_entries=2, ttl=60, clock=clock)
+    calls = []
+
+    def get(user_id):
+        return cache.get_or_compute(user_id, 'value', (), lambda: calls.append(user_id) or user_id)
+
+    get(1), get(2), get(1), get(3)  # 2 is the least recently used when 3 arrives
+    assert calls == [1, 2, 3]
+    get(1)
+    get(2)
+    assert calls == [1, 2, 3, 2]
+
+    clock.now += 61
+    get(2)
+    assert calls == [1, 2, 3, 2, 2]
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['expirations']) == (2, 5, 2, 1)
+    assert stats['hit_ratio'] == 2 / 7
+
+
+def test_date_dependent_entries_expire_at_midnight():
+    """Age is recomputed on the first lookup after local midnight"""
+    late = datetime(2024, 5, 1, 23, 59, 0).timestamp()
+    clock = FakeClock(late)
+    cache = ResultCache(ttl=3600, clock=clock)
+    service = HealthEvaluationService(None, None, result_cache=cache)
+
+    service.calculate_age_and_days('1990-05-02')
+    assert next_midnight(late) == datetime(2024, 5, 2).timestamp()
+    clock.now = datetime(2024, 5, 2, 0, 0, 1).timestamp()
+    service.calculate_age_and_days('1990-05-02')
+    assert cache.stats()['expirations'] == 1
+
+
+def test_repository_writes_invalidate(migrated_cm):
+    """Creating, updating or deleting a reading or the profile drops the user's entries"""
+    cache = ResultCache()
+    users, health, service = _service(migrated_cm, cache)
+
+    assert service.evaluate_latest_blood_pressure(1)['status'] == '無血壓數據'
+    assert service.evaluate_latest_blood_pressure(1)['status'] == '無血壓數據'
+    assert cache.stats()['hits'] == 1
+
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=1, systolic=150, diastolic=95, date='2024-03-01', recorded_at='2024-03-01 08:00:00'))
+    assert service.evaluate_latest_blood_pressure(1)['status'] == '第二期高血壓'
+    health.update_blood_pressure_record(BloodPressureRecord(id=1, user_id=0, systolic=115, diastolic=75))
+    assert service.evaluate_latest_blood_pressure(1)['status'] == '正常血壓'
+    health.delete_blood_pressure_record(1)
+    assert service.evaluate_latest_blood_pressure(1)['status'] == '無血壓數據'
+
+    health.bulk_create_height_weight_records([HeightWeightRecord(
+        user_id=1, height=170, weight=65, date='2024-03-01', recorded_at='2024-03-01 08:00:00')])
+    assert '正常體重' in service.evaluate_latest_bmi(1, '女', 33)['status']
+
+    assert service.get_user_profile(1) == ('女', '1990-05-01')
+    user = users.get_user_by_id(1)
+    user.gender = '男'
+    users.update_user(user)
+    assert service.get_user_profile(1) == ('男', '1990-05-01')
+    assert cache.stats()['invalidations'] == 6  # create_user included
+
+
+def test_write_during_compute_is_not_cached():
+    """A result computed across an invalidation is returned but not stored"""
+    cache = ResultCache()
+
+    def compute():
+        cache.invalidate_user(7)
+        return 'stale'
+
+    assert cache.get_or_compute(7, 'value', (), compute) == 'stale'
+    assert cache.get_or_compute(7, 'value', (), lambda: 'fresh') == 'fresh'
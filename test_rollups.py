@@ -0,0 +1,66 @@
+"""
+Tests for the trigger-maintained daily rollups
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import sqlite3
+
+from database.rollups import rebuild
+from repositories.rollup_repository import RollupRepository
+
+
+def _snapshot(conn):
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute("SELECT * FROM daily_rollups ORDER BY user_id, day")]
+    finally:
+        conn.row_factory = None
+
+
+def test_triggers_keep_rollups_equal_to_a_rebuild(migrated_cm):
+    """Inserts, updates and deletes leave the same rollups a full rebuild produces"""
+    with migrated_cm.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO blood_pressure (user_id, systolic, diastolic, date, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [(1, 120, 80, '2024-01-01', '2024-01-01 08:00:00'),
+             (1, 150, 95, '2024-01-01', '2024-01-01 20:00:00'),
+             (1, 118, 76, '2024-01-02', '2024-01-02 08:00:00'),
+             (2, 130, 85, '2024-01-01', '2024-01-01 09:00:00')])
+        conn.executemany(
+            "INSERT INTO height_weight (user_id, height, weight, date, recorded_at) VALUES (?, ?, ?, ?, ?)",
+            [(1, 170, 70.5, '2024-01-01', '2024-01-01 07:00:00'),
+             (1, 170, 70.1, '2024-01-01', '2024-01-01 22:00:00')])
+        conn.executemany(
+            "INSERT INTO exercise_records (user_id, exercise_date, exercise_type, duration, calories) VALUES (?, ?, ?, ?, ?)",
+            [(1, '2024-01-01', '慢跑', 30, 250), (1, '2024-01-02', '游泳', 45, 400)])
+        conn.executemany(
+            "INSERT INTO diet_records (user_id, diet_date, meal_type, calories) VALUES (?, ?, ?, ?)",
+            [(1, '2024-01-01', '早餐', 450), (1, '2024-01-01', '午餐', 700)])
+        conn.execute("INSERT INTO mood_records (user_id, mood, mood_date) VALUES (1, 'very_happy', '2024-01-01')")
+
+        conn.execute("DELETE FROM blood_pressure WHERE systolic = 150")
+        conn.execute("UPDATE exercise_records SET exercise_date = '2024-01-03' WHERE calories = 400")
+        conn.execute("UPDATE diet_records SET calories = 500 WHERE meal_type = '早餐'")
+
+    with migrated_cm.connection() as conn:
+        maintained = _snapshot(conn)
+        with migrated_cm.transaction():
+            rebuild(conn)
+        assert _snapshot(conn) == maintained
+
+    day = RollupRepository(migrated_cm.db_path, migrated_cm).get_daily_rollups(1, '2024-01-01', '2024-01-01')[0]
+    assert (day.bp_count, day.systolic_max, day.systolic_mean) == (1, 120, 120.0)
+    assert (day.weight, day.calories_in, day.calories_burned, day.mood_score) == (70.1, 1200, 250, 2.0)
+    assert RollupRepository(migrated_cm.db_path, migrated_cm).get_exercise_totals(1) == (2, 650)
+
+
+def test_rebuild_for_one_user(migrated_cm):
+    with migrated_cm.transaction() as conn:
+        conn.execute("INSERT INTO diet_records (user_id, diet_date, calories) VALUES (1, '2024-01-01', 300)")
+        conn.execute("INSERT INTO diet_records (user_id, diet_date, calories) VALUES (2, '2024-01-01', 900)")
+        conn.execute("UPDATE daily_rollups SET calories_in = 0")
+        assert rebuild(conn, user_id=2) == 1
+        rows = conn.execute("SELECT user_id, calories_in FROM daily_rollups ORDER BY user_id").fetchall()
+    assert rows == [(1, 0), (2, 900)]
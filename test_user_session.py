@@ -0,0 +1,136 @@
+"""
+Tests for server-side sessions and the request-scoped current-user cache
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+from flask import Flask, jsonify
+
+from di_container import (
+    initialize_container, get_auth_service, get_connection_manager, get_migrator, get_repository,
+    get_session_manager
+)
+from services.session_store import MemorySessionStore, SessionManager
+from user_session import get_current_user, login_user, logout_user, revoke_user_sessions
+from models.domain import User
+
+
+@pytest.fixture
+def app(tmp_path):
+    initialize_container(str(tmp_path / "session.db"))
+    get_migrator().upgrade()
+    get_auth_service().register_user("alice", "pw")
+
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    statements = []
+    app.statements = statements
+
+    @app.route('/login')
+    def login():
+        login_user(get_auth_service().authenticate_user("alice", "pw"))
+        return 'ok'
+
+    @app.route('/logout')
+    def logout():
+        logout_user()
+        return 'ok'
+
+    @app.route('/whoami')
+    def whoami():
+        return jsonify(get_current_user())
+
+    @app.route('/me')
+    def me():
+        with get_connection_manager().connection() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                first, second = get_current_user(), get_current_user()
+            finally:
+                conn.set_trace_callback(None)
+        assert first is second
+        return jsonify(first)
+
+    return app
+
+
+def test_authenticated_request_skips_the_users_table(app):
+    """The current user comes from one session lookup"""
+    client = app.test_client()
+    client.get('/login')
+    with client.session_transaction() as cookie:
+        assert set(cookie) == {'sid'}
+
+    user = client.get('/me').get_json()
+    assert (user['username'], user['id'], user['gender']) == ('alice', 1, None)
+    assert 'password' not in user
+    assert len(app.statements) == 1
+    assert 'FROM sessions' in app.statements[0] and 'users' not in app.statements[0]
+
+
+def test_profile_changes_rewrite_sessions(app):
+    client = app.test_client()
+    client.get('/login')
+
+    users = get_repository('user')
+    user = users.get_user_by_id(1)
+    user.gender, user.birthday = '女', '1990-05-01'
+    users.update_user(user)
+    app.statements.clear()
+    me = client.get('/me').get_json()
+    assert (me['gender'], me['birthday'], me['profile_version']) == ('女', '1990-05-01', 1)
+    assert not any('users' in statement for statement in app.statements)
+
+    users.delete_user(1)
+    assert client.get('/me').get_json() is None
+
+
+def test_logout_and_revocation_end_sessions_everywhere(app):
+    laptop, phone, tablet = app.test_client(), app.test_client(), app.test_client()
+    for client in (laptop, phone, tablet):
+        client.get('/login')
+
+    laptop.get('/logout')
+    assert laptop.get('/me').get_json() is None
+    assert phone.get('/me').get_json()['id'] == 1
+
+    with app.test_request_context():
+        assert revoke_user_sessions(1) == 2
+    assert phone.get('/me').get_json() is None
+    assert tablet.get('/me').get_json() is None
+
+
+def test_legacy_cookie_is_upgraded(app):
+    client = app.test_client()
+    with client.session_transaction() as cookie:
+        cookie['user'] = {'id': 1, 'username': 'alice', 'verified_at': 0}
+    assert client.get('/whoami').get_json()['username'] == 'alice'
+    with client.session_transaction() as cookie:
+        assert set(cookie) == {'sid'}
+    assert get_session_manager().revoke_all() == 1
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_expiry_and_sweep():
+    clock = FakeClock()
+    store = MemorySessionStore()
+    manager = SessionManager(store, None, ttl=100, clock=clock)
+    kept, _ = manager.open(User(id=1, username='a'))
+    dropped, _ = manager.open(User(id=2, username='b'))
+
+    clock.now += 60  # under half the TTL left: the expiry moves forward
+    assert manager.lookup(kept).expires_at == clock.now + 100
+    clock.now += 50
+    assert manager.lookup(kept) is not None
+    assert manager.lookup(dropped) is None
+    assert manager.sweep()['expired'] == 1
+    assert manager.revoke_user(1) == 1 and manager.lookup(kept) is None
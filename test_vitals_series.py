@@ -0,0 +1,95 @@
+"""
+Tests for the columnar vitals series and its per-user cache
+"""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+from repositories.health_data_repository import HealthDataRepository
+from services.health_evaluation_service import HealthEvaluationService
+from services.vitals_series import VitalsSeries, VitalsSeriesCache
+from models.domain import BloodPressureRecord, HeightWeightRecord
+
+
+def _setup(cm):
+    health = HealthDataRepository(cm.db_path, cm)
+    return cm, health, VitalsSeriesCache(health)
+
+
+def _series(bp_rows, hw_rows=()):
+    rows = [(0, t, s, d, p) for t, s, d, p in bp_rows] + [(1, t, h, w, None) for t, h, w in hw_rows]
+    return VitalsSeries.from_rows(1, 1, rows)
+
+
+def test_columns_are_sorted_read_only_views():
+    """Rows arrive unordered; columns come out sorted, contiguous and immutable"""
+    series = _series([(300, 130, 85, None), (100, 110, 70, 60), (200, 120, 80, 66)],
+                     [(150, 170, 65), (50, 170, 63)])
+
+    assert series.bp['systolic'].tolist() == [110, 120, 130]
+    assert np.isnan(series.bp['pulse'][2])
+    assert series.bp['systolic'].flags.c_contiguous
+    with pytest.raises(ValueError):
+        series.bp['systolic'][0] = 0
+    assert series.hw.labels() == ['1970-01-01 00:00:50', '1970-01-01 00:02:30']
+
+    window = series.between('1970-01-01 00:01:40', '1970-01-01 00:05:00')
+    assert window.bp['diastolic'].tolist() == [70, 80]
+    assert window.hw['weight'].tolist() == [65]
+    assert np.shares_memory(window.bp['diastolic'], series.bp['diastolic'])
+    assert len(series.between('1971-01-01').bp) == 0
+
+
+def test_rolling_mean_and_bmi():
+    """Rolling means skip missing values; BMI is NaN where it cannot be derived"""
+    series = _series([(1, 100, 60, 60), (2, 110, 70, None), (3, 120, 80, 70), (4, 130, 90, 80)],
+                     [(1, 200, 80), (2, None, 70), (3, 160, 64)])
+
+    assert series.bp.rolling_mean('systolic', 2).tolist() == [100, 105, 115, 125]
+    assert series.bp.rolling_mean('pulse', 2).tolist() == [60, 60, 70, 75]
+    bmi = series.bmi()
+    assert bmi[0] == pytest.approx(20.0) and np.isnan(bmi[1]) and bmi[2] == pytest.approx(25.0)
+    assert series.hw.tail(2).values('height') == [None, 160]
+
+
+def test_cache_revalidates_on_version(migrated_cm):
+    """Unchanged histories are served from the cache; any reading change reloads"""
+    cm, health, cache = _setup(migrated_cm)
+    health.create_blood_pressure_record(BloodPressureRecord(
+        user_id=1, systolic=120, diastolic=80, recorded_at='2024-01-01 08:00:00'))
+    first = cache.get(1)
+    assert cache.get(1) is first
+
+    health.create_height_weight_record(HeightWeightRecord(
+        user_id=1, height=170, weight=70, recorded_at='2024-01-02 08:00:00'))
+    second = cache.get(1)
+    assert second is not first and len(second.hw) == 1
+
+    with cm.transaction() as conn:
+        # Moving a reading to another user changes both histories
+        conn.execute("UPDATE blood_pressure SET user_id = 2 WHERE id = 1")
+    assert len(cache.get(1).bp) == 0
+    assert len(cache.get(2).bp) == 1
+    health.delete_blood_pressure_record(1)
+    assert len(cache.get(2).bp) == 0
+    assert cache.stats()['hits'] == 1
+
+
+def test_health_trends_from_series(migrated_cm):
+    """Trends list the latest ten readings newest first"""
+    _, health, cache = _setup(migrated_cm)
+    for day in range(1, 13):
+        health.create_blood_pressure_record(BloodPressureRecord(
+            user_id=1, systolic=100 + day * 5, diastolic=70, recorded_at=f'2024-01-{day:02d} 08:00:00'))
+    health.create_height_weight_record(HeightWeightRecord(
+        user_id=1, height=175, weight=70, recorded_at='2024-01-05 08:00:00'))
+
+    trends = HealthEvaluationService(None, health, vitals_series=cache).get_health_trends(1)
+    bp = trends['blood_pressure_trend']
+    assert len(bp) == 10
+    assert (bp[0]['date'], bp[0]['systolic'], bp[0]['category']) == ('2024-01-12', 160, '第一期高血壓')
+    assert bp[-1]['date'] == '2024-01-03'
+    assert trends['bmi_trend'] == [{'date': '2024-01-05', 'bmi': 22.9, 'category': '正常體重'}]
@@ -0,0 +1,108 @@
+"""
+Session-backed current user
+
+The Flask session cookie holds only the token of a server-side session
+(services.session_store). Its record carries the user's id, username,
+gender, birthday and profile version, so resolving the current user is a
+single session lookup and never reads the users table; profile updates
+rewrite the record and logout deletes it in every worker. Within a request
+the result is cached on ``flask.g``.
+"""
+from typing import Any, Dict, Optional
+
+from flask import g, session
+
+from di_container import get_auth_service, get_session_manager
+from models.domain import SessionRecord, User
+
+
+_TOKEN_KEY = 'sid'
+# Cookies from before server-side sessions carry the user entry or the username
+_LEGACY_KEYS = ('user', 'username')
+
+
+def _public(record: SessionRecord) -> Dict[str, Any]:
+    return {
+        'id': record.user_id,
+        'username': record.username,
+        'gender': record.gender,
+        'birthday': record.birthday,
+        'profile_version': record.profile_version
+    }
+
+
+def login_user(user: User):
+    """Start a server-side session for the authenticated user"""
+    manager = get_session_manager()
+    previous = session.get(_TOKEN_KEY)
+    if previous:
+        # A new token on every login, so a planted cookie never becomes authenticated
+        manager.close(previous)
+    for key in _LEGACY_KEYS:
+        session.pop(key, None)
+    token, record = manager.open(user)
+    if token:
+        session[_TOKEN_KEY] = token
+    else:
+        session.pop(_TOKEN_KEY, None)
+    g.current_user = _public(record) if token else None
+
+
+def logout_user():
+    """End the current session"""
+    token = session.pop(_TOKEN_KEY, None)
+    if token:
+        get_session_manager().close(token)
+    for key in _LEGACY_KEYS:
+        session.pop(key, None)
+    g.pop('current_user', None)
+
+
+def revoke_user_sessions(user_id: int) -> int:
+    """End every session of a user, e.g. after a password reset"""
+    g.pop('current_user', None)
+    return get_session_manager().revoke_user(user_id)
+
+
+def invalidate_current_user():
+    """Re-read the session on the next lookup (after a profile update)"""
+    g.pop('current_user', None)
+
+
+def _load_legacy_user() -> Optional[Dict[str, Any]]:
+    entry, username = session.get('user'), session.get('username')
+    auth_service = get_auth_service()
+    if isinstance(entry, dict) and entry.get('id') is not None:
+        user = auth_service.get_user_by_id(entry['id'])
+    else:
+        user = auth_service.get_user_by_username(username) if username else None
+    if not user:
+        logout_user()
+        return None
+    login_user(user)
+    return g.current_user
+
+
+def _load_current_user() -> Optional[Dict[str, Any]]:
+    token = session.get(_TOKEN_KEY)
+    if not token:
+        return _load_legacy_user() if any(key in session for key in _LEGACY_KEYS) else None
+    record = get_session_manager().lookup(token)
+    if record is None:
+        # Expired, logged out elsewhere or revoked
+        session.pop(_TOKEN_KEY, None)
+        return None
+    return _public(record)
+
+
+def get_current_user() -> Optional[Dict[str, Any]]:
+    """Get the logged in user as a dict, loading it at most once per request"""
+    if 'current_user' not in g:
+        g.current_user = _load_current_user()
+    return g.current_user
+
+
+def get_current_user_id() -> Optional[int]:
+    """Get the logged in user's id"""
+    user = get_current_user()
+    return user['id'] if user else None